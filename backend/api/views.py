@@ -4,6 +4,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import serializers
 from .models import Product
 from .serializers import ProductSerializer
+from core.throttling import RegisterRateThrottle
 
 # -------------------------
 # USER REGISTER
@@ -26,7 +27,10 @@ class UserSerializer(serializers.ModelSerializer):
 class RegisterUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    # Like TokenObtainPairView: nothing to authenticate, so no password check runs before the throttle.
+    authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterRateThrottle]
 
 
 # -------------------------
@@ -1,7 +1,10 @@
+import importlib.util
 import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "unsafe-dev-secret")
@@ -33,9 +36,26 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-
+    "core.db_router.DatabaseRoutingMiddleware",
 ]
 
+# Per-request query count / DB / serializer / render timings (Server-Timing header + slow log).
+REQUEST_INSTRUMENTATION = os.getenv("REQUEST_INSTRUMENTATION", "0") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG", str(BASE_DIR / "logs" / "slow_requests.jsonl"))
+if REQUEST_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, "core.middleware.QueryInstrumentationMiddleware")
+
+# Staff-only request profiling: ?__profile=1 or X-Profile: 1 (cProfile, .prof for snakeviz),
+# ?__profile=sample (stack sampling every PROFILE_SAMPLE_MS, speedscope JSON). Stored under
+# PROFILE_DIR (newest PROFILE_KEEP kept), listed at /api/profiles/. Off: no middleware at all.
+PROFILING = os.getenv("PROFILING", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "logs" / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "1"))
+if PROFILING:
+    MIDDLEWARE.append("core.profiling.ProfilingMiddleware")
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -62,9 +82,41 @@ DATABASES = {
     "default": {
         "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.sqlite3"),
         "NAME": os.getenv("DB_NAME", BASE_DIR / "db.sqlite3"),
+        "USER": os.getenv("DB_USER", ""),
+        "PASSWORD": os.getenv("DB_PASSWORD", ""),
+        "HOST": os.getenv("DB_HOST", ""),
+        "PORT": os.getenv("DB_PORT", ""),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "0") == "1",
     }
 }
 
+# SQLite production profile: WAL, synchronous=NORMAL, busy timeout, cache/mmap sizes
+# (core.sqlite) and BEGIN IMMEDIATE for write_atomic() blocks (core.backends.sqlite3).
+SQLITE_PRODUCTION = os.getenv("SQLITE_PRODUCTION", "0") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+if SQLITE_PRODUCTION and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["ENGINE"] = "core.backends.sqlite3"
+    DATABASES["default"]["OPTIONS"] = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+# Optional read replica / reporting database for finance aggregates and exports.
+if os.getenv("DB_REPORTING_NAME"):
+    DATABASES["reporting"] = {
+        **DATABASES["default"],
+        "ENGINE": os.getenv("DB_REPORTING_ENGINE", DATABASES["default"]["ENGINE"]),
+        "NAME": os.getenv("DB_REPORTING_NAME"),
+        "USER": os.getenv("DB_REPORTING_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.getenv("DB_REPORTING_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "HOST": os.getenv("DB_REPORTING_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.getenv("DB_REPORTING_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["core.db_router.ReportingRouter"]
+# After a write, that user's reporting reads stay on the primary for this long.
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -89,8 +141,39 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Reverse proxies in front of the app: throttles read the client IP from the
+    # X-Forwarded-For entry they appended. 0 means REMOTE_ADDR only.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", "0")),
 }
 
+# orjson-backed JSON renderer/parser with Decimals rendered as exact strings, plus
+# MessagePack (Accept / Content-Type: application/msgpack) when msgpack is installed.
+if os.getenv("FAST_JSON", "1") == "1":
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+    if importlib.util.find_spec("msgpack"):
+        REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('core.renderers.MessagePackRenderer')
+        REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('core.renderers.MessagePackParser')
+
+# Fast path: JWT first, user built from token claims (no DB hit), no Basic/PBKDF2 per request.
+AUTH_FAST_PATH = os.getenv("AUTH_FAST_PATH", "0") == "1"
+if AUTH_FAST_PATH:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'core.authentication.StatelessJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    )
+# Seconds a user's is_active flag is trusted before re-checking (deactivation latency).
+JWT_USER_STATE_TTL = int(os.getenv("JWT_USER_STATE_TTL", "30"))
+
 
 
 SIMPLE_JWT = {
@@ -99,5 +182,72 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_LOCATIONS = {
+    "locmem": "kabul-asia",
+    "file": str(BASE_DIR / ".cache"),
+    "db": "django_cache",
+    "redis": "redis://127.0.0.1:6379/1",
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND={CACHE_BACKEND!r} is not supported; use one of: {', '.join(CACHE_BACKENDS)}."
+    )
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.getenv("CACHE_LOCATION", CACHE_LOCATIONS[CACHE_BACKEND]),
+    }
+}
+
+# Rendered GET responses of services/projects/employees/company settings, invalidated by
+# model writes. Use a file/db/redis CACHE_BACKEND when running several workers.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# Identical concurrent finance report/monthly/summary GETs share one computation: a lock
+# per process plus a cache lease across workers (needs a shared CACHE_BACKEND). Followers
+# stop waiting after this many seconds and compute themselves; 0 disables coalescing.
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+
+# POST /api/users/bulk/: threads of the per-process password hashing pool (0 = min(4, CPUs)).
+USER_BULK_HASH_WORKERS = int(os.getenv("USER_BULK_HASH_WORKERS", "0"))
+
+# POST /api/batch/: GET sub-requests executed in-process under one authentication.
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+
+# GET /api/events/ (SSE, ASGI only): bounded per-client queues; EVENTS_SPOOL_PATH shares
+# events between workers on one host through an appended JSONL file. Under WSGI (gunicorn,
+# runserver) it answers 503 and the dashboard polls every EVENTS_POLL_SECONDS instead.
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_SPOOL_PATH = os.getenv("EVENTS_SPOOL_PATH", "")
+EVENTS_SPOOL_POLL_SECONDS = float(os.getenv("EVENTS_SPOOL_POLL_SECONDS", "0.25"))
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "30"))
+
+# GET /api/sync/?since=<cursor>: change-feed entries (or full-sync rows) per page (see
+# compact_changelog). Off SQLite, entries younger than SYNC_SETTLE_SECONDS are held back:
+# concurrent transactions may still commit lower ids. Keep it above the longest write.
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "5"))
+
+# archive_invoices: fiscal years start on the 1st of this month (local time). Only closed
+# years can be archived; reports read their totals from the daily rollup tables.
+FISCAL_YEAR_START_MONTH = int(os.getenv("FISCAL_YEAR_START_MONTH", "1"))
+
+# Login/reset/register throttling: "local" (per process) or "cache" (shared via CACHES).
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "local")
+LOGIN_THROTTLE_RATES = {
+    "login": os.getenv("LOGIN_THROTTLE_RATE", "10/min"),
+    "reset_password": os.getenv("RESET_PASSWORD_THROTTLE_RATE", "5/hour"),
+    "register": os.getenv("REGISTER_THROTTLE_RATE", "5/hour"),
+}
+
 # Password reset token (set in env for production)
 RESET_PASSWORD_TOKEN = os.getenv("RESET_PASSWORD_TOKEN", "KABUL_ASIA_RESET")
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import changefeed, db_router, pagination, pricing, response_cache, sqlite
+        from .models import CompanySetting, Employee, Project, Service
+
+        changefeed.connect_signals()
+        db_router.connect_signals()
+        pricing.connect_signals()
+        sqlite.connect_signals()
+        checks.register(pagination.check_keyset_orderings, checks.Tags.urls)
+        response_cache.connect_signals({
+            "service": Service,
+            "project": Project,
+            "employee": Employee,
+            "company_setting": CompanySetting,
+        })
@@ -0,0 +1,82 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def _in_atomic_block():
+    return connection.in_atomic_block
+
+
+def _isolated(func):
+    # Runs in a pool thread with its own connection; honour CONN_MAX_AGE afterwards.
+    def call():
+        try:
+            return func()
+        finally:
+            close_old_connections()
+
+    return call
+
+
+async def gather_sync(calls):
+    """
+    Run independent sync ORM callables ({name: callable}) concurrently, each
+    on its own pool thread and DB connection, and return {name: result}.
+    Inside an open transaction the calls run one by one on the request's
+    connection instead, since other connections cannot see its rows.
+    """
+    if await sync_to_async(_in_atomic_block)():
+        return {name: await sync_to_async(func)() for name, func in calls.items()}
+    results = await asyncio.gather(
+        *(sync_to_async(_isolated(func), thread_sensitive=False)() for func in calls.values())
+    )
+    return dict(zip(calls, results))
+
+
+async def offload(func, *args, **kwargs):
+    """Run CPU-heavy sync work (e.g. PDF rendering) off the event loop."""
+    return await sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+def _authenticate(request):
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    user = drf_request.user
+    return user if user is not None and user.is_authenticated else None
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+
+
+def async_api_view(view):
+    """
+    Async counterpart of ``@api_view(["GET"])`` + ``IsAuthenticated`` for
+    native Django async views (DRF views are sync only). The view receives
+    the HttpRequest with ``user`` set from the configured DRF authenticators.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return render({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except exceptions.APIException as exc:
+            return render({"detail": exc.detail}, status=exc.status_code)
+        if user is None:
+            return render({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
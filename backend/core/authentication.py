@@ -0,0 +1,113 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ActiveUserCache:
+    """
+    Process-local TTL cache of a user's ``(is_active, is_staff, is_superuser)``
+    keyed by user id.
+    """
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, user_id, state):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[user_id] = (state, time.monotonic() + self.ttl)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+active_users = ActiveUserCache(getattr(settings, "JWT_USER_STATE_TTL", 30))
+INACTIVE = (False, False, False)
+
+
+def user_state(user_id):
+    """``(is_active, is_staff, is_superuser)`` of ``user_id``, at most JWT_USER_STATE_TTL old."""
+    state = active_users.get(user_id)
+    if state is None:
+        state = (
+            User.objects.filter(pk=user_id)
+            .values_list("is_active", "is_staff", "is_superuser").first() or INACTIVE
+        )
+        active_users.set(user_id, state)
+    return state
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from token claims. Permission flags come from ``user_state``
+    rather than the claims, so a demotion takes effect within the TTL instead
+    of when the token expires.
+    """
+
+    def __init__(self, token, is_staff=False, is_superuser=False):
+        super().__init__(token)
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Builds ``request.user`` from the access token claims instead of loading
+    the ``User`` row. Deactivated users are still rejected, and staff rights
+    rechecked, through a short TTL cache rather than a query per request.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        is_active, is_staff, is_superuser = user_state(user_id)
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return ClaimsUser(validated_token, is_staff=is_staff, is_superuser=is_superuser)
+
+
+def get_db_user(user):
+    """Return a real ``User`` for code that writes to it (passwords, FKs)."""
+    if isinstance(user, User):
+        return user
+    return User.objects.get(pk=user.pk)
+
+
+def _refresh_user_state(sender, instance, **kwargs):
+    active_users.discard(instance.pk)
+
+
+post_save.connect(_refresh_user_state, sender=User, dispatch_uid="core.authentication.user_saved")
+post_delete.connect(_refresh_user_state, sender=User, dispatch_uid="core.authentication.user_deleted")
@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend whose write transactions (``core.sqlite.write_atomic``)
+    start with BEGIN IMMEDIATE: the write lock is taken up front (waiting up
+    to busy_timeout) instead of failing with "database is locked" when a
+    deferred transaction later tries to upgrade to a write. Every other
+    transaction stays DEFERRED, so readers never queue behind writers.
+    """
+
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE" if self.begin_immediate else "BEGIN DEFERRED")
@@ -0,0 +1,245 @@
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from . import changefeed, response_cache
+from .bulk import explicit_timestamps
+from .events import RESYNC, broker
+from .renderers import FastJSONRenderer, orjson
+from .sqlite import write_atomic
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+FORMAT = "kabul-erp-backup"
+VERSION = 1
+# Sessions are left out: they are disposable and restoring them would revive old logins.
+BACKUP_APPS = ["contenttypes", "auth", "authtoken", "admin", "api", "core", "products", "finance", "invoices"]
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_renderer = FastJSONRenderer()
+
+
+class BackupError(ValueError):
+    pass
+
+
+def compressions():
+    return ["gzip", "zstd"] if zstandard is not None else ["gzip"]
+
+
+def backup_models():
+    """Every model of BACKUP_APPS (m2m tables included), referenced models first."""
+    models = [
+        model
+        for label in BACKUP_APPS if label in apps.app_configs
+        for model in apps.get_app_config(label).get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+    included = set(models)
+    ordered, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for field in model._meta.concrete_fields:
+            target = field.related_model
+            if target in included and target is not model:
+                visit(target)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def _line(value):
+    return _renderer.render(value) + b"\n"
+
+
+def _loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+@contextmanager
+def snapshot(using=DEFAULT_DB_ALIAS):
+    """
+    Yield a database alias whose reads all see one point in time. SQLite is
+    copied with the online backup API, so writers are not blocked while the
+    export streams; other engines read inside one REPEATABLE READ transaction.
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        with transaction.atomic(using=using):
+            with conn.cursor() as cursor:
+                read_only = " READ ONLY" if conn.vendor == "postgresql" else ""
+                cursor.execute(f"SET TRANSACTION ISOLATION LEVEL REPEATABLE READ{read_only}")
+            yield using
+        return
+
+    alias = f"{using}_backup_snapshot"
+    with tempfile.TemporaryDirectory(prefix="erp-backup-") as directory:
+        path = os.path.join(directory, "snapshot.sqlite3")
+        conn.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            conn.connection.backup(target)
+        finally:
+            target.close()
+        connections.settings[alias] = {**conn.settings_dict, "NAME": path}
+        try:
+            yield alias
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+
+def _compressor(compression, level=None):
+    if compression == "gzip":
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+    raise BackupError(f"فشرده‌سازی {compression} پشتیبانی نمی‌شود.")
+
+
+def export_lines(alias, chunk_size=2000):
+    """
+    The backup as JSONL: a header, then per model a ``{"model", "fields"}``
+    line followed by one array per row, and a trailer with the row count.
+    """
+    models = backup_models()
+    yield _line({
+        "format": FORMAT,
+        "version": VERSION,
+        "created_at": timezone.now(),
+        "models": [model._meta.label_lower for model in models],
+    })
+    rows = 0
+    for model in models:
+        fields = [field.attname for field in model._meta.concrete_fields]
+        yield _line({"model": model._meta.label_lower, "fields": fields})
+        for row in model._base_manager.using(alias).order_by("pk").values_list(*fields).iterator(chunk_size):
+            rows += 1
+            yield _line(row)
+    yield _line({"end": True, "rows": rows})
+
+
+def export_chunks(compression="gzip", using=DEFAULT_DB_ALIAS, chunk_size=2000):
+    """Compressed backup bytes, produced incrementally; memory does not grow with the data."""
+    compressor = _compressor(compression)
+    with snapshot(using) as alias:
+        for line in export_lines(alias, chunk_size):
+            data = compressor.compress(line)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def _reader(stream):
+    stream = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+    magic = stream.peek(4)[:4]
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=stream)
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise BackupError("برای خواندن پشتیبان zstd بسته zstandard لازم است.")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    return stream
+
+
+def _records(lines):
+    try:
+        for line in lines:
+            yield _loads(line)
+    except (EOFError, OSError, ValueError, zlib.error):
+        raise BackupError("فایل پشتیبان ناقص یا خراب است.")
+
+
+def _flush(model, batch):
+    if batch:
+        model._base_manager.bulk_create(batch)
+        batch.clear()
+
+
+def _load(records, models, batch_size):
+    tables = [model._meta.db_table for model in models.values()]
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, allow_cascade=True))
+    model, fields, batch, rows, ended = None, [], [], 0, False
+    for record in records:
+        if isinstance(record, list):
+            if model is None:
+                raise BackupError("ردیف بدون مدل در فایل پشتیبان.")
+            batch.append(model(**{field.attname: field.to_python(value) for field, value in zip(fields, record)}))
+            rows += 1
+            if len(batch) >= batch_size:
+                _flush(model, batch)
+        elif "model" in record:
+            _flush(model, batch)
+            model = models.get(record["model"])
+            if model is None:
+                raise BackupError(f"مدل {record['model']} در این نسخه وجود ندارد.")
+            by_attname = {field.attname: field for field in model._meta.concrete_fields}
+            try:
+                fields = [by_attname[name] for name in record["fields"]]
+            except KeyError as exc:
+                raise BackupError(f"فیلد {exc.args[0]} در مدل {record['model']} وجود ندارد.")
+        elif record.get("end"):
+            _flush(model, batch)
+            ended = record.get("rows") == rows
+            break
+    if not ended:
+        raise BackupError("فایل پشتیبان ناقص است.")
+    return rows
+
+
+def restore(stream, batch_size=1000):
+    """
+    Replace the data of BACKUP_APPS with the backup read from ``stream`` (gzip,
+    zstd or plain JSONL) in one transaction. Rows are inserted with bulk_create
+    in batches, referenced models first, keeping their primary keys.
+    Returns the number of rows restored.
+    """
+    records = _records(_reader(stream))
+    try:
+        header = next(records)
+    except StopIteration:
+        raise BackupError("فایل پشتیبان خالی است.")
+    if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != VERSION:
+        raise BackupError("قالب فایل پشتیبان شناخته نشد.")
+
+    models = {model._meta.label_lower: model for model in backup_models()}
+    timestamps = [
+        field for model in models.values() for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    previous_cursor = changefeed.latest_cursor()
+
+    with write_atomic():
+        with explicit_timestamps(*timestamps):
+            rows = _load(records, models, batch_size)
+
+        # Clients holding versions/cursors from before the restore must start over.
+        changefeed.force_full_sync(previous_cursor)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(models.values())):
+                cursor.execute(sql)
+        response_cache.invalidate_on_commit(*response_cache.registered_tags)
+        transaction.on_commit(lambda: broker.publish(RESYNC))
+    ContentType.objects.clear_cache()
+    return rows
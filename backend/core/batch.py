@@ -0,0 +1,110 @@
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/api/batch/"
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_items(payload):
+    if not isinstance(payload, dict) or not isinstance(payload.get("requests"), list):
+        raise BatchError("بدنه باید شامل فهرست requests باشد.")
+    items = payload["requests"]
+    limit = getattr(settings, "BATCH_MAX_REQUESTS", 20)
+    if not items or len(items) > limit:
+        raise BatchError(f"تعداد درخواست‌ها باید بین 1 و {limit} باشد.")
+    parsed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"path": item}
+        path = item.get("path") if isinstance(item, dict) else None
+        method = (item.get("method") or "GET").upper() if isinstance(item, dict) else "GET"
+        if not isinstance(path, str) or not path.startswith("/api/") or urlsplit(path).path == BATCH_PATH:
+            raise BatchError(f"مسیر درخواست {index} نامعتبر است.")
+        if method != "GET":
+            raise BatchError("فقط درخواست‌های GET پشتیبانی می‌شوند.")
+        parsed.append({"id": item.get("id", index), "path": path})
+    return parsed
+
+
+def _sub_request(request, path):
+    """A GET HttpRequest for ``path`` carrying the batch request's identity."""
+    parts = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH", "wsgi.input")
+    }
+    sub.META.update({"REQUEST_METHOD": "GET", "PATH_INFO": parts.path, "QUERY_STRING": parts.query})
+    sub.GET = QueryDict(parts.query)
+    sub.COOKIES = request.COOKIES
+    sub.user = request.user
+    # DRF's Request uses ForcedAuthentication for these, so sub-views skip re-authenticating.
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _body(response):
+    if isinstance(response, Response):
+        return response.data
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(response.content or b"null")
+    return None
+
+
+def execute(request, item):
+    try:
+        match = resolve(urlsplit(item["path"]).path)
+    except Resolver404:
+        return {"id": item["id"], "path": item["path"], "status": 404, "body": {"detail": "یافت نشد."}}
+    sub = _sub_request(request, item["path"])
+    try:
+        if iscoroutinefunction(match.func):
+            response = async_to_sync(match.func)(sub, *match.args, **match.kwargs)
+        else:
+            response = match.func(sub, *match.args, **match.kwargs)
+        body = _body(response)
+    except Exception:
+        logger.exception("Batch sub-request %s failed", item["path"])
+        return {"id": item["id"], "path": item["path"], "status": 500, "body": {"detail": "خطای داخلی سرور."}}
+    result = {"id": item["id"], "path": item["path"], "status": response.status_code, "body": body}
+    if body is None and response.status_code == 200:
+        result["content_type"] = response.get("Content-Type")
+    return result
+
+
+def _isolated(request, item):
+    try:
+        return execute(request, item)
+    finally:
+        close_old_connections()
+
+
+def run_batch(request, items, parallel=False):
+    # Inside a transaction the other connections cannot see its rows; stay sequential.
+    if not parallel or len(items) == 1 or connection.in_atomic_block:
+        return [execute(request, item) for item in items]
+    workers = min(len(items), getattr(settings, "BATCH_MAX_WORKERS", 4))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _isolated, request, item)
+            for item in items
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,14 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the dates we assign to auto_now/auto_now_add fields."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,111 @@
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .changefeed import committed_cursor
+from .models import ChangeLog, Service
+
+SNAPSHOT_CACHE_KEY = "catalog:snapshot"
+
+
+def _catalog_models():
+    from api.models import Product as ApiProduct
+    from products.models import Product
+
+    # kind -> (model, exported fields); kinds are change-feed model names, and
+    # the feed entry ids are the catalog versions. Stock quantity is left out
+    # on purpose: it changes on every sale and would force a rebuild per invoice.
+    return {
+        "service": (Service, ["id", "name", "price"]),
+        "product": (Product, ["id", "name", "price"]),
+        "api_product": (ApiProduct, ["id", "name", "price"]),
+    }
+
+
+def _kinds():
+    # Compaction/restore markers ("*") move the catalog version too: clients
+    # below the compaction floor are sent the full snapshot.
+    return [*_catalog_models(), "*"]
+
+
+def latest_version():
+    """
+    The newest committed feed entry of a catalog model or marker: one seek
+    per kind on the (model, id) index, never past the committed cursor.
+    """
+    watermark = committed_cursor()
+    return max(
+        ChangeLog.objects.filter(model=kind, id__lte=watermark)
+        .order_by("-id").values_list("id", flat=True).first() or 0
+        for kind in _kinds()
+    )
+
+
+def build_snapshot(version):
+    """
+    The catalog as of ``version``, read from the live tables. Each row
+    carries the id of its newest feed entry up to ``version`` (0 when it
+    has none yet); tombstones are the delete entries of rows that are gone.
+    Rows changed after ``version`` carry an older id and are simply sent
+    again on the client's next delta request.
+    """
+    snapshot = {"version": version, "fields": {}, "rows": {}, "deleted": []}
+    for kind, (model, fields) in _catalog_models().items():
+        entries = ChangeLog.objects.filter(model=kind, id__lte=version)
+        newest = entries.filter(object_id=OuterRef("pk")).order_by("-id").values("id")[:1]
+        rows = (
+            model.objects.annotate(catalog_version=Coalesce(Subquery(newest), 0))
+            .order_by("pk").values_list(*fields, "catalog_version")
+        )
+        snapshot["fields"][kind] = fields + ["version"]
+        snapshot["rows"][kind] = [list(values) for values in rows]
+        live = {row[0] for row in snapshot["rows"][kind]}
+        tombstones = (
+            entries.filter(op=ChangeLog.OP_DELETE)
+            .values("object_id").annotate(version=Max("id")).order_by()
+        )
+        snapshot["deleted"] += [
+            [kind, tombstone["object_id"], tombstone["version"]]
+            for tombstone in tombstones if tombstone["object_id"] not in live
+        ]
+    snapshot["deleted"].sort(key=lambda row: row[2])
+    return snapshot
+
+
+def render(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _full_payload(snapshot):
+    payload = {"version": snapshot["version"], "full": True, "fields": snapshot["fields"]}
+    payload.update(snapshot["rows"])
+    payload["deleted"] = []
+    return payload
+
+
+def get_snapshot():
+    """
+    Return ``(snapshot, rendered_full_payload)``. The blob is rebuilt only when
+    the catalog version moved; checking the version takes a few index seeks,
+    which also keeps per-process caches honest across workers.
+    """
+    version = latest_version()
+    cached = cache.get(SNAPSHOT_CACHE_KEY)
+    if cached is not None and cached[0]["version"] == version:
+        return cached
+    snapshot = build_snapshot(version)
+    cached = (snapshot, render(_full_payload(snapshot)))
+    cache.set(SNAPSHOT_CACHE_KEY, cached, timeout=None)
+    return cached
+
+
+def delta_payload(snapshot, since_version):
+    payload = {"version": snapshot["version"], "full": False, "fields": snapshot["fields"]}
+    for kind, rows in snapshot["rows"].items():
+        payload[kind] = [row for row in rows if row[-1] > since_version]
+    payload["deleted"] = [row for row in snapshot["deleted"] if row[2] > since_version]
+    return payload
+
@@ -0,0 +1,226 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .db_router import mark_written
+from .models import ChangeLog, Employee, Service
+from .sqlite import write_atomic
+
+
+def sync_models():
+    from finance.models import Expense
+    from invoices.models import Customer, Invoice, InvoiceItem
+    from products.models import Product
+
+    # name -> (model, exported fields); rows go out as arrays in this order.
+    return {
+        "service": (Service, ["id", "name", "price"]),
+        "employee": (Employee, ["id", "name", "role", "salary"]),
+        "product": (Product, ["id", "name", "price", "quantity"]),
+        "customer": (Customer, ["id", "name", "phone"]),
+        "invoice": (Invoice, ["id", "customer_id", "customer_name", "created_at", "amount_paid", "balance_due"]),
+        "invoice_item": (InvoiceItem, ["id", "invoice_id", "service_id", "product_id", "quantity", "price", "discount"]),
+        "expense": (Expense, ["id", "title", "category", "amount", "date"]),
+    }
+
+
+def feed_models():
+    """``{name: model}`` of every logged model: the synced tables plus the legacy catalog products."""
+    from api.models import Product as ApiProduct
+
+    models = {name: model for name, (model, _fields) in sync_models().items()}
+    models["api_product"] = ApiProduct
+    return models
+
+
+def record_changes(model, object_ids, op=ChangeLog.OP_UPSERT):
+    """Append feed entries for writes that skip model signals (bulk/F() updates)."""
+    mark_written()
+    ChangeLog.objects.bulk_create(
+        [ChangeLog(model=model, object_id=object_id, op=op) for object_id in object_ids]
+    )
+
+
+def latest_cursor():
+    return ChangeLog.objects.aggregate(cursor=Max("id"))["cursor"] or 0
+
+
+def committed_cursor():
+    """
+    The newest cursor below which every entry has committed. SQLite has one
+    writer at a time, so ids commit in order. Elsewhere (PostgreSQL) a lower
+    id may commit after a higher one has been read, so entries younger than
+    SYNC_SETTLE_SECONDS are held back until transactions that could still
+    own a lower id have finished.
+    """
+    if connections[ChangeLog.objects.db].vendor == "sqlite":
+        return latest_cursor()
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 5))
+    # Walks the primary key back from the newest entry: only the settle window is read.
+    return (
+        ChangeLog.objects.filter(created_at__lte=cutoff)
+        .order_by("-id").values_list("id", flat=True).first() or 0
+    )
+
+
+def compaction_floor():
+    """Cursors below this may have missed compacted tombstones and must resync."""
+    return (
+        ChangeLog.objects.filter(model="*", op=ChangeLog.OP_COMPACT)
+        .aggregate(floor=Max("object_id"))["floor"] or 0
+    )
+
+
+def force_full_sync(above=0):
+    """Send every cursor up to ``above`` (and the current one) back to a full sync, e.g. after a restore."""
+    floor = max(above, latest_cursor()) + 1
+    ChangeLog.objects.create(id=floor, model="*", object_id=floor, op=ChangeLog.OP_COMPACT)
+
+
+def _rows(model, fields, ids=None, after=None, limit=None):
+    qs = model.objects.order_by("pk")
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    if after is not None:
+        qs = qs.filter(pk__gt=after)
+    if limit is not None:
+        qs = qs[:limit]
+    return [list(values) for values in qs.values_list(*fields)]
+
+
+def parse_page(page):
+    """``"<cursor>:<model>:<after id>"`` -> its parts; ValueError when malformed."""
+    cursor, name, after = page.split(":")
+    if name not in sync_models():
+        raise ValueError(page)
+    return int(cursor), name, int(after)
+
+
+def full_payload(page=None, limit=1000):
+    """
+    One page of a full sync: at most ``limit`` rows, model by model in id
+    order. ``page`` is the ``next`` token of the previous page. The cursor is
+    read before the first page and carried in the token, so rows changed
+    while paging are sent again by the delta after it.
+    """
+    models = sync_models()
+    names = list(models)
+    if page is None:
+        cursor, name, after = committed_cursor(), names[0], 0
+    else:
+        cursor, name, after = parse_page(page)
+    changes = {name: [] for name in names}
+    next_page = None
+    remaining = limit
+    for name in names[names.index(name):]:
+        model, fields = models[name]
+        rows = _rows(model, fields, after=after, limit=remaining + 1)
+        changes[name] = rows[:remaining]
+        if len(rows) > remaining:
+            next_page = f"{cursor}:{name}:{changes[name][-1][0] if changes[name] else after}"
+            break
+        remaining -= len(rows)
+        after = 0
+    return {
+        "cursor": cursor,
+        "full": True,
+        "more": next_page is not None,
+        "next": next_page,
+        "fields": {name: fields for name, (_model, fields) in models.items()},
+        "changes": changes,
+        "deleted": {name: [] for name in names},
+    }
+
+
+def delta_payload(since, limit):
+    """
+    Changes after cursor ``since`` up to the committed cursor, at most
+    ``limit`` feed entries per call. Each object appears once with its
+    current row, or as a tombstone id.
+    """
+    entries = list(
+        ChangeLog.objects.filter(id__gt=since, id__lte=committed_cursor())
+        .exclude(op=ChangeLog.OP_COMPACT)
+        .order_by("id")
+        .values_list("id", "model", "object_id", "op")[: limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+    latest = {}
+    for _entry_id, model, object_id, op in entries:
+        latest[(model, object_id)] = op
+
+    models = sync_models()
+    upserts = {name: [] for name in models}
+    deleted = {name: [] for name in models}
+    for (model, object_id), op in latest.items():
+        if model in models:
+            (deleted if op == ChangeLog.OP_DELETE else upserts)[model].append(object_id)
+
+    changes = {}
+    for name, (model, fields) in models.items():
+        rows = _rows(model, fields, upserts[name]) if upserts[name] else []
+        found = {row[0] for row in rows}
+        # Deleted after this page's entries; its tombstone arrives on a later page.
+        deleted[name].extend(object_id for object_id in upserts[name] if object_id not in found)
+        changes[name] = rows
+        deleted[name].sort()
+    return {
+        "cursor": entries[-1][0] if entries else since,
+        "full": False,
+        "more": more,
+        "fields": {name: fields for name, (_model, fields) in models.items()},
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+
+def sync_payload(since=None, page=None):
+    limit = getattr(settings, "SYNC_PAGE_SIZE", 1000)
+    if page is not None:
+        return full_payload(page, limit)
+    if since is None or since <= 0 or since < compaction_floor():
+        return full_payload(limit=limit)
+    return delta_payload(since, limit)
+
+
+def compact(tombstone_days=30, dry_run=False):
+    """
+    Keep only the newest entry per object, and drop tombstones older than
+    ``tombstone_days``. Returns ``(superseded, tombstones)`` deleted counts.
+    """
+    entries = ChangeLog.objects.exclude(op=ChangeLog.OP_COMPACT)
+    superseded = entries.filter(Exists(
+        entries.filter(model=OuterRef("model"), object_id=OuterRef("object_id"), id__gt=OuterRef("id"))
+    ))
+    cutoff = timezone.now() - timedelta(days=tombstone_days)
+    tombstones = ChangeLog.objects.filter(op=ChangeLog.OP_DELETE, created_at__lt=cutoff)
+    if dry_run:
+        return superseded.count(), tombstones.count()
+
+    with write_atomic():
+        superseded_count, _ = superseded.delete()
+        newest_tombstone = tombstones.aggregate(newest=Max("id"))["newest"]
+        tombstone_count = 0
+        if newest_tombstone is not None:
+            tombstone_count, _ = tombstones.filter(id__lte=newest_tombstone).delete()
+            ChangeLog.objects.create(model="*", object_id=newest_tombstone, op=ChangeLog.OP_COMPACT)
+    return superseded_count, tombstone_count
+
+
+def _on_change(name, op):
+    def handler(sender, instance, **kwargs):
+        record_changes(name, [instance.pk], op=op)
+    return handler
+
+
+def connect_signals():
+    for name, model in feed_models().items():
+        post_save.connect(_on_change(name, ChangeLog.OP_UPSERT), sender=model, weak=False,
+                          dispatch_uid=f"changefeed.{name}.save")
+        post_delete.connect(_on_change(name, ChangeLog.OP_DELETE), sender=model, weak=False,
+                            dispatch_uid=f"changefeed.{name}.delete")
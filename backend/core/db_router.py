@@ -0,0 +1,148 @@
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+REPORTING_ALIAS = "reporting"
+
+_reporting_reads = ContextVar("reporting_reads", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+def reporting_enabled():
+    if REPORTING_ALIAS not in settings.DATABASES:
+        return False
+    # A reporting alias that points at the primary (e.g. a test mirror) adds nothing.
+    reporting = connections[REPORTING_ALIAS].settings_dict
+    default = connections["default"].settings_dict
+    return (reporting["NAME"], reporting["HOST"]) != (default["NAME"], default["HOST"])
+
+
+def reads_from_reporting():
+    """Whether ORM reads made now go to the reporting alias."""
+    return _reporting_reads.get() and not _wrote.get() and reporting_enabled()
+
+
+def mark_written():
+    """Pin the rest of this request (and, after it, the user) to the primary."""
+    _wrote.set(True)
+
+
+def _row_written(sender, **kwargs):
+    mark_written()
+
+
+def connect_signals():
+    # A real row write, not a write-routing lookup: DB-cache writes and a
+    # get_or_create that only reads route for write without writing rows.
+    # Bulk and F() writes call mark_written through changefeed.record_changes.
+    for name, signal in (("save", post_save), ("delete", post_delete), ("m2m", m2m_changed)):
+        signal.connect(_row_written, dispatch_uid=f"core.db_router.{name}")
+
+
+def _pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+class ReportingRouter:
+    """
+    Sends reads made inside ``reporting_reads`` views to the ``reporting``
+    alias when it is configured. A row write (see ``mark_written``) pins the
+    rest of the request, and the user's next requests for
+    DB_READ_YOUR_WRITES_SECONDS, to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_reporting():
+            return REPORTING_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTING_ALIAS:
+            return False
+        return None
+
+
+def reporting_reads(view):
+    """Route the ORM reads of ``view`` to the reporting database."""
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated and await cache.aget(_pin_key(user.pk)):
+                return await view(request, *args, **kwargs)
+            token = _reporting_reads.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reporting_reads.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Works for function views (request first) and methods (self, request).
+        request = args[1] if len(args) > 1 and hasattr(args[1], "user") else args[0]
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+            return view(*args, **kwargs)
+        token = _reporting_reads.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _reporting_reads.reset(token)
+
+    return wrapper
+
+
+class DatabaseRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin_after_write(self, request):
+        user = getattr(request, "user", None)
+        if _wrote.get() and reporting_enabled() and user is not None and user.is_authenticated:
+            cache.set(_pin_key(user.pk), 1, getattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 5))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reporting_token = _reporting_reads.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            self._pin_after_write(request)
+            return response
+        finally:
+            _reporting_reads.reset(reporting_token)
+            _wrote.reset(wrote_token)
+
+    async def __acall__(self, request):
+        reporting_token = _reporting_reads.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if _wrote.get():
+                # request.user may be a lazy session user, which hits the DB.
+                await sync_to_async(self._pin_after_write)(request)
+            return response
+        finally:
+            _reporting_reads.reset(reporting_token)
+            _wrote.reset(wrote_token)
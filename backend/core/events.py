@@ -0,0 +1,158 @@
+import asyncio
+import fcntl
+import json
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+RESYNC = {"type": "resync"}
+
+
+class Broker:
+    """
+    Fans events out to SSE subscribers in this process. Each subscriber owns a
+    bounded asyncio queue; a client that falls behind has its backlog replaced
+    by a single ``resync`` event so it refetches instead of growing memory.
+    With a spool path, events are also appended to a shared JSONL file that
+    every worker tails, standing in for a pub/sub server on a single host.
+    """
+
+    def __init__(self, queue_size=100, spool_path=None, spool_max_bytes=1024 * 1024, origin=None):
+        self.queue_size = queue_size
+        self.spool_path = Path(spool_path) if spool_path else None
+        self.spool_max_bytes = spool_max_bytes
+        self.origin = origin or f"{os.getpid()}:{id(self)}"
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._tailer = None
+        self.counters = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    # Publishing (any thread) -------------------------------------------------
+
+    def publish(self, event):
+        self._count("published")
+        if self.spool_path:
+            self._append_spool(event)
+        self._fan_out(event)
+
+    def _fan_out(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:  # loop closed under us
+                self.unsubscribe(queue)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _offer(self, queue, event):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+            self._count("resyncs")
+            return
+        queue.put_nowait(event)
+        self._count("delivered")
+
+    def _append_spool(self, event):
+        line = json.dumps({"origin": self.origin, "event": event}, cls=DjangoJSONEncoder) + "\n"
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as spool:
+            fcntl.flock(spool, fcntl.LOCK_EX)
+            try:
+                if spool.tell() > self.spool_max_bytes:
+                    spool.truncate(0)  # tailers notice the shrink and start over
+                spool.write(line)
+            finally:
+                fcntl.flock(spool, fcntl.LOCK_UN)
+
+    # Subscribing (event loop) -----------------------------------------------
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[queue] = loop
+            if self.spool_path and (self._tailer is None or self._tailer.done()):
+                self._tailer = loop.create_task(self._tail_spool())
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+            if not self._subscribers and self._tailer is not None:
+                self._tailer.cancel()
+                self._tailer = None
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def has_listeners(self):
+        """Whether a published event can reach anyone: local subscribers, or other workers via the spool."""
+        return bool(self.spool_path) or self.subscriber_count > 0
+
+    def read_spool(self, offset):
+        """Events other workers appended since ``offset``; returns (events, new offset)."""
+        try:
+            size = self.spool_path.stat().st_size
+        except FileNotFoundError:
+            return [], 0
+        if size < offset:
+            offset = 0
+        if size == offset:
+            return [], offset
+        with open(self.spool_path, "rb") as spool:
+            spool.seek(offset)
+            data = spool.read()
+        complete = data.rfind(b"\n") + 1
+        events = []
+        for line in data[:complete].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("origin") != self.origin:
+                events.append(record["event"])
+        return events, offset + complete
+
+    async def _tail_spool(self):
+        try:
+            offset = self.spool_path.stat().st_size
+        except FileNotFoundError:
+            offset = 0
+        interval = getattr(settings, "EVENTS_SPOOL_POLL_SECONDS", 0.25)
+        while True:
+            await asyncio.sleep(interval)
+            events, offset = self.read_spool(offset)
+            for event in events:
+                self._fan_out(event)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return {"subscribers": self.subscriber_count, "spool": str(self.spool_path or ""), **counters}
+
+
+def _build_broker():
+    return Broker(
+        queue_size=getattr(settings, "EVENTS_QUEUE_SIZE", 100),
+        spool_path=getattr(settings, "EVENTS_SPOOL_PATH", "") or None,
+    )
+
+
+broker = _build_broker()
+
+
+def encode(event):
+    """One SSE frame for ``event``."""
+    data = json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n"
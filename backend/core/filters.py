@@ -0,0 +1,77 @@
+from datetime import date, datetime, timedelta
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_day(value, param="date"):
+    """A ``YYYY-MM-DD`` query value as a date; None when empty, 400 when malformed."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({param: "تاریخ نامعتبر است؛ قالب درست YYYY-MM-DD است."})
+    return day
+
+
+def day_start(day):
+    """Midnight of ``day`` in TIME_ZONE (Asia/Kabul), as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()), timezone.get_default_timezone())
+
+
+def _is_datetime(model, path):
+    field = None
+    for name in path.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        model = field.related_model or model
+    return isinstance(field, models.DateTimeField)
+
+
+def date_range_q(model, path, start=None, end=None):
+    """
+    Inclusive local days ``start``..``end`` as a half-open range on the raw
+    column: ``path >= start`` and ``path < end + 1 day``. Datetime columns are
+    compared with the local midnights (stored in UTC), never through a
+    ``__date`` cast, so an index on the column stays usable.
+    """
+    lower = start
+    upper = end + timedelta(days=1) if end is not None else None
+    if _is_datetime(model, path):
+        lower = day_start(lower) if lower is not None else None
+        upper = day_start(upper) if upper is not None else None
+    q = Q()
+    if lower is not None:
+        q &= Q(**{f"{path}__gte": lower})
+    if upper is not None:
+        q &= Q(**{f"{path}__lt": upper})
+    return q
+
+
+def filter_date_range(queryset, path, start=None, end=None):
+    return queryset.filter(date_range_q(queryset.model, path, parse_day(start, "start"), parse_day(end, "end")))
+
+
+class DateRangeFilter(BaseFilterBackend):
+    """``?start=&end=`` (local days, both inclusive) on the view's ``date_range_field``."""
+
+    def filter_queryset(self, request, queryset, view):
+        path = getattr(view, "date_range_field", None)
+        if path is None:
+            return queryset
+        return filter_date_range(
+            queryset, path, request.query_params.get("start"), request.query_params.get("end"),
+        )
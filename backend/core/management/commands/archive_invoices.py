@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices.archive import ArchiveError, archive_year, restore_year
+
+
+class Command(BaseCommand):
+    help = "Move a closed fiscal year of invoices into the archive tables (or back with --restore)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True, help="Fiscal year (see FISCAL_YEAR_START_MONTH).")
+        parser.add_argument("--restore", action="store_true", help="Move the archived year back to the live tables.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        if options["restore"]:
+            moved = restore_year(year, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"restored {moved} invoices of {year}."))
+            return
+        try:
+            moved = archive_year(year, batch_size=options["batch_size"])
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"archived {moved} invoices of {year}."))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.backup import BackupError, compressions, export_chunks
+
+
+class Command(BaseCommand):
+    help = "Stream a consistent, compressed JSONL backup of all ERP data (restore with restore_data)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="File to write, or - for stdout. Default: backup-<timestamp>.jsonl.gz")
+        parser.add_argument("--compression", choices=["gzip", "zstd"], default="gzip")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per database round trip.")
+
+    def handle(self, *args, **options):
+        compression = options["compression"]
+        if compression not in compressions():
+            raise CommandError("zstd needs the zstandard package.")
+        suffix = "gz" if compression == "gzip" else "zst"
+        output = options["output"] or f"backup-{timezone.localtime():%Y%m%d-%H%M%S}.jsonl.{suffix}"
+        target = sys.stdout.buffer if output == "-" else open(output, "wb")
+        size = 0
+        try:
+            for chunk in export_chunks(compression, chunk_size=options["chunk_size"]):
+                target.write(chunk)
+                size += len(chunk)
+        except BackupError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if target is not sys.stdout.buffer:
+                target.close()
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(f"wrote {size} bytes to {output}."))
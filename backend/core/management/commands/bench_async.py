@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+
+from api.jwt import CustomTokenObtainPairSerializer
+from core.middleware import percentile
+
+from .run_bench import BENCH_USERNAME
+
+PAIRS = {
+    "finance_report": ("/api/finance/report/", "/api/finance/report/async/"),
+    "invoice_summary": ("/api/invoices/summary/", "/api/invoices/summary/async/"),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare latency of the sync and async reporting views through the ASGI handler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--only", nargs="*", choices=list(PAIRS), help="Endpoints to run (default: all).")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={"is_staff": True})
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        pairs = {name: PAIRS[name] for name in options["only"] or PAIRS}
+        asyncio.run(self.run(token, pairs, options["concurrency"], options["rounds"]))
+
+    async def run(self, token, pairs, concurrency, rounds):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, paths in pairs.items():
+            for kind, path in zip(("sync", "async"), paths):
+                await client.get(path, headers=headers)  # warm-up
+                samples = []
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    samples += await asyncio.gather(*(self.timed(client, path, headers) for _ in range(concurrency)))
+                elapsed = time.perf_counter() - started
+                await sync_to_async(self.stdout.write)(
+                    f"{name:<16} {kind:<5} p50 {percentile(samples, 50):>8.1f} ms  "
+                    f"p95 {percentile(samples, 95):>8.1f} ms  {len(samples) / elapsed:>7.1f} req/s"
+                )
+
+    async def timed(self, client, path, headers):
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,76 @@
+import base64
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+
+from api.jwt import CustomTokenObtainPairSerializer
+from core.authentication import StatelessJWTAuthentication, active_users
+
+PASSWORD = "bench-auth-password"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure authenticated requests per second per worker for each authentication mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--basic-requests", type=int, default=10,
+                            help="Basic auth runs PBKDF2 per request, so it gets fewer iterations.")
+        parser.add_argument("--path", default="/api/users/me/")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = User.objects.create_user(username="bench-auth-user", password=PASSWORD, is_staff=True)
+        access = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        bearer = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+        basic = {"HTTP_AUTHORIZATION": "Basic " + base64.b64encode(f"{user.username}:{PASSWORD}".encode()).decode()}
+
+        scenarios = [
+            ("default (session, basic, jwt) + bearer",
+             (SessionAuthentication, BasicAuthentication, JWTAuthentication), bearer, options["requests"]),
+            ("default (session, basic, jwt) + basic",
+             (SessionAuthentication, BasicAuthentication, JWTAuthentication), basic, options["basic_requests"]),
+            ("jwt (db user) + bearer", (JWTAuthentication,), bearer, options["requests"]),
+            ("fast path (stateless jwt, session) + bearer",
+             (StatelessJWTAuthentication, SessionAuthentication), bearer, options["requests"]),
+        ]
+
+        original = APIView.authentication_classes
+        client = Client()
+        try:
+            for name, classes, headers, count in scenarios:
+                APIView.authentication_classes = classes
+                active_users.clear()
+                response = client.get(options["path"], **headers)
+                if response.status_code != 200:
+                    self.stderr.write(f"{name}: warm-up returned {response.status_code}")
+                    continue
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        client.get(options["path"], **headers)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:<48} {count / elapsed:>9.1f} req/s  "
+                    f"{elapsed / count * 1000:>8.2f} ms/req  {len(ctx.captured_queries) / count:.2f} queries/req"
+                )
+        finally:
+            APIView.authentication_classes = original
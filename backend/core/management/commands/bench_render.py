@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Service
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from invoices.models import Invoice, InvoiceItem
+from invoices.serializers import InvoiceSerializer
+
+
+def invoice_payload(count, items_per_invoice=3):
+    """InvoiceSerializer output for ``count`` unsaved invoices (no database needed)."""
+    services = [Service(pk=i + 1, name=f"Service {i + 1}", price=Decimal("150.00")) for i in range(20)]
+    started = timezone.make_aware(datetime(2026, 1, 1))
+    invoices = []
+    for i in range(count):
+        invoice = Invoice(pk=i + 1, customer_name=f"Customer {i % 500}", created_at=started + timedelta(minutes=i))
+        items = []
+        for j in range(items_per_invoice):
+            service = services[(i + j) % len(services)]
+            item = InvoiceItem(
+                pk=i * items_per_invoice + j + 1, invoice=invoice, service=service,
+                quantity=j + 1, price=Decimal("125.50"), discount=Decimal("2.25"),
+            )
+            items.append(item)
+        invoice._prefetched_objects_cache = {"items": items}
+        invoices.append(invoice)
+    return InvoiceSerializer(invoices, many=True).data
+
+
+class Command(BaseCommand):
+    help = "Serialization throughput of the stock JSON, fast JSON and MessagePack renderers on an invoice list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoices", type=int, default=10000)
+        parser.add_argument("--iterations", type=int, default=5)
+
+    def handle(self, *args, **options):
+        data = invoice_payload(options["invoices"])
+        renderers = {"drf-json": JSONRenderer(), "fast-json": FastJSONRenderer()}
+        if msgpack is not None:
+            renderers["msgpack"] = MessagePackRenderer()
+        else:
+            self.stdout.write("msgpack is not installed; skipping MessagePack.")
+        self.stdout.write(f"{options['invoices']} invoices, fast-json backend: {'orjson' if orjson else 'stdlib json'}")
+
+        baseline = None
+        for name, renderer in renderers.items():
+            renderer.render(data)  # warm-up
+            timings = []
+            for _ in range(options["iterations"]):
+                started = time.perf_counter()
+                body = renderer.render(data)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            baseline = baseline or best
+            self.stdout.write(
+                f"{name:<10} {best * 1000:>8.1f} ms  {len(body) / best / 1e6:>7.1f} MB/s  "
+                f"{options['invoices'] / best:>9.0f} invoices/s  {len(body):>9} B  x{baseline / best:.1f}"
+            )
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from core.models import Service
+from invoices.serializers import InvoiceCreateSerializer
+
+
+class Command(BaseCommand):
+    help = "Concurrent invoice-writing stress test on a scratch SQLite file, with the production profile off and on."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=100, help="Invoices per thread.")
+        parser.add_argument("--worker", action="store_true", help="Internal: run one mode in the current process.")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.run_worker(options["threads"], options["writes"])
+
+        rows = []
+        for profile in ("0", "1"):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {
+                    **os.environ,
+                    "DB_ENGINE": "django.db.backends.sqlite3",
+                    "DB_NAME": str(Path(tmp) / "bench.sqlite3"),
+                    "SQLITE_PRODUCTION": profile,
+                }
+                env.pop("DB_REPORTING_NAME", None)
+                manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+                subprocess.run(manage + ["migrate", "-v0"], env=env, check=True)
+                result = subprocess.run(
+                    manage + ["bench_sqlite", "--worker", f"--threads={options['threads']}",
+                              f"--writes={options['writes']}"],
+                    env=env, check=True, capture_output=True, text=True,
+                )
+                rows.append((profile, json.loads(result.stdout.strip().splitlines()[-1])))
+
+        for profile, row in rows:
+            label = "production profile" if profile == "1" else "default"
+            self.stdout.write(
+                f"{label:<20} journal={row['journal_mode']:<8} {row['writes_per_sec']:>8.1f} writes/s  "
+                f"ok {row['ok']:>6}  lock errors {row['lock_errors']:>5}  ({row['elapsed']:.2f}s)"
+            )
+
+    def run_worker(self, threads, writes):
+        service = Service.objects.create(name="bench-sqlite", price=1)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+        counts = {"ok": 0, "lock_errors": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+        payload = {"customer_name": "bench", "items": [{"service": service.pk, "quantity": 1, "price": "1"}]}
+
+        def writer():
+            close_old_connections()
+            barrier.wait()
+            try:
+                for _ in range(writes):
+                    serializer = InvoiceCreateSerializer(data=payload)
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        serializer.save()
+                        outcome = "ok"
+                    except OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+                        outcome = "lock_errors"
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=writer) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        if counts["ok"] + counts["lock_errors"] != threads * writes:
+            raise CommandError("A writer thread crashed; see the traceback above.")
+        self.stdout.write(json.dumps({
+            "journal_mode": journal_mode,
+            "elapsed": elapsed,
+            "writes_per_sec": counts["ok"] / elapsed,
+            **counts,
+        }))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.changefeed import compact
+
+
+class Command(BaseCommand):
+    help = "Compact the sync change feed: keep the newest entry per row and drop old tombstones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tombstone-days", type=int, default=30,
+                            help="Keep delete markers this long; older clients fall back to a full sync.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be removed.")
+
+    def handle(self, *args, **options):
+        superseded, tombstones = compact(options["tombstone_days"], dry_run=options["dry_run"])
+        verb = "would remove" if options["dry_run"] else "removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {superseded} superseded entries and {tombstones} tombstones."
+        ))
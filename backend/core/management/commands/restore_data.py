@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import BackupError, restore
+
+
+class Command(BaseCommand):
+    help = "Replace all ERP data with a backup written by backup_data (gzip, zstd or plain JSONL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--no-input", "--noinput", action="store_false", dest="interactive",
+                            help="Do not ask for confirmation.")
+
+    def handle(self, *args, **options):
+        if options["interactive"]:
+            answer = input("This replaces every user, invoice and setting in the database. Type 'yes' to continue: ")
+            if answer != "yes":
+                raise CommandError("Restore cancelled.")
+        try:
+            with open(options["path"], "rb") as source:
+                rows = restore(source, batch_size=options["batch_size"])
+        except (BackupError, OSError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"restored {rows} rows."))
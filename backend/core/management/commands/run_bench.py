@@ -0,0 +1,132 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from api.jwt import CustomTokenObtainPairSerializer
+from core.middleware import percentile
+
+BENCH_USERNAME = "bench-runner"
+
+
+def default_endpoints():
+    today = timezone.localdate()
+    month_ago = today.replace(day=1)
+    return {
+        "invoice_list": "/api/invoices/",
+        "invoice_summary": "/api/invoices/summary/",
+        "finance_report": "/api/finance/report/",
+        "finance_report_month": f"/api/finance/report/?start={month_ago}&end={today}",
+        "finance_monthly": "/api/finance/monthly/",
+        "finance_report_pdf": "/api/finance/report/pdf/",
+        "expense_list": "/api/finance/expenses/",
+        "catalog": "/api/catalog/",
+    }
+
+
+class QueryCounter:
+    # Unlike CaptureQueriesContext this does not saturate at 9000 queries.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Benchmark key endpoints through the Django test client and compare against a JSON baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", nargs="*", help="Endpoint names to run (default: all).")
+        parser.add_argument("--output", help="Write results as JSON to this file.")
+        parser.add_argument("--compare", help="Baseline JSON from an earlier run.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed p95 slowdown versus the baseline (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        # Not a rolled-back transaction like bench_auth: the measured views commit, fire
+        # on_commit hooks and may read through the reporting alias. Remove the user instead.
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME, defaults={"is_staff": True})
+        try:
+            self._run(user, options)
+        finally:
+            if created:
+                user.delete()
+
+    def _run(self, user, options):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        endpoints = default_endpoints()
+        if options["only"]:
+            endpoints = {name: path for name, path in endpoints.items() if name in options["only"]}
+
+        results = {}
+        for name, path in endpoints.items():
+            results[name] = self.measure(client, path, options["iterations"], options["warmup"])
+            row = results[name]
+            self.stdout.write(
+                f"{name:<22} {row['status']}  p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms  "
+                f"queries {row['queries']:>4}  {row['bytes']:>9} B"
+            )
+
+        report = {
+            "meta": {"vendor": connection.vendor, "iterations": options["iterations"], "created": time.time()},
+            "endpoints": results,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+        if options["compare"]:
+            regressions = compare(json.loads(Path(options["compare"]).read_text()), report, options["tolerance"])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def measure(self, client, path, iterations, warmup):
+        for _ in range(warmup):
+            client.get(path)
+        durations, queries = [], []
+        response = None
+        for _ in range(iterations):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = client.get(path)
+                durations.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+        return {
+            "path": path,
+            "status": response.status_code,
+            "bytes": len(response.content) if not response.streaming else None,
+            "p50_ms": round(percentile(durations, 50), 3),
+            "p95_ms": round(percentile(durations, 95), 3),
+            "p99_ms": round(percentile(durations, 99), 3),
+            "mean_ms": round(statistics.fmean(durations), 3),
+            "queries": int(statistics.median(queries)),
+        }
+
+
+def compare(baseline, current, tolerance):
+    regressions = []
+    for name, row in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        if row["status"] != before["status"]:
+            regressions.append(f"{name}: status {before['status']} -> {row['status']}")
+        if row["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {row['queries']}")
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} ms -> {row['p95_ms']:.2f} ms")
+    return regressions
@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.bulk import explicit_timestamps
+from core.changefeed import record_changes
+from core.models import Employee, Service, ServicePrice
+from core.response_cache import invalidate_on_commit as invalidate_responses
+from finance.models import Expense
+from invoices.customers import normalize_name, rebuild as rebuild_customers
+from invoices.leaderboard import rebuild as rebuild_service_stats
+from invoices.models import Customer, Invoice, InvoiceItem, Payment
+
+SERVICE_NAMES = ["CNC", "PVC", "Cutting", "Carpentry", "Edge banding", "Drilling", "Painting", "Assembly"]
+EXPENSE_CATEGORIES = ["rent", "electricity", "materials", "transport", "tools", "maintenance"]
+CUSTOMER_NAMES = ["Ahmad", "Mahmood", "Karim", "Farid", "Nasir", "Hamid", "Wahid", "Jawid", "Zalmai", "Omid"]
+ITEMS_PER_INVOICE = ([1, 2, 3, 4, 5, 6, 8], [35, 25, 15, 10, 7, 5, 3])
+
+
+class Command(BaseCommand):
+    help = "Generate production-sized synthetic data (services, employees, invoices, expenses) with bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--services", type=int, default=40)
+        parser.add_argument("--employees", type=int, default=15)
+        parser.add_argument("--invoices", type=int, default=20000)
+        parser.add_argument("--expenses", type=int, default=3000)
+        parser.add_argument("--years", type=float, default=3, help="Spread invoices and expenses over this many years.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch = options["batch_size"]
+        today = timezone.localdate()
+        span_days = max(1, int(options["years"] * 365))
+
+        def random_moment():
+            day = today - timedelta(days=rng.randrange(span_days))
+            clock = time(hour=rng.randint(8, 18), minute=rng.randrange(60), second=rng.randrange(60))
+            return timezone.make_aware(datetime.combine(day, clock))
+
+        with transaction.atomic():
+            services = Service.objects.bulk_create([
+                Service(
+                    name=f"{SERVICE_NAMES[i % len(SERVICE_NAMES)]} {i // len(SERVICE_NAMES) + 1}",
+                    price=Decimal(rng.randrange(50, 5000)),
+                )
+                for i in range(options["services"])
+            ], batch_size=batch)
+            listed_since = timezone.make_aware(datetime.combine(today - timedelta(days=span_days), time.min))
+            ServicePrice.objects.bulk_create([
+                ServicePrice(service=service, price=service.price, effective_from=listed_since) for service in services
+            ], batch_size=batch)
+
+            employees = Employee.objects.bulk_create([
+                Employee(name=f"Employee {i + 1}", role=rng.choice(["operator", "cashier", "helper"]),
+                         salary=Decimal(rng.randrange(8000, 30000)))
+                for i in range(options["employees"])
+            ], batch_size=batch)
+            invalidate_responses("service", "employee")
+            record_changes("service", [service.pk for service in services])
+            record_changes("employee", [employee.pk for employee in employees])
+
+            # Popularity follows a Zipf-like curve: a few services dominate sales.
+            weights = [1 / (rank + 1) for rank in range(len(services))]
+            invoice_field = Invoice._meta.get_field("created_at")
+            expense_field = Expense._meta.get_field("date")
+            with explicit_timestamps(invoice_field, expense_field):
+                created = 0
+                while created < options["invoices"]:
+                    size = min(batch, options["invoices"] - created)
+                    names = [f"{rng.choice(CUSTOMER_NAMES)} {rng.randrange(500)}" for _ in range(size)]
+                    Customer.objects.bulk_create(
+                        [Customer(name=name, normalized_name=normalize_name(name)) for name in set(names)],
+                        ignore_conflicts=True,
+                    )
+                    customer_ids = dict(
+                        Customer.objects.filter(normalized_name__in={normalize_name(name) for name in names})
+                        .values_list("normalized_name", "id")
+                    )
+                    invoices = Invoice.objects.bulk_create([
+                        Invoice(customer_id=customer_ids[normalize_name(name)], customer_name=name,
+                                created_at=random_moment())
+                        for name in names
+                    ])
+                    items = []
+                    for invoice in invoices:
+                        count = rng.choices(*ITEMS_PER_INVOICE)[0] if services else 0
+                        for service in rng.choices(services, weights=weights, k=count):
+                            quantity = max(1, int(rng.lognormvariate(1.2, 0.8)))
+                            price = (service.price * Decimal(rng.uniform(0.9, 1.1))).quantize(Decimal("0.01"))
+                            discount = Decimal(rng.randrange(0, 200)) if rng.random() < 0.1 else Decimal(0)
+                            items.append(InvoiceItem(invoice=invoice, service=service, quantity=quantity,
+                                                     price=price, discount=min(discount, price * quantity)))
+                    InvoiceItem.objects.bulk_create(items, batch_size=batch)
+
+                    # Most invoices are settled in cash; a recent minority stays open or part-paid.
+                    totals = {}
+                    for item in items:
+                        totals[item.invoice_id] = totals.get(item.invoice_id, 0) + item.quantity * item.price - item.discount
+                    payments = []
+                    for invoice in invoices:
+                        total = totals.get(invoice.pk, Decimal(0))
+                        recent = (timezone.now() - invoice.created_at).days < 120
+                        share = rng.choice([0, Decimal("0.5")]) if recent and rng.random() < 0.3 else 1
+                        invoice.amount_paid = (total * share).quantize(Decimal("0.01"))
+                        invoice.balance_due = total - invoice.amount_paid
+                        if invoice.amount_paid:
+                            payments.append(Payment(invoice_id=invoice.pk, amount=invoice.amount_paid,
+                                                    paid_on=invoice.created_at.date()))
+                    Invoice.objects.bulk_update(invoices, ["amount_paid", "balance_due"], batch_size=batch)
+                    Payment.objects.bulk_create(payments, batch_size=batch)
+                    record_changes("customer", customer_ids.values())
+                    record_changes("invoice", [invoice.pk for invoice in invoices])
+                    record_changes("invoice_item", [item.pk for item in items])
+                    created += size
+
+                expenses = Expense.objects.bulk_create([
+                    Expense(title=f"Expense {i + 1}", category=rng.choice(EXPENSE_CATEGORIES),
+                            amount=Decimal(rng.randrange(100, 20000)), date=random_moment().date())
+                    for i in range(options["expenses"])
+                ], batch_size=batch)
+                record_changes("expense", [expense.pk for expense in expenses])
+            rebuild_customers()
+            rebuild_service_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['services']} services, {options['employees']} employees, "
+            f"{options['invoices']} invoices and {options['expenses']} expenses over {options['years']} years."
+        ))
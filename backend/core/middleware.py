@@ -0,0 +1,281 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+slow_log = logging.getLogger("kabul.slow_requests")
+_slow_log_lock = threading.Lock()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RouteMetrics:
+    """Rolling latency/query samples per URL route, kept in this process."""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, total_ms, queries):
+        with self._lock:
+            samples = self._routes.get(route)
+            if samples is None:
+                samples = self._routes[route] = (deque(maxlen=self.max_samples), deque(maxlen=self.max_samples))
+            samples[0].append(total_ms)
+            samples[1].append(queries)
+
+    def summary(self, routes=()):
+        with self._lock:
+            snapshot = {route: (list(ms), list(qs)) for route, (ms, qs) in self._routes.items()}
+        rows = []
+        for route in list(routes) + sorted(set(snapshot) - set(routes)):
+            durations, queries = snapshot.get(route, ([], []))
+            p50, p95 = percentile(durations, 50), percentile(durations, 95)
+            rows.append({
+                "route": route,
+                "requests": len(durations),
+                "p50_ms": round(p50, 2) if p50 is not None else None,
+                "p95_ms": round(p95, 2) if p95 is not None else None,
+                "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_metrics = RouteMetrics()
+
+
+def all_routes(patterns=None, prefix=""):
+    """Every route string in the URLconf, in the form ``ResolverMatch.route`` uses."""
+    from django.urls import URLResolver, get_resolver
+
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    routes = []
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            routes.extend(all_routes(pattern.url_patterns, route))
+        else:
+            routes.append(route)
+    return routes
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = []
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_started = None
+        self.render_ms = 0.0
+        self._serializer_depth = 0
+        # Queries of gather_sync/batch pool threads land here too.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.db_ms += elapsed
+                self.queries.append((elapsed, sql))
+
+    def rendered(self, response):
+        if self.render_started is not None:
+            self.render_ms = (time.perf_counter() - self.render_started) * 1000
+
+
+# Context-local, so sync_to_async and copy_context() pool threads report to
+# the request that started them.
+_timings = ContextVar("request_timings", default=None)
+
+
+def _execute(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def _wrap_connection(sender=None, connection=None, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def _install_query_timing():
+    # Every connection, whichever thread opens it; idle when no request is timed.
+    connection_created.connect(_wrap_connection, dispatch_uid="core.middleware.query_timing")
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(connection=connection)
+
+
+class TimedDataMixin:
+    # Times top-level ``serializer.data`` (nested serializers run inside it),
+    # excluding the DB time spent on lazy querysets meanwhile.
+    @property
+    def data(self):
+        timings = _timings.get()
+        if timings is None or timings._serializer_depth:
+            return super().data
+        timings._serializer_depth += 1
+        started, db_before = time.perf_counter(), timings.db_ms
+        try:
+            return super().data
+        finally:
+            timings._serializer_depth -= 1
+            elapsed = (time.perf_counter() - started) * 1000
+            timings.serialize_ms += elapsed - (timings.db_ms - db_before)
+
+
+_timed_classes = {}
+_timed_classes_lock = threading.Lock()
+
+
+def timed_serializer_class(serializer_class):
+    """``serializer_class`` (and its many=True list serializer) with ``data`` timed."""
+    with _timed_classes_lock:
+        timed = _timed_classes.get(serializer_class)
+        if timed is None:
+            meta = getattr(serializer_class, "Meta", object)
+            list_class = getattr(meta, "list_serializer_class", serializers.ListSerializer)
+            timed_list = type(list_class.__name__, (TimedDataMixin, list_class), {})
+            timed = type(serializer_class.__name__, (TimedDataMixin, serializer_class), {
+                "__module__": serializer_class.__module__,
+                "Meta": type("Meta", (meta,), {"list_serializer_class": timed_list}),
+            })
+            _timed_classes[serializer_class] = timed
+        return timed
+
+
+class SerializerTimingMixin:
+    """View mixin: time spent in ``serializer.data`` is reported as ``serialize`` in Server-Timing."""
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if _timings.get() is None:
+            return serializer_class
+        return timed_serializer_class(serializer_class)
+
+
+def _slow_logger():
+    if not slow_log.handlers:
+        with _slow_log_lock:
+            if not slow_log.handlers:
+                path = Path(getattr(settings, "SLOW_REQUEST_LOG", settings.BASE_DIR / "logs" / "slow_requests.jsonl"))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                slow_log.addHandler(handler)
+                slow_log.setLevel(logging.INFO)
+                slow_log.propagate = False
+    return slow_log
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Opt-in (REQUEST_INSTRUMENTATION=1). Measures query count, DB time,
+    serializer time and render time per request, reports them in a
+    ``Server-Timing`` header, feeds the per-route summary and appends slow
+    requests to a rotating JSONL log.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "SLOW_REQUEST_MS", 500)
+        _install_query_timing()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        route = self._report(request, response, total_ms, timings)
+        if total_ms >= self.slow_ms:
+            self._log_slow(request, response, route, total_ms, timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        route = self._report(request, response, total_ms, timings)
+        if total_ms >= self.slow_ms:
+            # File I/O: off the event loop.
+            await sync_to_async(self._log_slow, thread_sensitive=False)(request, response, route, total_ms, timings)
+        return response
+
+    def _report(self, request, response, total_ms, timings):
+        app_ms = max(0.0, total_ms - timings.db_ms - timings.serialize_ms - timings.render_ms)
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={timings.db_ms:.1f};desc="{len(timings.queries)} queries"',
+            f"serialize;dur={timings.serialize_ms:.1f}",
+            f"render;dur={timings.render_ms:.1f}",
+            f"app;dur={app_ms:.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else None
+        if route is not None:
+            route_metrics.record(route, total_ms, len(timings.queries))
+        return route
+
+    def process_template_response(self, request, response):
+        timings = _timings.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(timings.rendered)
+        return response
+
+    def _log_slow(self, request, response, route, total_ms, timings):
+        worst = sorted(timings.queries, key=lambda query: query[0], reverse=True)[:5]
+        _slow_logger().info(json.dumps({
+            "ts": time.time(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "route": route,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(timings.db_ms, 2),
+            "serialize_ms": round(timings.serialize_ms, 2),
+            "render_ms": round(timings.render_ms, 2),
+            "queries": len(timings.queries),
+            "worst_queries": [{"ms": round(ms, 2), "sql": sql[:2000]} for ms, sql in worst],
+        }, ensure_ascii=False))
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def opening_prices(apps, schema_editor):
+    # Earlier changes were overwritten in place; the current price is the first known one.
+    Service = apps.get_model('core', 'Service')
+    ServicePrice = apps.get_model('core', 'ServicePrice')
+    ServicePrice.objects.bulk_create(
+        [
+            ServicePrice(service_id=pk, price=price, effective_from=created_at)
+            for pk, price, created_at in Service.objects.values_list('id', 'price', 'created_at')
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServicePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('effective_from', models.DateTimeField()),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='core.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['service', '-effective_from', '-id'], name='core_service_price_at_idx')],
+            },
+        ),
+        migrations.RunPython(opening_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_service_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['model', 'id'], name='core_change_model_91425e_idx'),
+        ),
+    ]
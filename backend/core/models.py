@@ -20,6 +20,17 @@ class Service(models.Model):
         return self.name
 
 
+class ServicePrice(models.Model):
+    """List price history: one row per price change, in effect from ``effective_from`` until the next row."""
+
+    service = models.ForeignKey(Service, related_name="prices", on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    effective_from = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["service", "-effective_from", "-id"], name="core_service_price_at_idx")]
+
+
 class Employee(models.Model):
     name = models.CharField(max_length=200)
     role = models.CharField(max_length=200, blank=True)
@@ -57,3 +68,25 @@ class Invoice(models.Model):
 
     def __str__(self):
         return self.customer_name
+
+
+class ChangeLog(models.Model):
+    """Append-only change feed for offline clients; the row id is the sync cursor."""
+
+    OP_UPSERT = "upsert"
+    OP_DELETE = "delete"
+    # Written by compact_changelog: object_id is the newest tombstone it dropped.
+    OP_COMPACT = "compact"
+    OP_CHOICES = [(OP_UPSERT, "Upsert"), (OP_DELETE, "Delete"), (OP_COMPACT, "Compaction")]
+
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "object_id"]),
+            # Newest entry per model: the catalog version.
+            models.Index(fields=["model", "id"]),
+        ]
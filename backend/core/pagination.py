@@ -0,0 +1,242 @@
+import datetime
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Planner/row-id based estimate instead of COUNT(*). Returns None when the
+    backend cannot estimate this queryset cheaply.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    if connection.vendor == "sqlite" and not queryset.query.where:
+        # Row ids only grow, so MAX(rowid) is an upper bound that ignores deletes.
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX(rowid) FROM "{queryset.model._meta.db_table}"')
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes and times to milliseconds: rows sharing
+    # the last row's millisecond would fall between two pages.
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over the view's own ordering with the primary key as a
+    tie-breaker, so a cursor points between two concrete rows and pages stay
+    stable under concurrent inserts. Cursors are opaque. ``?with_count=1``
+    adds an exact count; otherwise an ``estimated_count`` is returned where
+    it is cheap.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "ordering", None) or queryset.query.order_by or ("-pk",)
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        for field in ordering:
+            self._check_field(queryset.model, field, view)
+        ordering = [
+            field.replace("pk", queryset.model._meta.pk.name) if field.lstrip("-") == "pk" else field
+            for field in ordering
+        ]
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [field.lstrip("-") for field in ordering]:
+            ordering.append(f"-{pk_name}" if ordering[-1].startswith("-") else pk_name)
+        return ordering
+
+    def _check_field(self, model, field, view):
+        # The cursor stores one plain column value per ordering field; a typo
+        # or an unsupported ordering is a bug in the view, not a bad cursor.
+        name = field.lstrip("-") if isinstance(field, str) else None
+        if name == "pk":
+            return
+        try:
+            if name is None or "__" in name or not model._meta.get_field(name).concrete:
+                raise FieldDoesNotExist
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f"{type(view).__name__}: KeysetPagination orders by local concrete fields only "
+                f"(optionally prefixed with '-'), not {field!r}."
+            )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            position = data["p"]
+            reverse = bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps({"p": position, "r": 1 if reverse else 0}, cls=CursorEncoder, separators=(",", ":"))
+        return replace_query_param(self.base_url, self.cursor_query_param, b64encode(data.encode("utf-8")).decode("ascii"))
+
+    def _position(self, obj):
+        return [getattr(obj, self.model._meta.get_field(field.lstrip("-")).attname) for field in self.ordering]
+
+    def _after(self, position, ordering):
+        # (a, b, pk) > (x, y, z) spelled out for any mix of asc/desc columns.
+        clauses = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            model_field = self.model._meta.get_field(name)
+            equal = {
+                ordering[j].lstrip("-"): self.model._meta.get_field(ordering[j].lstrip("-")).to_python(position[j])
+                for j in range(index)
+            }
+            op = "lt" if field.startswith("-") else "gt"
+            clauses.append(Q(**equal, **{f"{name}__{op}": model_field.to_python(position[index])}))
+        return reduce(or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        if request.query_params.get("with_count") in ("1", "true"):
+            self.count, self.count_is_estimate = queryset.count(), False
+        else:
+            self.count, self.count_is_estimate = estimate_count(queryset), True
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            if len(position) != len(ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(self._after(position, ordering))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            payload["estimated_count" if self.count_is_estimate else "count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer", "example": 123},
+                "estimated_count": {"type": "integer", "example": 123},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query",
+             "description": "Opaque pagination cursor.", "schema": {"type": "string"}},
+            {"name": self.page_size_query_param, "required": False, "in": "query",
+             "description": "Number of results per page.", "schema": {"type": "integer"}},
+            {"name": "with_count", "required": False, "in": "query",
+             "description": "Set to 1 for an exact COUNT(*).", "schema": {"type": "integer"}},
+        ]
+
+
+def _api_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _api_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and hasattr(pattern.callback, "cls"):
+            yield pattern.callback.cls
+
+
+def check_keyset_orderings(app_configs=None, **kwargs):
+    """System check (registered in CoreConfig.ready): keyset-paged views order by plain local columns."""
+    errors, seen = [], set()
+    for view_class in _api_views(get_resolver().url_patterns):
+        pagination_class = getattr(view_class, "pagination_class", None)
+        queryset = getattr(view_class, "queryset", None)
+        if view_class in seen or queryset is None or not (
+            isinstance(pagination_class, type) and issubclass(pagination_class, KeysetPagination)
+        ):
+            continue
+        seen.add(view_class)
+        try:
+            pagination_class().get_ordering(None, queryset, view_class())
+        except ImproperlyConfigured as exc:
+            errors.append(checks.Error(str(exc), obj=view_class, id="core.E001"))
+    return errors
@@ -0,0 +1,74 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from . import response_cache
+from .changefeed import record_changes
+from .models import Service, ServicePrice
+from .sqlite import write_atomic
+
+CENTS = Decimal("0.01")
+
+
+def _in_effect(at):
+    return ServicePrice.objects.filter(effective_from__lte=at).order_by("-effective_from", "-id")
+
+
+def price_at(service_id, at):
+    """The list price in effect at ``at``: one seek on (service, -effective_from). None before the first price."""
+    return _in_effect(at).filter(service_id=service_id).values_list("price", flat=True).first()
+
+
+def prices_at(service_ids, at):
+    """``{service_id: price}`` in effect at ``at``, in one query."""
+    listed = Subquery(_in_effect(at).filter(service=OuterRef("pk")).values("price")[:1])
+    return dict(Service.objects.filter(pk__in=service_ids).annotate(listed=listed).values_list("pk", "listed"))
+
+
+def adjusted(price, percent=None, amount=None):
+    price = price * (1 + percent / 100) if percent is not None else price + amount
+    return max(price, Decimal(0)).quantize(CENTS, ROUND_HALF_UP)
+
+
+def reprice(services, percent=None, amount=None):
+    """
+    Change the price of every service in the ``services`` queryset by
+    ``percent`` or by ``amount`` with one bulk_update in one transaction.
+    bulk_update skips model signals, so history, the change feed (which also
+    versions the catalog) and cached responses are updated here. Returns the
+    changed services as ``(service, old_price)`` pairs.
+    """
+    now = timezone.now()
+    with write_atomic():
+        changed = []
+        for service in services.select_for_update().order_by("pk"):
+            old_price = service.price
+            service.price = adjusted(old_price, percent, amount)
+            if service.price != old_price:
+                changed.append((service, old_price))
+        if not changed:
+            return changed
+        rows = [service for service, _old_price in changed]
+        ids = [service.pk for service in rows]
+        Service.objects.bulk_update(rows, ["price"], batch_size=500)
+        ServicePrice.objects.bulk_create(
+            [ServicePrice(service=service, price=service.price, effective_from=now) for service in rows],
+            batch_size=500,
+        )
+        record_changes("service", ids)
+        response_cache.invalidate_on_commit("service")
+    return changed
+
+
+def _price_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    now = timezone.now()
+    if created or price_at(instance.pk, now) != instance.price:
+        ServicePrice.objects.create(service=instance, price=instance.price, effective_from=now)
+
+
+def connect_signals():
+    post_save.connect(_price_saved, sender=Service, dispatch_uid="core.pricing.service_saved")
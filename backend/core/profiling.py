@@ -0,0 +1,206 @@
+import cProfile
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+
+from .async_views import _authenticate
+
+PROFILE_PARAM = "__profile"
+PROFILE_HEADER = "HTTP_X_PROFILE"
+MODES = {"1": "cprofile", "cprofile": "cprofile", "sample": "sample"}
+FORMATS = {"cprofile": ("prof", "application/octet-stream"), "sample": ("speedscope.json", "application/json")}
+PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{6}$")
+
+# cProfile hooks the interpreter, and samples of two requests would mix: one profile at a time.
+_busy = threading.Lock()
+
+
+def profile_dir():
+    return Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "logs" / "profiles"))
+
+
+class Sampler:
+    """Samples the stack of one thread every ``interval`` seconds from a helper thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples.append(stack[::-1])
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def speedscope(self, name):
+        """The samples in speedscope's file format (https://www.speedscope.app)."""
+        frames, index = [], {}
+        stacks = []
+        for stack in self.samples:
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                ids.append(index[frame])
+            stacks.append(ids)
+        weight = self.interval * 1000
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "kabul-erp",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": weight * len(stacks),
+                "samples": stacks,
+                "weights": [weight] * len(stacks),
+            }],
+        }
+
+
+def _prune(directory, keep):
+    metas = sorted(directory.glob("*.meta.json"))
+    for meta in metas[:max(0, len(metas) - keep)]:
+        profile_id = meta.name.split(".", 1)[0]
+        for path in directory.glob(f"{profile_id}.*"):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Stored profile metadata, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for meta in sorted(directory.glob("*.meta.json"), reverse=True):
+        try:
+            profiles.append(json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_file(profile_id):
+    """``(path, content_type)`` of a stored profile, or None."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    for extension, content_type in FORMATS.values():
+        path = profile_dir() / f"{profile_id}.{extension}"
+        if path.is_file():
+            return path, content_type
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in (PROFILING=1; otherwise not installed). A staff request carrying
+    ``?__profile=1`` or ``X-Profile: 1`` runs under cProfile (a ``.prof`` file
+    for snakeviz); ``sample`` instead samples the stack every
+    PROFILE_SAMPLE_MS (speedscope JSON). The profile and the request metadata
+    are written to PROFILE_DIR and the id is returned in ``X-Profile-Id``.
+    Requests without the flag pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = request.GET.get(PROFILE_PARAM) or request.META.get(PROFILE_HEADER)
+        mode = MODES.get(flag) if flag else None
+        user = self._staff(request) if mode is not None else None
+        if user is None:
+            return self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            response = self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+        try:
+            return self._profiled(request, mode, user)
+        finally:
+            _busy.release()
+
+    def _staff(self, request):
+        # DRF's Request copies the user it finds onto the HttpRequest, where
+        # SessionAuthentication would take a token user for a session one.
+        session_user = request.user
+        try:
+            user = _authenticate(request)
+        except exceptions.APIException:
+            return None
+        finally:
+            request.user = session_user
+        return user if user is not None and user.is_staff else None
+
+    def _profiled(self, request, mode, user):
+        started = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        else:
+            interval = getattr(settings, "PROFILE_SAMPLE_MS", 1) / 1000
+            with Sampler(threading.get_ident(), interval) as sampler:
+                response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        now = timezone.now()
+        # Time-ordered ids: sorting file names sorts profiles.
+        profile_id = f"{now:%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:6]}"
+        extension, _content_type = FORMATS[mode]
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{profile_id}.{extension}"
+        if mode == "cprofile":
+            profiler.dump_stats(path)
+        else:
+            name = f"{request.method} {request.path}"
+            path.write_text(json.dumps(sampler.speedscope(name)), encoding="utf-8")
+
+        match = getattr(request, "resolver_match", None)
+        meta = {
+            "id": profile_id,
+            "mode": mode,
+            "file": path.name,
+            "created_at": now.isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "route": match.route if match else None,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "user": user.get_username(),
+        }
+        (directory / f"{profile_id}.meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        _prune(directory, getattr(settings, "PROFILE_KEEP", 100))
+        response["X-Profile-Id"] = profile_id
+        return response
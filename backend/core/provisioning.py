@@ -0,0 +1,116 @@
+import csv
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError
+
+from .sqlite import write_atomic
+
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+
+# Below this many rows handing work to the pool costs more than hashing inline.
+POOL_THRESHOLD = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash_pool():
+    # One pool per process, shared by all requests. PBKDF2 (hashlib) releases
+    # the GIL, so threads hash in parallel without spawning processes.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, "USER_BULK_HASH_WORKERS", 0) or min(4, os.cpu_count() or 1)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        return _pool
+
+
+def hash_passwords(raw_passwords):
+    if len(raw_passwords) < POOL_THRESHOLD:
+        return [make_password(p) for p in raw_passwords]
+    return list(_hash_pool().map(make_password, raw_passwords))
+
+
+def _flag(value, default):
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def parse_rows(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "username" not in [f.strip() for f in reader.fieldnames]:
+        raise ValidationError("ستون username در فایل CSV الزامی است.")
+    rows = []
+    for row in reader:
+        rows.append({(k or "").strip(): (v or "").strip() for k, v in row.items()})
+    return rows
+
+
+def provision_users(rows):
+    max_length = User._meta.get_field("username").max_length
+    usernames = [row.get("username", "") for row in rows]
+    existing = set(User.objects.filter(username__in=[u for u in usernames if u]).values_list("username", flat=True))
+
+    errors = []
+    valid = []
+    seen = set()
+    # Row numbers are 1-based and skip the CSV header line.
+    for index, row in enumerate(rows, start=2):
+        row_errors = {}
+        username = row.get("username", "")
+        password = row.get("password", "")
+        email = row.get("email", "")
+        if not username:
+            row_errors["username"] = "نام کاربری الزامی است."
+        elif len(username) > max_length:
+            row_errors["username"] = f"نام کاربری حداکثر {max_length} کاراکتر است."
+        elif username in existing or username in seen:
+            row_errors["username"] = "این نام کاربری قبلاً ثبت شده است."
+        else:
+            try:
+                User.username_validator(username)
+            except ValidationError as exc:
+                row_errors["username"] = " ".join(exc.messages)
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                row_errors["email"] = "ایمیل نامعتبر است."
+        if not password:
+            row_errors["password"] = "رمز عبور الزامی است."
+        else:
+            try:
+                # AUTH_PASSWORD_VALIDATORS, with the row as the user for the similarity check.
+                password_validation.validate_password(password, User(username=username, email=email))
+            except ValidationError as exc:
+                row_errors["password"] = " ".join(exc.messages)
+        if row_errors:
+            errors.append({"row": index, "username": username, "errors": row_errors})
+            continue
+        seen.add(username)
+        valid.append(row)
+
+    hashes = hash_passwords([row["password"] for row in valid])
+    users = [
+        User(
+            username=row["username"],
+            email=row.get("email", ""),
+            password=password_hash,
+            is_staff=_flag(row.get("is_staff"), False),
+            is_active=_flag(row.get("is_active"), True),
+        )
+        for row, password_hash in zip(valid, hashes)
+    ]
+    # Hashing happens above, outside the transaction, so the write lock is short.
+    with write_atomic():
+        created = User.objects.bulk_create(users, batch_size=500)
+    return created, errors
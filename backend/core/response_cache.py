@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+# Each tag has a version token; cache keys embed the tokens of their tags, so
+# bumping a token orphans every response built from that model. This works on
+# any cache backend (no key scans), and stale entries simply expire.
+TAG_KEY = "rc:tag:{}"
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def tag_versions(tags):
+    cache = _cache()
+    keys = {tag: TAG_KEY.format(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            # Never fall back to a fixed initial value: an evicted token must not
+            # resurrect entries cached under an older token.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def invalidate(*tags):
+    """Drop cached responses for ``tags`` now."""
+    _cache().set_many({TAG_KEY.format(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def invalidate_on_commit(*tags):
+    """
+    Drop cached responses for ``tags`` once the current transaction commits;
+    call after bulk writes that skip signals. Invalidating earlier would let a
+    concurrent GET cache the pre-commit rows again under the new token.
+    """
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+class ResponseCacheMetrics:
+    def __init__(self):
+        self._counts = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0})
+        self._lock = threading.Lock()
+
+    def incr(self, name, outcome):
+        with self._lock:
+            self._counts[name][outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+metrics = ResponseCacheMetrics()
+
+
+class CachedResponseMixin:
+    """
+    Caches rendered GET responses of a DRF view, keyed by host, path, query
+    string, negotiated format and staff/non-staff, under ``cache_tags``.
+    Writes to the models registered for those tags invalidate them.
+    """
+
+    cache_tags = ()
+
+    def get_cache_timeout(self):
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def response_cache_key(self, request):
+        versions = tag_versions(self.cache_tags)
+        parts = [
+            request.get_host(),
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            "staff" if request.user.is_staff else "user",
+            *(f"{tag}={versions[tag]}" for tag in self.cache_tags),
+        ]
+        return "rc:" + hashlib.md5("|".join(parts).encode()).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        if request.method != "GET" or not self.cache_tags or self.get_cache_timeout() <= 0:
+            return
+        name = ",".join(self.cache_tags)
+        key = self.response_cache_key(request)
+        hit = _cache().get(key)
+        if hit is None:
+            metrics.incr(name, "misses")
+            self._response_cache_key = key
+            return
+        metrics.incr(name, "hits")
+        content, content_type = hit
+        cached = HttpResponse(content, content_type=content_type, headers={"X-Cache": "HIT"})
+        # APIView.dispatch looks the handler up after initial(), so the hit stands in for it.
+        setattr(self, request.method.lower(), lambda request, *args, **kwargs: cached)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "_response_cache_key", None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            _cache().set(key, (response.content, response["Content-Type"]), self.get_cache_timeout())
+            metrics.incr(",".join(self.cache_tags), "stores")
+            response["X-Cache"] = "MISS"
+        return response
+
+
+def _invalidate_handler(tag):
+    def handler(sender, **kwargs):
+        invalidate_on_commit(tag)
+
+    return handler
+
+
+registered_tags = set()
+
+
+def connect_signals(tagged_models):
+    registered_tags.update(tagged_models)
+    for tag, model in tagged_models.items():
+        handler = _invalidate_handler(tag)
+        uid = f"core.response_cache.{tag}"
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Project, Service, CompanySetting, Employee, UserProfile
+from .models import Project, Service, ServicePrice, CompanySetting, Employee, UserProfile
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -35,7 +35,7 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(required=True)
 
     def validate(self, attrs):
-        user = self.context.get("request").user
+        user = self.context.get("user") or self.context.get("request").user
         if not user.check_password(attrs.get("old_password")):
             raise serializers.ValidationError({"old_password": "رمز قبلی صحیح نیست"})
         return attrs
@@ -65,6 +65,46 @@ class ServiceSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ServicePriceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ServicePrice
+        fields = ["price", "effective_from"]
+
+
+class ServiceRepriceSerializer(serializers.Serializer):
+    """An adjustment (``percent`` or ``amount``) and the services it applies to."""
+
+    FILTERS = ("ids", "name", "min_price", "max_price")
+
+    percent = serializers.DecimalField(max_digits=7, decimal_places=2, required=False, min_value=-100)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    name = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ("percent" in attrs) == ("amount" in attrs):
+            raise serializers.ValidationError("دقیقاً یکی از percent یا amount لازم است.")
+        if not attrs["all"] and not any(key in attrs for key in self.FILTERS):
+            raise serializers.ValidationError("برای تغییر قیمت همه خدمات all=true بفرستید یا فیلتر تعیین کنید.")
+        return attrs
+
+    def services(self):
+        data = self.validated_data
+        services = Service.objects.all()
+        if "ids" in data:
+            services = services.filter(pk__in=data["ids"])
+        if "name" in data:
+            services = services.filter(name__icontains=data["name"])
+        if "min_price" in data:
+            services = services.filter(price__gte=data["min_price"])
+        if "max_price" in data:
+            services = services.filter(price__lte=data["max_price"])
+        return services
+
+
 class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
@@ -0,0 +1,116 @@
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_router import reads_from_reporting
+
+LEASE_KEY = "sf:lease:{}"
+RESULT_KEY = "sf:result:{}:{}"
+_MISSING = object()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = _MISSING
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one computation. Within a
+    process, callers of a key already in flight wait on the leader's event.
+    Across workers, the leader holds a cache lease (``cache.add``) and
+    publishes its result under the lease token; other workers poll for it.
+    Followers that wait longer than ``timeout`` (a stuck or dead leader) or
+    see the leader fail compute the value themselves.
+    """
+
+    def __init__(self, timeout=None, poll_interval=0.05):
+        self._timeout = timeout
+        self.poll_interval = poll_interval
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {"leaders": 0, "shared": 0, "shared_remote": 0, "timeouts": 0}
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, "SINGLE_FLIGHT_TIMEOUT", 30)
+
+    def do(self, key, fn):
+        if self.timeout <= 0:
+            return fn()
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.timeout) and flight.result is not _MISSING:
+                self.counters["shared"] += 1
+                return flight.result
+            self.counters["timeouts"] += 1
+            return fn()
+        try:
+            flight.result = self._across_workers(key, fn)
+            return flight.result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _across_workers(self, key, fn):
+        lease_key = LEASE_KEY.format(key)
+        token = uuid.uuid4().hex
+        if cache.add(lease_key, token, timeout=self.timeout):
+            self.counters["leaders"] += 1
+            try:
+                result = fn()
+                cache.set(RESULT_KEY.format(key, token), result, timeout=self.timeout)
+                return result
+            finally:
+                if cache.get(lease_key) == token:
+                    cache.delete(lease_key)
+
+        holder = cache.get(lease_key)
+        deadline = time.monotonic() + self.timeout
+        while holder is not None and time.monotonic() < deadline:
+            result = cache.get(RESULT_KEY.format(key, holder), _MISSING)
+            if result is not _MISSING:
+                self.counters["shared_remote"] += 1
+                return result
+            if cache.get(lease_key) != holder:
+                # Released or expired: look once more, the result may have landed just before.
+                result = cache.get(RESULT_KEY.format(key, holder), _MISSING)
+                if result is not _MISSING:
+                    self.counters["shared_remote"] += 1
+                    return result
+                break
+            time.sleep(self.poll_interval)
+        else:
+            if holder is not None:
+                self.counters["timeouts"] += 1
+        return fn()
+
+    def snapshot(self):
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"timeout": self.timeout, "in_flight": in_flight, **self.counters}
+
+
+flights = SingleFlight()
+
+
+def request_key(request):
+    """
+    Path, sorted query string and the database the reads go to: a user pinned
+    to the primary after a write must not get a replica-lagged result.
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    source = "reporting" if reads_from_reporting() else "default"
+    return f"{source}:{request.path}?{query}"
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not getattr(settings, "SQLITE_PRODUCTION", False):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # Negative cache_size is in KiB rather than pages.
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+
+
+def connect_signals():
+    connection_created.connect(apply_pragmas, dispatch_uid="core.sqlite.apply_pragmas")
+
+
+@contextmanager
+def write_atomic(using=None, savepoint=True):
+    """
+    ``transaction.atomic()`` for a block that writes. On the SQLite production
+    backend the outermost block begins IMMEDIATE; nested in a running
+    transaction it is a plain savepoint, and other backends ignore the flag.
+    """
+    connection = transaction.get_connection(using)
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using, savepoint=savepoint):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
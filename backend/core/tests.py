@@ -1,3 +1,871 @@
-from django.test import TestCase
+import asyncio
+import contextvars
+import json
+import os
+import pstats
+import runpy
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from decimal import Decimal
+from base64 import b64encode
+from datetime import datetime, timezone as dt_timezone
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, modify_settings, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.jwt import CustomTokenObtainPairSerializer
+from core import db_router, middleware, renderers, throttling
+from core.authentication import ClaimsUser, StatelessJWTAuthentication, active_users
+from core.backup import BackupError, restore
+from core.changefeed import committed_cursor, compaction_floor, latest_cursor, record_changes
+from core.events import RESYNC, Broker
+from core.catalog import latest_version
+from core.pagination import KeysetPagination, check_keyset_orderings
+from core.views import ServiceViewSet
+from core.models import ChangeLog, Employee, Service, UserProfile
+from core.backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+from core.pricing import price_at
+from core.sqlite import write_atomic
+from core.response_cache import invalidate, metrics as response_cache_metrics
+from core.singleflight import LEASE_KEY, RESULT_KEY, SingleFlight
+from finance.models import Expense
+from invoices.models import Invoice, InvoiceItem
+
+
+class SeedBenchTests(TestCase):
+    def test_seed_bench_spreads_invoices_over_history(self):
+        call_command("seed_bench", services=5, employees=2, invoices=50, expenses=10, years=2, stdout=StringIO())
+        self.assertEqual(Service.objects.filter(name__regex=r" \d+$").count(), 5)
+        self.assertEqual(Employee.objects.count(), 2)
+        self.assertEqual(Invoice.objects.count(), 50)
+        self.assertEqual(Expense.objects.count(), 10)
+        self.assertTrue(InvoiceItem.objects.exists())
+        dates = Invoice.objects.dates("created_at", "day")
+        self.assertGreater(len(dates), 1)
+
+    def test_run_bench_writes_baseline_and_compares(self):
+        call_command("seed_bench", services=3, employees=1, invoices=5, expenses=2, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baseline.json"
+            call_command("run_bench", iterations=1, warmup=0, only=["invoice_summary", "finance_report"],
+                         output=str(baseline), stdout=StringIO())
+            report = json.loads(baseline.read_text())
+            self.assertEqual(set(report["endpoints"]), {"invoice_summary", "finance_report"})
+            self.assertEqual(report["endpoints"]["finance_report"]["status"], 200)
+            call_command("run_bench", iterations=1, warmup=0, only=["finance_report"], compare=str(baseline),
+                         tolerance=100, stdout=StringIO())
+
+
+class UserApiTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_user_list_is_paginated_and_searchable(self):
+        User.objects.create_user("worker", "worker@example.com", "pass")
+        response = self.client.get("/api/users/", {"search": "worker"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([u["username"] for u in response.data["results"]], ["worker"])
+
+
+class StatelessJWTTests(TestCase):
+    def setUp(self):
+        active_users.clear()
+        self.user = User.objects.create_user("staff", password="pass", is_staff=True)
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.request = APIRequestFactory().get("/api/services/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def authenticate(self):
+        return StatelessJWTAuthentication().authenticate(self.request)[0]
+
+    def test_user_comes_from_claims_and_the_state_cache(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.username, user.is_staff), (self.user.pk, "staff", True))
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_demoted_user_loses_staff_before_the_token_expires(self):
+        self.assertTrue(self.authenticate().is_staff)
+        self.user.is_staff = False
+        self.user.save()
+        self.assertFalse(self.authenticate().is_staff)
+
+
+class UserBulkTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, *lines):
+        csv_file = SimpleUploadedFile("users.csv", "\n".join(["username,password,email,is_staff", *lines]).encode())
+        return self.client.post("/api/users/bulk/", {"file": csv_file}, format="multipart")
+
+    def test_valid_rows_are_created_with_hashed_passwords(self):
+        rows = [f"cashier{n},Kabul-Asia-{n}-pw,c{n}@example.com,{n == 0}" for n in range(5)]
+        response = self.upload(*rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["created"], response.data["errors"]), (5, []))
+        user = User.objects.get(username="cashier3")
+        self.assertTrue(user.check_password("Kabul-Asia-3-pw"))
+        self.assertEqual([user.is_staff for user in User.objects.filter(username__startswith="cashier")
+                          .order_by("username")], [True, False, False, False, False])
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self.upload(
+            "cashier,Kabul-Asia-pw,,",
+            "cashier,Kabul-Asia-pw,,",
+            "admin,Kabul-Asia-pw,,",
+            "bad name!,Kabul-Asia-pw,,",
+            "weak,123,,",
+            "similar,similar@example,similar@example.com,",
+        )
+        self.assertEqual(response.data["created"], 1)
+        errors = {error["row"]: error["errors"] for error in response.data["errors"]}
+        self.assertEqual(set(errors), {3, 4, 5, 6, 7})
+        self.assertEqual(set(errors[3]), {"username"})
+        self.assertEqual(set(errors[4]), {"username"})
+        self.assertEqual(set(errors[5]), {"username"})
+        self.assertEqual(set(errors[6]), {"password"})
+        self.assertEqual(set(errors[7]), {"password"})
+        self.assertFalse(User.objects.filter(username__in=["bad name!", "weak", "similar"]).exists())
+
+
+@override_settings(LOGIN_THROTTLE_BACKEND="local", LOGIN_THROTTLE_RATES={"login": "2/min"})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        User.objects.create_user("worker", "worker@example.com", "pass")
+        throttling.get_backend().clear()
+        throttling.metrics.reset()
+        self.client = APIClient()
+
+    def login(self, username="worker", **extra):
+        return self.client.post("/api/token/", {"username": username, "password": "wrong"}, format="json", **extra)
+
+    def test_third_attempt_from_one_ip_gets_429(self):
+        self.assertEqual(self.login("a").status_code, 401)
+        self.assertEqual(self.login("b").status_code, 401)
+        response = self.login("c")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(throttling.metrics.snapshot()["login"]["throttled_ip"], 1)
+
+    def test_username_bucket_spans_ips(self):
+        for address in ("10.0.0.1", "10.0.0.2"):
+            self.assertEqual(self.login(REMOTE_ADDR=address).status_code, 401)
+        self.assertEqual(self.login(REMOTE_ADDR="10.0.0.3").status_code, 429)
+        self.assertEqual(throttling.metrics.snapshot()["login"]["throttled_username"], 1)
+
+    def test_forwarded_for_does_not_open_new_buckets(self):
+        for n in range(2):
+            self.login(f"user{n}", HTTP_X_FORWARDED_FOR=f"203.0.113.{n}")
+        response = self.login("other", HTTP_X_FORWARDED_FOR="203.0.113.99")
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(REST_FRAMEWORK={"NUM_PROXIES": 1})
+    def test_forwarded_for_is_used_behind_a_declared_proxy(self):
+        for n in range(2):
+            self.login(f"user{n}", HTTP_X_FORWARDED_FOR="203.0.113.1")
+        self.assertEqual(self.login("other", HTTP_X_FORWARDED_FOR="203.0.113.2").status_code, 401)
+
+    @override_settings(LOGIN_THROTTLE_RATES={"reset_password": "1/min", "register": "1/min"})
+    def test_basic_auth_is_not_checked_before_an_exhausted_bucket(self):
+        basic = {"HTTP_AUTHORIZATION": "Basic " + b64encode(b"worker:wrong").decode()}
+        for path in ("/api/users/reset-password/", "/api/register/"):
+            self.client.post(path, {"username": "worker"}, format="json")
+            with mock.patch.object(User, "check_password") as check_password:
+                response = self.client.post(path, {"username": "worker"}, format="json", **basic)
+            self.assertEqual(response.status_code, 429, path)
+            check_password.assert_not_called()
+
+    def test_cache_buckets_do_not_overspend_under_concurrency(self):
+        backend, key = throttling.CacheBucketBackend(), f"test:{os.getpid()}:{time.time()}"
+        results, start = [], threading.Barrier(12)
+
+        def attempt():
+            start.wait()
+            results.append(backend.consume(key, 5, 5 / 3600)[0])
+
+        cache_class = type(caches["default"])
+        slow_get = cache_class.get
+
+        def get(self, *args, **kwargs):
+            # Widen the read-modify-write window so unlocked workers would all read a full bucket.
+            value = slow_get(self, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        workers = [threading.Thread(target=attempt) for _ in range(12)]
+        with mock.patch.object(cache_class, "get", get):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_unknown_cache_backend_is_a_configuration_error(self):
+        with mock.patch.dict(os.environ, {"CACHE_BACKEND": "memcache"}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "CACHE_BACKEND='memcache'"):
+                runpy.run_path(str(Path(__file__).resolve().parent.parent / "backend" / "settings.py"))
+
+
+@mock.patch.object(db_router, "reporting_enabled", return_value=True)
+class ReadYourWritesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("staff", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pinned(self):
+        return bool(cache.get(db_router._pin_key(self.user.pk)))
+
+    def reporting_reads_after(self, write):
+        def run():
+            db_router._reporting_reads.set(True)
+            db_router._wrote.set(False)
+            write()
+            return db_router.reads_from_reporting()
+        return contextvars.copy_context().run(run)
+
+    def test_write_routing_alone_does_not_pin(self, _enabled):
+        UserProfile.objects.create(user=self.user)
+        self.assertTrue(self.reporting_reads_after(lambda: db_router.ReportingRouter().db_for_write(Service)))
+        self.assertTrue(self.reporting_reads_after(lambda: UserProfile.objects.get_or_create(user=self.user)))
+        self.assertFalse(self.reporting_reads_after(lambda: Service.objects.create(name="Laser", price=1)))
+        self.assertFalse(self.reporting_reads_after(lambda: record_changes("service", [1])))
+
+    def test_only_requests_that_write_pin_the_user(self, _enabled):
+        UserProfile.objects.create(user=self.user)
+        self.client.get("/api/users/profile/")
+        self.assertFalse(self.pinned())
+        self.client.post("/api/finance/expenses/", {"title": "Rent", "amount": "30"}, format="json")
+        self.assertTrue(self.pinned())
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache_metrics.reset()
+        self.staff = User.objects.create_user("staff", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.service = Service.objects.create(name="Laser", price=10)
+
+    def test_hit_after_miss_and_invalidated_by_write(self):
+        first = self.client.get("/api/services/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        second = self.client.get("/api/services/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/services/{self.service.pk}/", {"price": "12"}, format="json")
+            # Not before commit: a reader could re-cache the old rows under the new token.
+            self.assertEqual(self.client.get("/api/services/")["X-Cache"], "HIT")
+        refreshed = self.client.get("/api/services/")
+        self.assertEqual(refreshed["X-Cache"], "MISS")
+        self.assertEqual(refreshed.json()["results"][0]["price"], "12.00")
+        self.assertEqual(response_cache_metrics.snapshot()["service"], {"hits": 2, "misses": 2, "stores": 2})
+
+    def test_hit_stands_in_for_the_viewset_action(self):
+        path = f"/api/services/{self.service.pk}/"
+        first = self.client.get(path)
+        with mock.patch.object(ServiceViewSet, "retrieve") as retrieve:
+            second = self.client.get(path)
+        retrieve.assert_not_called()
+        self.assertEqual((second["X-Cache"], second.content), ("HIT", first.content))
+        self.assertEqual(APIClient().get(path).status_code, 403)
+
+    def test_staff_and_non_staff_are_cached_separately(self):
+        self.client.get("/api/services/")
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user("cashier", password="pass"))
+        self.assertEqual(other.get("/api/services/")["X-Cache"], "MISS")
+
+    def test_bulk_writes_need_explicit_invalidation(self):
+        self.client.get("/api/services/")
+        Service.objects.filter(pk=self.service.pk).update(name="Laser 2")
+        self.assertEqual(self.client.get("/api/services/")["X-Cache"], "HIT")
+        invalidate("service")
+        self.assertEqual(self.client.get("/api/services/").json()["results"][0]["name"], "Laser 2")
+
+
+class ServicePricingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.pvc = Service.objects.create(name="PVC door", price=100)
+        self.window = Service.objects.create(name="PVC window", price="250.50")
+        self.laser = Service.objects.create(name="Laser", price=40)
+
+    def test_bulk_reprice_records_history_and_feeds(self):
+        before, version, cursor = timezone.now(), latest_version(), latest_cursor()
+        self.client.get("/api/services/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/services/reprice/", {"percent": "10", "name": "pvc"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["name"], str(row["old_price"]), str(row["price"])) for row in response.data["services"]],
+            [("PVC door", "100.00", "110.00"), ("PVC window", "250.50", "275.55")],
+        )
+        self.assertEqual(self.client.get("/api/services/")["X-Cache"], "MISS")
+        self.assertEqual(latest_version() - version, 2)
+        self.assertEqual(ChangeLog.objects.filter(id__gt=cursor, model="service").count(), 2)
+
+        self.assertEqual(price_at(self.pvc.pk, before), 100)
+        self.assertEqual(price_at(self.pvc.pk, timezone.now()), Decimal("110.00"))
+        history = self.client.get(f"/api/services/{self.pvc.pk}/prices/").data
+        self.assertEqual([row["price"] for row in history], ["110.00", "100.00"])
+        self.assertEqual(price_at(self.laser.pk, timezone.now()), 40)
+
+    def test_reprice_needs_one_adjustment_a_filter_and_staff(self):
+        post = lambda body: self.client.post("/api/services/reprice/", body, format="json").status_code
+        self.assertEqual(post({"amount": "5"}), 400)
+        self.assertEqual(post({"amount": "5", "percent": "1", "all": True}), 400)
+        self.assertEqual(self.client.post("/api/services/reprice/", {"amount": "-500", "all": True}, format="json")
+                         .data["updated"], 3)
+        self.assertEqual(list(Service.objects.values_list("price", flat=True).distinct()), [0])
+        cashier = APIClient()
+        cashier.force_authenticate(User.objects.create_user("cashier", password="pass"))
+        self.assertEqual(cashier.post("/api/services/reprice/", {"amount": "5", "all": True}, format="json").status_code, 403)
+
+    def test_invoice_lines_default_to_the_price_at_the_invoice_date(self):
+        line = {"service": self.pvc.pk, "quantity": 1}
+        invoice = self.client.post("/api/invoices/", {"customer_name": "Ahmad", "items": [line]}, format="json").data
+        self.assertEqual(invoice["items"][0]["price"], "100.00")
+        self.client.post("/api/services/reprice/", {"amount": "20", "ids": [self.pvc.pk]}, format="json")
+        edited = self.client.patch(f"/api/invoices/{invoice['id']}/", {"items": [line]}, format="json").data
+        self.assertEqual(edited["items"][0]["price"], "100.00")
+        fresh = self.client.post("/api/invoices/", {"customer_name": "Ahmad", "items": [line]}, format="json").data
+        self.assertEqual(fresh["items"][0]["price"], "120.00")
+
+
+@modify_settings(MIDDLEWARE={"append": "core.profiling.ProfilingMiddleware"})
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        overrides = override_settings(PROFILE_DIR=self.tmp.name, PROFILE_KEEP=2, PROFILE_SAMPLE_MS=0.5)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.staff = User.objects.create_user("staff", password="pass", is_staff=True)
+        token = CustomTokenObtainPairSerializer.get_token(self.staff).access_token
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {token}")
+        Service.objects.create(name="Laser", price=10)
+
+    def test_staff_request_is_profiled_and_downloadable(self):
+        response = self.client.get("/api/services/", {"__profile": 1})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+        listed = self.client.get("/api/profiles/").data
+        self.assertEqual([(row["id"], row["mode"], row["user"]) for row in listed], [(profile_id, "cprofile", "staff")])
+
+        download = self.client.get(f"/api/profiles/{profile_id}/")
+        self.assertEqual(download.status_code, 200)
+        path = Path(self.tmp.name) / "downloaded.prof"
+        path.write_bytes(b"".join(download.streaming_content))
+        self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+        self.assertEqual(self.client.get("/api/profiles/../../settings/").status_code, 404)
+
+    def test_sampling_mode_writes_speedscope_and_old_profiles_are_pruned(self):
+        ids = [self.client.get("/api/services/", HTTP_X_PROFILE="sample")["X-Profile-Id"] for _ in range(3)]
+        self.assertEqual([row["id"] for row in self.client.get("/api/profiles/").data], ids[:0:-1])
+        profile = json.loads(b"".join(self.client.get(f"/api/profiles/{ids[-1]}/").streaming_content))
+        self.assertEqual(profile["profiles"][0]["type"], "sampled")
+        self.assertEqual(self.client.get(f"/api/profiles/{ids[0]}/").status_code, 404)
+
+    def test_flag_is_ignored_for_non_staff(self):
+        cashier = APIClient()
+        cashier.force_authenticate(User.objects.create_user("cashier", password="pass"))
+        response = cashier.get("/api/services/", {"__profile": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(cashier.get("/api/profiles/").status_code, 403)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+        # Same day for all: pages are cut on the id tie-breaker.
+        self.ids = [Expense.objects.create(title=f"E{index}", amount=index).pk for index in range(5)][::-1]
+
+    def test_cursor_round_trip(self):
+        pages, url = [], "/api/finance/expenses/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            pages.append([row["id"] for row in page["results"]])
+            url = page["next"]
+        self.assertEqual(pages, [self.ids[:2], self.ids[2:4], self.ids[4:]])
+        back = self.client.get(page["previous"]).json()
+        self.assertEqual([row["id"] for row in back["results"]], self.ids[2:4])
+        self.assertEqual([row["id"] for row in self.client.get(back["previous"]).json()["results"]], self.ids[:2])
+
+    def test_cursor_keeps_microseconds(self):
+        # One millisecond, six microseconds: a millisecond cursor skipped rows.
+        moment = datetime(2026, 3, 10, 8, 0, 0, 123000, tzinfo=dt_timezone.utc)
+        ids = []
+        for index in range(6):
+            invoice = Invoice.objects.create(customer_name="Karim")
+            Invoice.objects.filter(pk=invoice.pk).update(created_at=moment.replace(microsecond=123000 + index))
+            ids.insert(0, invoice.pk)
+        seen, url = [], "/api/invoices/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, ids)
+
+    def test_services_are_searched_on_the_server(self):
+        Service.objects.create(name="Laser engraving", price=10)
+        names = [row["name"] for row in self.client.get("/api/services/", {"search": "laser"}).json()["results"]]
+        self.assertEqual(names, ["Laser engraving"])
+
+    def test_with_count(self):
+        self.assertEqual(self.client.get("/api/finance/expenses/", {"with_count": 1}).json()["count"], 5)
+        self.assertNotIn("count", self.client.get("/api/finance/expenses/").json())
+
+    def test_bad_cursor_is_404(self):
+        def cursor(data):
+            return b64encode(json.dumps(data).encode()).decode()
+
+        for value in ("!!!", cursor([1]), cursor({"p": 5}), cursor({"p": [1]}), cursor({"p": ["x", 1]})):
+            response = self.client.get("/api/finance/expenses/", {"cursor": value})
+            self.assertEqual(response.status_code, 404, value)
+
+    def test_unsupported_ordering_fails_loudly(self):
+        class View:
+            ordering = None
+
+        request = APIRequestFactory().get("/")
+        for ordering in (("customer__name",), (F("total"),), ("nope",)):
+            View.ordering = ordering
+            with self.assertRaises(ImproperlyConfigured):
+                KeysetPagination().get_ordering(request, Invoice.objects.all(), View())
+
+    def test_system_check_reports_unsupported_view_ordering(self):
+        from finance.views import ExpenseViewSet
+
+        self.assertEqual(check_keyset_orderings(), [])
+        with mock.patch.object(ExpenseViewSet, "queryset", Expense.objects.order_by(Lower("title"))):
+            errors = check_keyset_orderings()
+        self.assertEqual([(error.id, error.obj) for error in errors], [("core.E001", ExpenseViewSet)])
+
+
+@modify_settings(MIDDLEWARE={"prepend": "core.middleware.QueryInstrumentationMiddleware"})
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+        # The slow log opens SLOW_REQUEST_LOG once; start and leave without a handler.
+        middleware.slow_log.handlers.clear()
+        self.addCleanup(middleware.slow_log.handlers.clear)
+
+    def timing(self, response):
+        return dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+
+    def test_server_timing_header_counts_queries(self):
+        timing = self.timing(self.client.get("/api/invoices/"))
+        self.assertEqual(set(timing), {"db", "serialize", "render", "app", "total"})
+        queries = int(timing["db"].split('desc="')[1].split()[0])
+        self.assertGreater(queries, 0)
+
+    def test_serializer_timing_is_scoped_to_timed_requests(self):
+        from core.serializers import ServiceSerializer
+
+        self.assertIsNone(middleware._timings.get())
+        timings = middleware.RequestTimings()
+        token = middleware._timings.set(timings)
+        try:
+            timed = middleware.timed_serializer_class(ServiceSerializer)
+            data = timed(Service.objects.all(), many=True).data
+        finally:
+            middleware._timings.reset(token)
+        self.assertEqual(len(data), Service.objects.count())
+        self.assertGreater(timings.serialize_ms, 0)
+        self.assertNotIn(middleware.TimedDataMixin, type(ServiceSerializer(Service.objects.all(), many=True)).__mro__)
+
+    def test_queries_on_pool_threads_count_for_the_request(self):
+        timings = middleware.RequestTimings()
+        token = middleware._timings.set(timings)
+        try:
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(lambda: list(Service.objects.all()),))
+            worker.start()
+            worker.join()
+        finally:
+            middleware._timings.reset(token)
+        self.assertEqual(len(timings.queries), 1)
+
+    def test_slow_requests_are_logged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "slow.jsonl"
+            with override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_LOG=str(log)):
+                self.client.get("/api/invoices/")
+            for handler in middleware.slow_log.handlers:
+                handler.close()
+            entry = json.loads(log.read_text(encoding="utf-8").splitlines()[-1])
+        self.assertEqual(entry["path"], "/api/invoices/")
+        self.assertGreater(entry["queries"], 0)
+
+    def test_async_stack(self):
+        async def get_response(request):
+            return HttpResponse("ok")
+
+        instrumented = middleware.QueryInstrumentationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(instrumented))
+        response = asyncio.run(instrumented(APIRequestFactory().get("/")))
+        self.assertIn('db;dur=0.0;desc="0 queries"', response["Server-Timing"])
+
+
+class RendererTests(TestCase):
+    def test_fast_json_keeps_decimals_exact(self):
+        body = renderers.FastJSONRenderer().render({"amount": Decimal("12345678901234.10"), "name": "کابل"})
+        self.assertEqual(json.loads(body), {"amount": "12345678901234.10", "name": "کابل"})
+
+    def test_fast_json_parser_round_trip(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+        response = client.post("/api/services/", json.dumps({"name": "CNC", "price": "99.95"}),
+                               content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)["price"], "99.95")
+
+    @unittest.skipIf(renderers.msgpack is None, "msgpack is not installed")
+    def test_msgpack_negotiation(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+        Service.objects.create(name="Laser", price=Decimal("10.50"))
+        response = client.get("/api/services/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(renderers.msgpack.unpackb(response.content)["results"][0]["price"], "10.50")
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+
+    def test_runs_sub_requests_with_per_item_status(self):
+        response = self.client.post("/api/batch/", {"parallel": True, "requests": [
+            "/api/invoices/summary/",
+            {"id": "me", "path": "/api/users/me/"},
+            "/api/finance/report/?start=2020-01-01",
+            "/api/missing/",
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["responses"]
+        self.assertEqual([item["status"] for item in results], [200, 200, 200, 404])
+        self.assertEqual(results[1]["id"], "me")
+        self.assertEqual(results[1]["body"]["username"], "staff")
+        self.assertEqual(results[2]["body"]["total_invoices"], 0)
+
+    def test_rejects_non_get_and_nested_batches(self):
+        for item in ({"path": "/api/services/", "method": "POST"}, "/api/batch/", "http://evil/api/"):
+            response = self.client.post("/api/batch/", {"requests": [item]}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        response = APIClient().post("/api/batch/", {"requests": ["/api/users/me/"]}, format="json")
+        self.assertIn(response.status_code, (401, 403))
+
+
+class BrokerTests(TestCase):
+    def test_bounded_queue_replaces_backlog_with_resync(self):
+        broker = Broker(queue_size=2)
+
+        async def scenario():
+            queue = broker.subscribe()
+            for index in range(3):
+                broker.publish({"type": "invoice", "id": index})
+            await asyncio.sleep(0)
+            received = [queue.get_nowait() for _ in range(queue.qsize())]
+            broker.unsubscribe(queue)
+            return received
+
+        self.assertEqual(asyncio.run(scenario()), [RESYNC])
+        self.assertEqual(broker.subscriber_count, 0)
+
+    def test_wsgi_clients_are_told_to_poll(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("viewer", password="pass"))
+        response = client.get("/api/events/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)["poll_seconds"], 30)
+
+    def test_spool_carries_events_between_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = Path(tmp) / "events.jsonl"
+            writer = Broker(spool_path=spool, origin="worker-a")
+            reader = Broker(spool_path=spool, origin="worker-b")
+            writer.publish({"type": "expense", "id": 1, "amount": Decimal("5.25")})
+            events, offset = reader.read_spool(0)
+            self.assertEqual(events, [{"type": "expense", "id": 1, "amount": "5.25"}])
+            self.assertEqual(writer.read_spool(0)[0], [])  # own events are already delivered locally
+            self.assertEqual(reader.read_spool(offset), ([], offset))
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight(timeout=5)
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"total": 42}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("report", compute)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("report", compute))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"total": 42}] * 4)
+        self.assertEqual(flight.snapshot()["shared"], 3)
+        self.assertEqual(flight.snapshot()["in_flight"], 0)
+
+    def test_result_of_another_worker_is_reused(self):
+        cache.set(LEASE_KEY.format("report"), "other-worker")
+        cache.set(RESULT_KEY.format("report", "other-worker"), {"total": 7})
+        flight = SingleFlight(timeout=5)
+        self.assertEqual(flight.do("report", lambda: self.fail("computed twice")), {"total": 7})
+        self.assertEqual(flight.snapshot()["shared_remote"], 1)
+
+    def test_stuck_lease_falls_back_after_timeout(self):
+        cache.set(LEASE_KEY.format("report"), "dead-worker")
+        flight = SingleFlight(timeout=0.2, poll_interval=0.01)
+        self.assertEqual(flight.do("report", lambda: {"total": 1}), {"total": 1})
+        self.assertEqual(flight.snapshot()["timeouts"], 1)
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("staff", password="pass", is_staff=True))
+
+    def sync(self, since=None):
+        params = {} if since is None else {"since": since}
+        return json.loads(self.client.get("/api/sync/", params).content)
+
+    def test_full_then_compacted_delta_with_tombstones(self):
+        laser = Service.objects.create(name="Laser", price=10)
+        cnc = Service.objects.create(name="CNC", price=20)
+        full = self.sync()
+        self.assertTrue(full["full"])
+        self.assertEqual(full["fields"]["service"], ["id", "name", "price"])
+        self.assertEqual(len(full["changes"]["service"]), Service.objects.count())
+
+        laser.price = 11
+        laser.save()
+        laser.price = 12
+        laser.save()
+        cnc_id = cnc.pk
+        cnc.delete()
+        Expense.objects.create(title="Rent", amount=30)
+        delta = self.sync(full["cursor"])
+        self.assertFalse(delta["full"])
+        self.assertEqual(delta["changes"]["service"], [[laser.pk, "Laser", "12.00"]])
+        self.assertEqual(delta["deleted"]["service"], [cnc_id])
+        self.assertEqual(len(delta["changes"]["expense"]), 1)
+        self.assertEqual(self.sync(delta["cursor"])["changes"]["service"], [])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_full_sync_is_paged_at_one_cursor(self):
+        for n in range(3):
+            Service.objects.create(name=f"S{n}", price=n)
+        Employee.objects.create(name="Karim", role="cnc", salary=100)
+        pages = [self.sync()]
+        while pages[-1]["more"]:
+            pages.append(json.loads(self.client.get("/api/sync/", {"page": pages[-1]["next"]}).content))
+        self.assertTrue(all(page["full"] for page in pages))
+        self.assertEqual({page["cursor"] for page in pages}, {latest_cursor()})
+        self.assertTrue(all(sum(map(len, page["changes"].values())) <= 2 for page in pages))
+        rows = lambda name: [row[0] for page in pages for row in page["changes"][name]]
+        self.assertEqual(rows("service"), list(Service.objects.order_by("pk").values_list("pk", flat=True)))
+        self.assertEqual(rows("employee"), list(Employee.objects.values_list("pk", flat=True)))
+        self.assertEqual(self.client.get("/api/sync/", {"page": "1:nope:0"}).status_code, 400)
+
+    def test_entries_younger_than_the_settle_window_wait_off_sqlite(self):
+        Service.objects.create(name="CNC 2", price=10)
+        ChangeLog.objects.update(created_at="2000-01-01T00:00:00Z")
+        cursor = self.sync()["cursor"]
+        service = Service.objects.create(name="Laser", price=10)
+        with mock.patch.object(connections["default"], "vendor", "postgresql"):
+            self.assertEqual(committed_cursor(), cursor)
+            self.assertEqual(self.sync(cursor)["changes"]["service"], [])
+            ChangeLog.objects.filter(object_id=service.pk).update(created_at="2000-01-01T00:00:00Z")
+            self.assertEqual([row[0] for row in self.sync(cursor)["changes"]["service"]], [service.pk])
+
+    def test_catalog_changes_are_logged_once(self):
+        service = Service.objects.create(name="Laser", price=10)
+        entry = ChangeLog.objects.get(model="service", object_id=service.pk)
+        self.assertEqual(latest_version(), entry.pk)
+        body = json.loads(self.client.get("/api/catalog/").content)
+        self.assertEqual(body["service"][-1], [service.pk, "Laser", "10.00", entry.pk])
+
+    def test_catalog_delta_is_read_from_live_rows_and_tombstones(self):
+        catalog = lambda **params: json.loads(self.client.get("/api/catalog/", params).content)
+        laser = Service.objects.create(name="Laser", price=10)
+        cnc = Service.objects.create(name="CNC 2", price=20)
+        version = catalog()["version"]
+
+        laser.price = 11
+        laser.save()
+        cnc_id = cnc.pk
+        cnc.delete()
+        delta = catalog(since_version=version)
+        self.assertFalse(delta["full"])
+        self.assertEqual([row[:3] for row in delta["service"]], [[laser.pk, "Laser", "11.00"]])
+        self.assertEqual([row[:2] for row in delta["deleted"]], [["service", cnc_id]])
+
+        with mock.patch.object(connections["default"], "vendor", "postgresql"):
+            # Not settled yet: a lower id could still commit.
+            Service.objects.create(name="Router", price=5)
+            self.assertEqual(latest_version(), 0)
+
+        ChangeLog.objects.filter(op=ChangeLog.OP_DELETE).update(created_at="2000-01-01T00:00:00Z")
+        call_command("compact_changelog", tombstone_days=30, stdout=StringIO())
+        self.assertTrue(catalog(since_version=version)["full"])
+
+    def test_compaction_keeps_newest_entry_and_forces_resync_past_tombstones(self):
+        service = Service.objects.create(name="Laser", price=10)
+        cursor = self.sync()["cursor"]
+        service.name = "Laser 2"
+        service.save()
+        Service.objects.create(name="Old", price=1).delete()
+        ChangeLog.objects.filter(op=ChangeLog.OP_DELETE).update(created_at="2000-01-01T00:00:00Z")
+
+        out = StringIO()
+        call_command("compact_changelog", tombstone_days=30, stdout=out)
+        self.assertIn("removed 2 superseded entries and 1 tombstones", out.getvalue())
+        self.assertEqual(ChangeLog.objects.filter(model="service", object_id=service.pk).count(), 1)
+        self.assertGreater(compaction_floor(), cursor)
+        self.assertTrue(self.sync(cursor)["full"])
+
+
+@override_settings(SQLITE_PRODUCTION=True, SQLITE_BUSY_TIMEOUT_MS=100)
+class SQLiteBackendTests(SimpleTestCase):
+    """Two connections of the production backend on one WAL file."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "ENGINE": "core.backends.sqlite3",
+            "NAME": str(Path(self.tmp.name) / "db.sqlite3"),
+            "OPTIONS": {"timeout": 0.1},
+        }
+        for alias in ("first", "second"):
+            connections[alias] = SQLiteWrapper(dict(settings_dict), alias)
+            self.addCleanup(self._drop, alias)
+        with connections["first"].cursor() as cursor:
+            cursor.execute("CREATE TABLE item (n INTEGER)")
+
+    def _drop(self, alias):
+        connections[alias].close()
+        del connections[alias]
+
+    def execute(self, alias, sql):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def test_pragmas_are_applied_on_connect(self):
+        self.assertEqual(self.execute("first", "PRAGMA journal_mode"), [("wal",)])
+        self.assertEqual(self.execute("first", "PRAGMA busy_timeout"), [(100,)])
+        self.assertEqual(self.execute("first", "PRAGMA synchronous"), [(1,)])  # NORMAL
+
+    def test_plain_atomic_blocks_do_not_take_the_write_lock(self):
+        with transaction.atomic(using="first"):
+            self.execute("first", "SELECT * FROM item")
+            with write_atomic(using="second"):
+                self.execute("second", "INSERT INTO item VALUES (1)")
+        self.assertEqual(self.execute("first", "SELECT n FROM item"), [(1,)])
+
+    def test_write_atomic_takes_the_write_lock_up_front(self):
+        with write_atomic(using="first"):
+            with self.assertRaisesMessage(OperationalError, "database is locked"):
+                with write_atomic(using="second"):
+                    pass
+            # A reader is never blocked by the writer.
+            with transaction.atomic(using="second"):
+                self.assertEqual(self.execute("second", "SELECT n FROM item"), [])
+        self.assertFalse(connections["first"].begin_immediate)
+        with write_atomic(using="second"):
+            self.execute("second", "INSERT INTO item VALUES (2)")
+
+
+class BackupTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_backup_round_trip_restores_rows_dates_and_forces_resync(self):
+        service = Service.objects.create(name="CNC", price=Decimal("150.50"))
+        invoice = Invoice.objects.create(customer_name="Ahmad")
+        old = datetime(2024, 3, 1, 8, 30, tzinfo=dt_timezone.utc)
+        Invoice.objects.filter(pk=invoice.pk).update(created_at=old)
+        InvoiceItem.objects.create(invoice=invoice, service=service, quantity=2, price=Decimal("150.50"))
+
+        viewer = APIClient()
+        viewer.force_authenticate(User.objects.create_user("viewer", password="pass"))
+        self.assertEqual(viewer.get("/api/backup/").status_code, 403)
+        response = self.client.get("/api/backup/")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        backup = b"".join(response.streaming_content)
+
+        invoice_id = invoice.pk
+        invoice.delete()
+        Service.objects.create(name="Added later", price=1)
+        cursor = latest_cursor()
+        self.assertRaises(BackupError, restore, BytesIO(backup[: len(backup) // 2]))
+
+        restore(BytesIO(backup))
+        restored = Invoice.objects.get(pk=invoice_id)
+        self.assertEqual(restored.created_at, old)
+        self.assertEqual(str(restored.items.get().price), "150.50")
+        self.assertFalse(Service.objects.filter(name="Added later").exists())
+        self.assertTrue(User.objects.get(username="admin").check_password("pass"))
+        self.assertGreater(compaction_floor(), cursor)
+        self.assertGreater(Service.objects.create(name="Next", price=1).pk, service.pk)
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> (capacity, tokens refilled per second)."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period.strip().lower()]
+
+
+class LocalBucketBackend:
+    """Buckets held in this process only; each worker throttles independently."""
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._buckets.clear()
+            self._buckets[key] = (tokens, now)
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketBackend:
+    """
+    Buckets stored in a Django cache shared by all workers. Each
+    read-modify-write holds a per-key lock taken with ``cache.add`` (atomic
+    on the db, locmem and redis backends), so concurrent attempts across
+    workers cannot all spend the same token.
+    """
+
+    lock_ttl = 2  # seconds; frees the key if a worker dies holding it
+    lock_wait = 0.5
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def consume(self, key, capacity, refill_rate):
+        cache = caches[self.alias]
+        cache_key = f"throttle:{key}"
+        lock_key = f"throttle-lock:{key}"
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(lock_key, 1, timeout=self.lock_ttl):
+            if time.monotonic() >= deadline:
+                # A hot key under attack: refuse rather than skip the check.
+                return False, self.lock_wait
+            time.sleep(0.005)
+        try:
+            now = time.time()
+            tokens, stamp = cache.get(cache_key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - stamp) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Expire once the bucket would be full again anyway.
+            cache.set(cache_key, (tokens, now), timeout=int((capacity - tokens) / refill_rate) + 1)
+        finally:
+            cache.delete(lock_key)
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+    def clear(self):
+        pass
+
+
+class ThrottleMetrics:
+    def __init__(self):
+        self._counts = defaultdict(lambda: {"allowed": 0, "throttled_ip": 0, "throttled_username": 0})
+        self._lock = threading.Lock()
+
+    def incr(self, scope, outcome):
+        with self._lock:
+            self._counts[scope][outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {scope: dict(counts) for scope, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+metrics = ThrottleMetrics()
+_backends = {}
+
+
+def get_backend():
+    name = getattr(settings, "LOGIN_THROTTLE_BACKEND", "local")
+    if name not in _backends:
+        _backends[name] = CacheBucketBackend() if name == "cache" else LocalBucketBackend()
+    return _backends[name]
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Token bucket per client IP and per submitted username. Runs in
+    ``APIView.initial()``, i.e. before the view validates any password.
+    """
+
+    scope = "login"
+
+    def allow_request(self, request, view):
+        rates = getattr(settings, "LOGIN_THROTTLE_RATES", {})
+        rate = rates.get(self.scope)
+        if not rate:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        backend = get_backend()
+        self.wait_seconds = 0
+
+        allowed, wait = backend.consume(f"{self.scope}:ip:{self.get_ident(request)}", capacity, refill_rate)
+        if not allowed:
+            return self._deny("throttled_ip", wait)
+
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        if username:
+            key = f"{self.scope}:user:{str(username).strip().lower()}"
+            allowed, wait = backend.consume(key, capacity, refill_rate)
+            if not allowed:
+                return self._deny("throttled_username", wait)
+
+        metrics.incr(self.scope, "allowed")
+        return True
+
+    def get_ident(self, request):
+        # DRF trusts any client-sent X-Forwarded-For unless NUM_PROXIES is set;
+        # a bucket a client can rename at will throttles nothing.
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
+
+    def _deny(self, outcome, wait):
+        metrics.incr(self.scope, outcome)
+        self.wait_seconds = wait
+        return False
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class ResetPasswordRateThrottle(LoginRateThrottle):
+    scope = "reset_password"
+
+
+class RegisterRateThrottle(LoginRateThrottle):
+    scope = "register"
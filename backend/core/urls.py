@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, ChangePasswordView, CompanySettingView, ProjectViewSet, ServiceViewSet, CurrentUserView, EmployeeViewSet, ResetPasswordView, UserProfileView
+from .views import UserViewSet, ChangePasswordView, CompanySettingView, ProjectViewSet, ServiceViewSet, CurrentUserView, EmployeeViewSet, ResetPasswordView, UserProfileView, ThrottleMetricsView, RequestMetricsView, ResponseCacheMetricsView, SingleFlightMetricsView, CatalogSnapshotView, BatchView, EventMetricsView, SyncView, BackupView, ProfileListView, ProfileDownloadView, event_stream
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
@@ -14,5 +14,17 @@ urlpatterns = [
     path("users/change-password/", ChangePasswordView.as_view(), name="change-password"),
     path("users/reset-password/", ResetPasswordView.as_view(), name="reset-password"),
     path("settings/company/", CompanySettingView.as_view(), name="company-settings"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("backup/", BackupView.as_view(), name="backup"),
+    path("profiles/", ProfileListView.as_view(), name="profile-list"),
+    path("profiles/<str:profile_id>/", ProfileDownloadView.as_view(), name="profile-download"),
+    path("catalog/", CatalogSnapshotView.as_view(), name="catalog-snapshot"),
+    path("events/", event_stream, name="event-stream"),
+    path("metrics/events/", EventMetricsView.as_view(), name="event-metrics"),
+    path("metrics/requests/", RequestMetricsView.as_view(), name="request-metrics"),
+    path("metrics/cache/", ResponseCacheMetricsView.as_view(), name="response-cache-metrics"),
+    path("metrics/singleflight/", SingleFlightMetricsView.as_view(), name="single-flight-metrics"),
+    path("metrics/throttle/", ThrottleMetricsView.as_view(), name="throttle-metrics"),
     path("", include(router.urls)),
 ]
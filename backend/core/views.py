@@ -1,9 +1,17 @@
-from rest_framework import generics, viewsets, status
+import asyncio
+
+from rest_framework import generics, viewsets, status, filters
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.utils import timezone
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 
 from .serializers import (
     UserListSerializer,
@@ -13,6 +21,8 @@ from .serializers import (
     CompanySettingSerializer,
     ProjectSerializer,
     ServiceSerializer,
+    ServicePriceSerializer,
+    ServiceRepriceSerializer,
     EmployeeSerializer,
     CurrentUserSerializer,
     ResetPasswordSerializer,
@@ -20,11 +30,27 @@ from .serializers import (
 )
 from .models import Project, CompanySetting, Service, Employee, UserProfile
 from .permissions import IsAdminOrReadOnly
+from .authentication import get_db_user
+from .changefeed import compaction_floor, parse_page, sync_payload
+from .catalog import delta_payload, get_snapshot, render as render_catalog
+from .middleware import SerializerTimingMixin, all_routes, route_metrics
+from .throttling import ResetPasswordRateThrottle, metrics as throttle_metrics
+from .provisioning import parse_rows, provision_users
+from .events import broker, encode as encode_event
+from .batch import BatchError, parse_items, run_batch
+from .backup import compressions, export_chunks
+from .async_views import async_api_view, render
+from . import pricing
+from .profiling import list_profiles, profile_file
+from .response_cache import CachedResponseMixin, metrics as response_cache_metrics
+from .singleflight import flights
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("-date_joined")
     permission_classes = [IsAuthenticated]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["username", "email"]
 
     def get_serializer_class(self):
         if self.action in ["create"]:
@@ -33,23 +59,61 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserUpdateSerializer
         return UserListSerializer
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        permission_classes=[IsAuthenticated, IsAdminUser],
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def bulk(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "فایل CSV ارسال نشده است."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = parse_rows(upload.read().decode("utf-8-sig"))
+        except UnicodeDecodeError:
+            return Response({"detail": "فایل باید با کدگذاری UTF-8 باشد."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as exc:
+            return Response({"detail": exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            created, errors = provision_users(rows)
+        except IntegrityError:
+            return Response(
+                {"detail": "برخی نام‌های کاربری هم‌زمان ثبت شده‌اند. دوباره تلاش کنید."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            {
+                "created": len(created),
+                "users": UserListSerializer(created, many=True).data,
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
 
 class ChangePasswordView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChangePasswordSerializer
 
     def post(self, request):
-        serializer = self.get_serializer(data=request.data, context={"request": request})
+        user = get_db_user(request.user)
+        serializer = self.get_serializer(data=request.data, context={"request": request, "user": user})
         serializer.is_valid(raise_exception=True)
-        user = request.user
         user.set_password(serializer.validated_data["new_password"])
         user.save()
         return Response({"detail": "رمز عبور با موفقیت تغییر کرد"}, status=status.HTTP_200_OK)
 
 
 class ResetPasswordView(generics.GenericAPIView):
+    # No authentication: DRF authenticates before throttling, and Basic auth
+    # would hash a password before the bucket could refuse the request.
+    authentication_classes = []
     permission_classes = []
     serializer_class = ResetPasswordSerializer
+    throttle_classes = [ResetPasswordRateThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -81,18 +145,19 @@ class UserProfileView(generics.GenericAPIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def get(self, request):
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile, _ = UserProfile.objects.get_or_create(user_id=request.user.pk)
         return Response(self.serializer_class(profile).data)
 
     def patch(self, request):
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile, _ = UserProfile.objects.get_or_create(user_id=request.user.pk)
         serializer = self.get_serializer(profile, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
 
 
-class CompanySettingView(generics.GenericAPIView):
+class CompanySettingView(CachedResponseMixin, generics.GenericAPIView):
+    cache_tags = ("company_setting",)
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
     serializer_class = CompanySettingSerializer
 
@@ -115,19 +180,216 @@ class CompanySettingView(generics.GenericAPIView):
         return Response(serializer.data)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SerializerTimingMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_tags = ("project",)
     queryset = Project.objects.all().order_by("-created_at")
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(SerializerTimingMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_tags = ("service",)
     queryset = Service.objects.all().order_by("-created_at")
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["name"]
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminUser])
+    def reprice(self, request):
+        serializer = ServiceRepriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changed = pricing.reprice(
+            serializer.services(),
+            percent=serializer.validated_data.get("percent"),
+            amount=serializer.validated_data.get("amount"),
+        )
+        return Response({
+            "updated": len(changed),
+            "services": [
+                {"id": service.pk, "name": service.name, "old_price": old_price, "price": service.price}
+                for service, old_price in changed
+            ],
+        })
+
+    @action(detail=True, methods=["get"], pagination_class=None)
+    def prices(self, request, pk=None):
+        """Price history of one service, newest first."""
+        history = self.get_object().prices.order_by("-effective_from", "-id")
+        return Response(ServicePriceSerializer(history, many=True).data)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(SerializerTimingMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_tags = ("employee",)
     queryset = Employee.objects.all().order_by("-created_at")
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+
+class ThrottleMetricsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "backend": getattr(settings, "LOGIN_THROTTLE_BACKEND", "local"),
+            "rates": getattr(settings, "LOGIN_THROTTLE_RATES", {}),
+            "counters": throttle_metrics.snapshot(),
+        })
+
+
+class RequestMetricsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "enabled": getattr(settings, "REQUEST_INSTRUMENTATION", False),
+            "routes": route_metrics.summary(all_routes()),
+        })
+
+
+class ResponseCacheMetricsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "timeout": getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+            "backend": settings.CACHES[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]["BACKEND"],
+            "counters": response_cache_metrics.snapshot(),
+        })
+
+
+class SingleFlightMetricsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(flights.snapshot())
+
+
+class BatchView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            items = parse_items(request.data)
+        except BatchError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        parallel = request.data.get("parallel") is True
+        return Response({"responses": run_batch(request, items, parallel=parallel)})
+
+
+class BackupView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        compression = request.query_params.get("compression", "gzip")
+        if compression not in compressions():
+            return Response({"detail": "فشرده‌سازی پشتیبانی نمی‌شود."}, status=status.HTTP_400_BAD_REQUEST)
+        suffix = "gz" if compression == "gzip" else "zst"
+        response = StreamingHttpResponse(export_chunks(compression), content_type=f"application/{compression}")
+        response["Content-Disposition"] = f"attachment; filename=backup-{timezone.localtime():%Y%m%d-%H%M%S}.jsonl.{suffix}"
+        return response
+
+
+class ProfileListView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDownloadView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, profile_id):
+        found = profile_file(profile_id)
+        if found is None:
+            return Response({"detail": "پروفایل یافت نشد."}, status=status.HTTP_404_NOT_FOUND)
+        path, content_type = found
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name, content_type=content_type)
+
+
+class EventMetricsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(broker.snapshot())
+
+
+@async_api_view
+async def event_stream(request):
+    """
+    Server-sent events with dashboard deltas. Only under ASGI: a WSGI worker
+    would try to drain the endless stream and be held forever, so there the
+    client is told to poll instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return render(
+            {
+                "detail": "رویدادهای زنده فقط روی سرور ASGI در دسترس است.",
+                "poll_seconds": getattr(settings, "EVENTS_POLL_SECONDS", 30),
+            },
+            status=503,
+        )
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT_SECONDS", 15)
+
+    async def frames():
+        queue = broker.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield encode_event(event)
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(frames(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class SyncView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since not in (None, ""):
+            try:
+                since = int(since)
+            except ValueError:
+                return Response({"detail": "since باید عدد باشد."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            since = None
+        # Further pages of a full sync: the "next" token of the previous page.
+        page = request.query_params.get("page") or None
+        if page is not None:
+            try:
+                parse_page(page)
+            except ValueError:
+                return Response({"detail": "page نامعتبر است."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(sync_payload(since, page))
+
+
+class CatalogSnapshotView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        snapshot, full = get_snapshot()
+        etag = f'"catalog-{snapshot["version"]}"'
+        since = request.query_params.get("since_version")
+        if since in (None, ""):
+            if request.headers.get("If-None-Match") == etag:
+                return HttpResponseNotModified(headers={"ETag": etag})
+            body = full
+        else:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response({"detail": "since_version باید عدد باشد."}, status=status.HTTP_400_BAD_REQUEST)
+            # Below the compaction floor the tombstones a delta needs may be gone.
+            body = full if since < compaction_floor() else render_catalog(delta_payload(snapshot, since))
+        return HttpResponse(body, content_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,33 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core.events import broker
+from .models import Expense
+
+
+def _expense_saved(sender, instance, created, **kwargs):
+    if not broker.has_listeners():
+        return
+    event = {
+        "type": "expense",
+        "id": instance.pk,
+        "created": created,
+        "title": instance.title,
+        "category": instance.category,
+        "amount": instance.amount,
+        "date": instance.date,
+    }
+    transaction.on_commit(partial(broker.publish, event))
+
+
+def _expense_deleted(sender, instance, **kwargs):
+    if not broker.has_listeners():
+        return
+    transaction.on_commit(partial(broker.publish, {"type": "expense_deleted", "id": instance.pk}))
+
+
+def connect_signals():
+    post_save.connect(_expense_saved, sender=Expense, dispatch_uid="finance.events.saved")
+    post_delete.connect(_expense_deleted, sender=Expense, dispatch_uid="finance.events.deleted")
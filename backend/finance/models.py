@@ -7,5 +7,9 @@ class Expense(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateField(auto_now_add=True)
 
+    class Meta:
+        # Serves date-range filters and the (-date, -id) listing order.
+        indexes = [models.Index(fields=["date", "id"], name="finance_expense_date_idx")]
+
     def __str__(self):
         return f"{self.title} - {self.amount}"
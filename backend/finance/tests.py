@@ -1,3 +1,124 @@
-from django.test import TestCase
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.jwt import CustomTokenObtainPairSerializer
+from core.filters import date_range_q
+from core.models import Employee, Service
+from invoices.models import Invoice, InvoiceItem
+from .models import Expense
+
+
+def seed_report_data(test):
+    test.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+    service = Service.objects.create(name="PVC test", price=50)
+    invoice = Invoice.objects.create(customer_name="Karim")
+    InvoiceItem.objects.create(invoice=invoice, service=service, quantity=4, price=50)
+    Expense.objects.create(title="Rent", amount=30)
+    Employee.objects.create(name="Nasir", salary=20)
+
+
+class FinanceReportTests(TestCase):
+    def setUp(self):
+        seed_report_data(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_report_totals(self):
+        report = self.client.get("/api/finance/report/").data
+        self.assertEqual(report["total_sales"], 200)
+        self.assertEqual(report["total_expenses"], 30)
+        self.assertEqual(report["profit"], 150)
+        self.assertEqual(report["total_invoices"], 1)
+        self.assertEqual(report["top_products"][0]["service__name"], "PVC test")
+
+    def test_report_range_excludes_other_days(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        report = self.client.get("/api/finance/report/", {"start": tomorrow, "end": tomorrow}).data
+        self.assertEqual(report["total_sales"], 0)
+        self.assertEqual(report["total_invoices"], 0)
+
+    def test_monthly_has_twelve_months(self):
+        self.assertEqual(len(self.client.get("/api/finance/monthly/").data), 12)
+
+    def test_monthly_ends_at_the_kabul_month(self):
+        # 20:00 UTC on March 31st is already April 1st in Kabul.
+        moment = datetime(2026, 3, 31, 20, 0, tzinfo=dt_timezone.utc)
+        Invoice.objects.update(created_at=moment)
+        with mock.patch("django.utils.timezone.now", return_value=moment):
+            months = self.client.get("/api/finance/monthly/").data
+        self.assertEqual((months[-1]["label"], months[-1]["income"]), ("2026/04", 200))
+
+    def test_range_follows_kabul_days(self):
+        # 20:00 UTC on the 10th is 00:30 on the 11th in Kabul (UTC+4:30).
+        Invoice.objects.update(created_at=datetime(2026, 3, 10, 20, 0, tzinfo=dt_timezone.utc))
+        Expense.objects.update(date=date(2026, 3, 11))
+        day = {"start": "2026-03-11", "end": "2026-03-11"}
+        report = self.client.get("/api/finance/report/", day).data
+        self.assertEqual((report["total_sales"], report["total_expenses"]), (200, 30))
+        self.assertEqual(self.client.get("/api/finance/report/", {"end": "2026-03-10"}).data["total_sales"], 0)
+        self.assertEqual(len(self.client.get("/api/invoices/", day).data["results"]), 1)
+        self.assertEqual(len(self.client.get("/api/invoices/", {"start": "2026-03-12"}).data["results"]), 0)
+        self.assertEqual(len(self.client.get("/api/finance/expenses/", day).data["results"]), 1)
+        self.assertEqual(self.client.get("/api/invoices/", {"start": "11-03-2026"}).status_code, 400)
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Tiny test tables are cheaper to scan; ask whether an index path exists at all.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+@unittest.skipUnless(connection.vendor in ("sqlite", "postgresql"), "EXPLAIN format is backend specific")
+class DateRangeIndexTests(TestCase):
+    day = date(2026, 3, 11)
+
+    def test_invoice_range_uses_created_index(self):
+        invoices = Invoice.objects.filter(date_range_q(Invoice, "created_at", self.day, self.day))
+        self.assertIn("invoices_created_idx", query_plan(invoices))
+        items = InvoiceItem.objects.filter(date_range_q(InvoiceItem, "invoice__created_at", self.day, self.day))
+        self.assertIn("invoices_created_idx", query_plan(items))
+        # The old ``__date`` lookup wraps the column and cannot use it.
+        self.assertNotIn("invoices_created_idx", query_plan(Invoice.objects.filter(created_at__date=self.day)))
+
+    def test_expense_range_uses_date_index(self):
+        expenses = Expense.objects.filter(date_range_q(Expense, "date", self.day, None)).order_by("-date", "-id")
+        self.assertIn("finance_expense_date_idx", query_plan(expenses))
+
+
+class AsyncReportTests(TransactionTestCase):
+    # Committed rows, so gather_sync takes the concurrent pool-thread path.
+    def setUp(self):
+        seed_report_data(self)
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_async_report_matches_sync(self):
+        sync = self.client.get("/api/finance/report/").json()
+        response = self.client.get("/api/finance/report/async/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync)
+
+    def test_async_summary_matches_sync(self):
+        sync = self.client.get("/api/invoices/summary/").json()
+        self.assertEqual(self.client.get("/api/invoices/summary/async/").json(), sync)
+
+    def test_async_monthly_matches_sync(self):
+        sync = self.client.get("/api/finance/monthly/").json()
+        self.assertTrue(any(float(month["income"]) and float(month["expense"]) for month in sync))
+        self.assertEqual(self.client.get("/api/finance/monthly/async/").json(), sync)
+
+    def test_async_report_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/finance/report/async/").status_code, 401)
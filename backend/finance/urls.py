@@ -1,6 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import finance_report, finance_monthly, finance_report_pdf, ExpenseViewSet
+from .views import (
+    finance_report,
+    finance_monthly,
+    finance_monthly_async,
+    finance_report_pdf,
+    finance_report_async,
+    finance_report_pdf_async,
+    ExpenseViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"expenses", ExpenseViewSet, basename="expense")
@@ -8,6 +16,9 @@ router.register(r"expenses", ExpenseViewSet, basename="expense")
 urlpatterns = [
     path("finance/report/", finance_report, name="finance-report"),
     path("finance/report/pdf/", finance_report_pdf, name="finance-report-pdf"),
+    path("finance/report/async/", finance_report_async, name="finance-report-async"),
+    path("finance/report/pdf/async/", finance_report_pdf_async, name="finance-report-pdf-async"),
     path("finance/monthly/", finance_monthly, name="finance-monthly"),
+    path("finance/monthly/async/", finance_monthly_async, name="finance-monthly-async"),
     path("finance/", include(router.urls)),
 ]
@@ -1,4 +1,5 @@
 from datetime import date
+from decimal import Decimal
 from django.utils import timezone
 from django.db.models import Sum, F
 from django.db.models.functions import TruncMonth
@@ -7,41 +8,42 @@ from rest_framework.response import Response
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
-from invoices.models import InvoiceItem
+from invoices.models import DailyInvoiceRollup, DailySalesRollup, InvoiceItem
+from invoices.summary import CENTS
 from core.models import Employee
 from .models import Expense
 from .serializers import ExpenseSerializer
 from core.permissions import IsAdminOrReadOnly
+from core.middleware import SerializerTimingMixin
+from core.db_router import reporting_reads
+from core.filters import DateRangeFilter, date_range_q, parse_day
+from core.async_views import async_api_view, gather_sync, offload, render
+from core.singleflight import flights, request_key
 from django.http import HttpResponse
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = Expense.objects.all().order_by("-date", "-id")
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
-
-    def get_queryset(self):
-        qs = super().get_queryset()
-        start = self.request.query_params.get("start")
-        end = self.request.query_params.get("end")
-        if start:
-            qs = qs.filter(date__gte=start)
-        if end:
-            qs = qs.filter(date__lte=end)
-        return qs
+    filter_backends = [DateRangeFilter]
+    date_range_field = "date"
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@reporting_reads
 def finance_report(request):
     start = request.query_params.get("start")
     end = request.query_params.get("end")
-    report = _compute_report(start, end)
+    # The morning rush asks for the same report at once; compute it once.
+    report = flights.do(request_key(request), lambda: _compute_report(start, end))
     return Response(report)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@reporting_reads
 def finance_report_pdf(request):
     try:
         from weasyprint import HTML
@@ -54,6 +56,144 @@ def finance_report_pdf(request):
     end = request.query_params.get("end")
     report = _compute_report(start, end)
 
+    html = _render_report_html(report, start, end)
+    pdf = HTML(string=html).write_pdf()
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = "attachment; filename=finance-report.pdf"
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@reporting_reads
+def finance_monthly(request):
+    return Response(flights.do(request_key(request), _compute_monthly))
+
+
+def _month_key(value):
+    if not value:
+        return None
+    return value.date() if hasattr(value, "date") else value
+
+
+def _totals_by_month(qs, field, total):
+    return {
+        _month_key(item["month"]): item["total"]
+        for item in qs.annotate(month=TruncMonth(field)).values("month").annotate(total=total)
+        if item["month"]
+    }
+
+
+def _monthly_parts():
+    # The independent per-month aggregates of the chart, run in sequence or concurrently.
+    return {
+        "income": lambda: _totals_by_month(InvoiceItem.objects, "invoice__created_at", Sum(F("quantity") * F("price"))),
+        "archived_income": lambda: _totals_by_month(DailySalesRollup.objects, "day", Sum("gross")),
+        "expense": lambda: _totals_by_month(Expense.objects, "date", Sum("amount")),
+    }
+
+
+def _assemble_monthly(parts):
+    today = timezone.localdate()
+    start_month = date(today.year, today.month, 1)
+
+    income_by_month = dict(parts["income"])
+    for key, total in parts["archived_income"].items():
+        income_by_month[key] = (income_by_month.get(key) or 0) + total
+    expense_by_month = parts["expense"]
+
+    def month_shift(dt, months):
+        year = dt.year + (dt.month - 1 + months) // 12
+        month = (dt.month - 1 + months) % 12 + 1
+        return date(year, month, 1)
+
+    months = [month_shift(start_month, -i) for i in range(11, -1, -1)]
+    payload = []
+    for m in months:
+        payload.append({
+            "label": f"{m.year}/{m.month:02d}",
+            "income": income_by_month.get(m, 0) or 0,
+            "expense": expense_by_month.get(m, 0) or 0,
+        })
+
+    return payload
+
+
+def _compute_monthly():
+    return _assemble_monthly({name: run() for name, run in _monthly_parts().items()})
+
+
+def _report_querysets(start, end):
+    items = InvoiceItem.objects.all()
+    expenses_qs = Expense.objects.all()
+    employees_qs = Employee.objects.all()
+    # Archived fiscal years only survive as daily rollups.
+    sales_rollups = DailySalesRollup.objects.all()
+    invoice_rollups = DailyInvoiceRollup.objects.all()
+
+    start, end = parse_day(start, "start"), parse_day(end, "end")
+    if start or end:
+        items = items.filter(date_range_q(InvoiceItem, "invoice__created_at", start, end))
+        expenses_qs = expenses_qs.filter(date_range_q(Expense, "date", start, end))
+        sales_rollups = sales_rollups.filter(date_range_q(DailySalesRollup, "day", start, end))
+        invoice_rollups = invoice_rollups.filter(date_range_q(DailyInvoiceRollup, "day", start, end))
+
+    return items, expenses_qs, employees_qs, sales_rollups, invoice_rollups
+
+
+def _cents(value):
+    # SQLite sums decimals as floats; round so live + rollup totals match the unarchived figure.
+    return Decimal(value).quantize(CENTS)
+
+
+def _top_products(items, sales_rollups, limit=5):
+    # Grouped by service id: a renamed service stays one entry, under its current name.
+    totals = {}
+    for qs in (items, sales_rollups):
+        for row in qs.values("service", "service__name").annotate(total_qty=Sum("quantity")).order_by():
+            entry = totals.setdefault(row["service"], {"service__name": row["service__name"], "total_qty": 0})
+            entry["total_qty"] += row["total_qty"]
+    return sorted(totals.values(), key=lambda entry: -entry["total_qty"])[:limit]
+
+
+def _report_parts(start, end):
+    # The independent aggregates of a report, run in sequence or concurrently.
+    items, expenses_qs, employees_qs, sales_rollups, invoice_rollups = _report_querysets(start, end)
+    return {
+        "total_sales": lambda: _cents(
+            (items.aggregate(total=Sum(F("quantity") * F("price")))["total"] or 0)
+            + (sales_rollups.aggregate(total=Sum("gross"))["total"] or 0)
+        ),
+        "total_invoices": lambda: (
+            items.values("invoice").distinct().count()
+            + (invoice_rollups.aggregate(total=Sum("invoice_count"))["total"] or 0)
+        ),
+        "total_expenses": lambda: expenses_qs.aggregate(total=Sum("amount"))["total"] or 0,
+        "total_salaries": lambda: employees_qs.aggregate(total=Sum("salary"))["total"] or 0,
+        "top_products": lambda: _top_products(items, sales_rollups),
+    }
+
+
+def _assemble_report(parts):
+    return {
+        "total_sales": parts["total_sales"],
+        "total_expenses": parts["total_expenses"],
+        "total_salaries": parts["total_salaries"],
+        "profit": parts["total_sales"] - parts["total_expenses"] - parts["total_salaries"],
+        "total_invoices": parts["total_invoices"],
+        "top_products": parts["top_products"],
+    }
+
+
+def _compute_report(start, end):
+    return _assemble_report({name: run() for name, run in _report_parts(start, end).items()})
+
+
+async def _acompute_report(start, end):
+    return _assemble_report(await gather_sync(_report_parts(start, end)))
+
+
+def _render_report_html(report, start, end):
     date_range = "همه تاریخ‌ها"
     if start and end:
         date_range = f"{start} تا {end}"
@@ -62,7 +202,7 @@ def finance_report_pdf(request):
     elif end:
         date_range = f"تا {end}"
 
-    html = f"""
+    return f"""
     <html dir="rtl" lang="fa">
       <head>
         <meta charset="utf-8"/>
@@ -106,95 +246,35 @@ def finance_report_pdf(request):
     </html>
     """
 
-    pdf = HTML(string=html).write_pdf()
-    response = HttpResponse(pdf, content_type="application/pdf")
-    response["Content-Disposition"] = "attachment; filename=finance-report.pdf"
-    return response
-
-
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def finance_monthly(request):
-    today = timezone.now().date()
-    start_month = date(today.year, today.month, 1)
-
-    def month_key(value):
-        if not value:
-            return None
-        return value.date() if hasattr(value, "date") else value
-
-    income_by_month = {
-        month_key(item["month"]): item["total"]
-        for item in (
-            InvoiceItem.objects
-            .annotate(month=TruncMonth("invoice__created_at"))
-            .values("month")
-            .annotate(total=Sum(F("quantity") * F("price")))
-        )
-        if item["month"]
-    }
-
-    expense_by_month = {
-        month_key(item["month"]): item["total"]
-        for item in (
-            Expense.objects
-            .annotate(month=TruncMonth("date"))
-            .values("month")
-            .annotate(total=Sum("amount"))
-        )
-        if item["month"]
-    }
-
-    def month_shift(dt, months):
-        year = dt.year + (dt.month - 1 + months) // 12
-        month = (dt.month - 1 + months) % 12 + 1
-        return date(year, month, 1)
 
-    months = [month_shift(start_month, -i) for i in range(11, -1, -1)]
-    payload = []
-    for m in months:
-        payload.append({
-            "label": f"{m.year}/{m.month:02d}",
-            "income": income_by_month.get(m, 0) or 0,
-            "expense": expense_by_month.get(m, 0) or 0,
-        })
+@async_api_view
+@reporting_reads
+async def finance_report_async(request):
+    report = await _acompute_report(request.GET.get("start"), request.GET.get("end"))
+    return render(report)
 
-    return Response(payload)
 
+@async_api_view
+@reporting_reads
+async def finance_monthly_async(request):
+    return render(_assemble_monthly(await gather_sync(_monthly_parts())))
 
-def _compute_report(start, end):
-    items = InvoiceItem.objects.all()
-    expenses_qs = Expense.objects.all()
-    employees_qs = Employee.objects.all()
 
-    if start:
-        items = items.filter(invoice__created_at__date__gte=start)
-        expenses_qs = expenses_qs.filter(date__gte=start)
-    if end:
-        items = items.filter(invoice__created_at__date__lte=end)
-        expenses_qs = expenses_qs.filter(date__lte=end)
-
-    total_sales = items.aggregate(
-        total=Sum(F("quantity") * F("price"))
-    )["total"] or 0
-
-    total_invoices = items.values("invoice").distinct().count()
-    total_expenses = expenses_qs.aggregate(total=Sum("amount"))["total"] or 0
-    total_salaries = employees_qs.aggregate(total=Sum("salary"))["total"] or 0
-    profit = total_sales - total_expenses - total_salaries
-
-    top_products = (
-        items
-        .values("service__name")
-        .annotate(total_qty=Sum("quantity"))
-        .order_by("-total_qty")[:5]
-    )
-
-    return {
-        "total_sales": total_sales,
-        "total_expenses": total_expenses,
-        "total_salaries": total_salaries,
-        "profit": profit,
-        "total_invoices": total_invoices,
-        "top_products": list(top_products),
-    }
+@async_api_view
+@reporting_reads
+async def finance_report_pdf_async(request):
+    try:
+        from weasyprint import HTML
+    except Exception:
+        return render(
+            {"detail": "کتابخانه‌های سیستمی WeasyPrint نصب نیستند. نصب کامل WeasyPrint لازم است."},
+            status=500,
+        )
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    report = await _acompute_report(start, end)
+    html = _render_report_html(report, start, end)
+    pdf = await offload(lambda: HTML(string=html).write_pdf())
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = "attachment; filename=finance-report.pdf"
+    return response
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 class InvoicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'invoices'
+
+    def ready(self):
+        from core import response_cache
+        from .events import connect_signals
+        from .models import ServiceDailyStat
+
+        connect_signals()
+        response_cache.connect_signals({"service_stat": ServiceDailyStat})
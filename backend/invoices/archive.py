@@ -0,0 +1,144 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.bulk import explicit_timestamps
+from core.changefeed import record_changes
+from core.sqlite import write_atomic
+from . import events
+from .models import (
+    ArchivedInvoice,
+    ArchivedInvoiceItem,
+    DailyInvoiceRollup,
+    DailySalesRollup,
+    Invoice,
+    InvoiceItem,
+)
+
+INVOICE_FIELDS = ["id", "customer_id", "customer_name", "created_at", "amount_paid", "balance_due"]
+ITEM_FIELDS = ["id", "invoice_id", "service_id", "product_id", "quantity", "price", "discount"]
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def _start_month():
+    return getattr(settings, "FISCAL_YEAR_START_MONTH", 1)
+
+
+def fiscal_year_dates(year):
+    """First day of fiscal ``year`` and of the year after it."""
+    month = _start_month()
+    return date(year, month, 1), date(year + 1, month, 1)
+
+
+def fiscal_year_bounds(year):
+    start, end = fiscal_year_dates(year)
+    return (
+        timezone.make_aware(datetime.combine(start, datetime.min.time())),
+        timezone.make_aware(datetime.combine(end, datetime.min.time())),
+    )
+
+
+def current_fiscal_year():
+    today = timezone.localdate()
+    return today.year if today.month >= _start_month() else today.year - 1
+
+
+def _chunks(ids, size):
+    for index in range(0, len(ids), size):
+        yield ids[index:index + size]
+
+
+def _delete_rollups(year):
+    start, end = fiscal_year_dates(year)
+    DailySalesRollup.objects.filter(day__gte=start, day__lt=end).delete()
+    DailyInvoiceRollup.objects.filter(day__gte=start, day__lt=end).delete()
+
+
+def rebuild_rollups(year):
+    """Recompute the year's daily rollups from its archived invoices."""
+    _delete_rollups(year)
+    sales = (
+        ArchivedInvoiceItem.objects.filter(invoice__fiscal_year=year)
+        .annotate(day=TruncDate("invoice__created_at"))
+        .values("day", "service")
+        .annotate(qty=Sum("quantity"), gross_total=Sum(F("quantity") * F("price")), discount_total=Sum("discount"))
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(
+            day=row["day"], service_id=row["service"], quantity=row["qty"],
+            gross=row["gross_total"], discount=row["discount_total"],
+        )
+        for row in sales
+    ])
+    counts = (
+        ArchivedInvoice.objects.filter(fiscal_year=year)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(invoices=Count("id"))
+        .order_by()
+    )
+    DailyInvoiceRollup.objects.bulk_create([
+        DailyInvoiceRollup(day=row["day"], invoice_count=row["invoices"]) for row in counts
+    ])
+
+
+def archive_year(year, batch_size=1000):
+    """
+    Move the invoices of a closed fiscal year into the archive tables and
+    leave daily rollups behind. Stock is not touched: archived sales stay sold.
+    Returns the number of invoices moved.
+    """
+    if year >= current_fiscal_year():
+        raise ArchiveError(f"سال مالی {year} هنوز بسته نشده است.")
+    start, end = fiscal_year_bounds(year)
+    if Invoice.objects.filter(created_at__gte=start, created_at__lt=end, balance_due__gt=0).exists():
+        raise ArchiveError(f"سال مالی {year} فاکتورهای تسویه‌نشده دارد.")
+    with events.suppressed(), write_atomic():
+        ids = list(
+            Invoice.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by("pk").values_list("pk", flat=True)
+        )
+        for chunk in _chunks(ids, batch_size):
+            ArchivedInvoice.objects.bulk_create([
+                ArchivedInvoice(fiscal_year=year, **dict(zip(INVOICE_FIELDS, row)))
+                for row in Invoice.objects.filter(pk__in=chunk).values_list(*INVOICE_FIELDS)
+            ])
+            items = InvoiceItem.objects.filter(invoice_id__in=chunk)
+            ArchivedInvoiceItem.objects.bulk_create([
+                ArchivedInvoiceItem(**dict(zip(ITEM_FIELDS, row))) for row in items.values_list(*ITEM_FIELDS)
+            ])
+            items.delete()
+            Invoice.objects.filter(pk__in=chunk).delete()
+        rebuild_rollups(year)
+    return len(ids)
+
+
+def restore_year(year, batch_size=1000):
+    """Move an archived fiscal year back into the live tables. Returns the invoice count."""
+    created_at = Invoice._meta.get_field("created_at")
+    with events.suppressed(), write_atomic(), explicit_timestamps(created_at):
+        ids = list(
+            ArchivedInvoice.objects.filter(fiscal_year=year).order_by("pk").values_list("pk", flat=True)
+        )
+        for chunk in _chunks(ids, batch_size):
+            Invoice.objects.bulk_create([
+                Invoice(**dict(zip(INVOICE_FIELDS, row)))
+                for row in ArchivedInvoice.objects.filter(pk__in=chunk).values_list(*INVOICE_FIELDS)
+            ])
+            items = ArchivedInvoiceItem.objects.filter(invoice_id__in=chunk)
+            rows = list(items.values_list(*ITEM_FIELDS))
+            InvoiceItem.objects.bulk_create([InvoiceItem(**dict(zip(ITEM_FIELDS, row))) for row in rows])
+            # bulk_create skips the change-feed signals.
+            record_changes("invoice", chunk)
+            record_changes("invoice_item", [row[0] for row in rows])
+            items.delete()
+            ArchivedInvoice.objects.filter(pk__in=chunk).delete()
+        _delete_rollups(year)
+    return len(ids)
@@ -0,0 +1,105 @@
+import re
+import unicodedata
+
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ArchivedInvoice, ArchivedInvoiceItem, Customer, Invoice, InvoiceItem
+from .summary import line_total
+
+# Arabic letter forms typed on Arabic keyboards, and joiners that split one word.
+_LETTERS = str.maketrans({"ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "ة": "ه", "‌": " ", "‍": "", "‏": ""})
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+_MARKS = re.compile(r"[ً-ٰٟـ]")  # harakat and tatweel
+
+
+def normalize_name(name):
+    text = unicodedata.normalize("NFKC", name or "").translate(_LETTERS).translate(_DIGITS)
+    return " ".join(_MARKS.sub("", text).casefold().split())
+
+
+def normalize_phone(phone):
+    digits = re.sub(r"\D", "", (phone or "").translate(_DIGITS))
+    if digits.startswith("0093"):
+        digits = "0" + digits[4:]
+    elif digits.startswith("93") and len(digits) == 11:
+        digits = "0" + digits[2:]
+    return digits
+
+
+def resolve(name, phone=""):
+    """The customer a typed name refers to, created on first use."""
+    phone = normalize_phone(phone)
+    customer, created = Customer.objects.get_or_create(
+        normalized_name=normalize_name(name),
+        defaults={"name": " ".join(name.split()), "phone": phone},
+    )
+    if phone and not created and not customer.phone:
+        customer.phone = phone
+        customer.save(update_fields=["phone"])
+    return customer
+
+
+def apply(customer_id, amount, count, at=None, balance=0):
+    """Add ``amount``, ``count`` and ``balance`` (negative to subtract) to a customer's totals."""
+    if customer_id is None:
+        return
+    updates = {
+        "total_billed": F("total_billed") + amount,
+        "invoice_count": F("invoice_count") + count,
+        "balance_due": F("balance_due") + balance,
+    }
+    if at is not None:
+        updates["last_invoice_at"] = Greatest(Coalesce("last_invoice_at", Value(at)), Value(at))
+    Customer.objects.filter(pk=customer_id).update(**updates)
+
+
+def invoice_added(invoice):
+    apply(invoice.customer_id, line_total(invoice.items.all()), 1, invoice.created_at, balance=invoice.balance_due)
+
+
+def invoice_removed(customer_id, total, balance):
+    """Subtract a deleted (or reassigned) invoice; the latest date may have been that invoice."""
+    if customer_id is None:
+        return
+    apply(customer_id, -total, -1, balance=-balance)
+    dates = [
+        Invoice.objects.filter(customer_id=customer_id).aggregate(last=Max("created_at"))["last"],
+        ArchivedInvoice.objects.filter(customer_id=customer_id).aggregate(last=Max("created_at"))["last"],
+    ]
+    dates = [value for value in dates if value is not None]
+    Customer.objects.filter(pk=customer_id).update(last_invoice_at=max(dates) if dates else None)
+
+
+def rebuild(customer_ids=None):
+    """Recompute totals from live and archived invoices, after bulk loads or for repairs."""
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(pk__in=customer_ids)
+    stats = {pk: [0, 0, None, 0] for pk in customers.values_list("pk", flat=True)}
+
+    for invoices, items in ((Invoice, InvoiceItem), (ArchivedInvoice, ArchivedInvoiceItem)):
+        rows = (
+            invoices.objects.filter(customer_id__in=list(stats)).values("customer_id")
+            .annotate(invoices=Count("id"), last=Max("created_at"), balance=Sum("balance_due")).order_by()
+        )
+        for row in rows:
+            entry = stats[row["customer_id"]]
+            entry[1] += row["invoices"]
+            entry[2] = max(filter(None, [entry[2], row["last"]]), default=None)
+            entry[3] += row["balance"] or 0
+        totals = (
+            items.objects.filter(invoice__customer_id__in=list(stats)).values("invoice__customer_id")
+            .annotate(total=Sum(F("quantity") * F("price") - F("discount"))).order_by()
+        )
+        for row in totals:
+            stats[row["invoice__customer_id"]][0] += row["total"] or 0
+
+    Customer.objects.bulk_update(
+        [
+            Customer(pk=pk, total_billed=total, invoice_count=count, last_invoice_at=last, balance_due=balance)
+            for pk, (total, count, last, balance) in stats.items()
+        ],
+        ["total_billed", "invoice_count", "last_invoice_at", "balance_due"],
+        batch_size=500,
+    )
@@ -0,0 +1,83 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from core.events import RESYNC, broker
+from .models import Invoice, InvoiceItem
+from .summary import archived_count, line_total, today_income
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, "invoices"):
+        _local.invoices = {}
+    return _local.invoices
+
+
+@contextmanager
+def suppressed():
+    """Skip per-invoice deltas during bulk moves; dashboards get one resync instead."""
+    _local.suppressed = True
+    try:
+        yield
+    finally:
+        _local.suppressed = False
+        transaction.on_commit(lambda: broker.publish(RESYNC))
+
+
+def _schedule(invoice_id, deleted=False):
+    # An invoice and its items are written in one transaction; publish once on commit.
+    if getattr(_local, "suppressed", False):
+        return
+    pending = _pending()
+    pending[invoice_id] = deleted or pending.get(invoice_id, False)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = _pending()
+    batch = dict(pending)
+    pending.clear()
+    # The totals cost two aggregates per commit; skip them when nobody listens.
+    if not batch or not broker.has_listeners():
+        return
+    totals = {
+        "today_income": today_income(timezone.localdate()),
+        "invoice_count": Invoice.objects.count() + archived_count(),
+    }
+    for invoice_id, deleted in batch.items():
+        invoice = None if deleted else Invoice.objects.filter(pk=invoice_id).first()
+        if invoice is None:
+            if deleted:
+                broker.publish({"type": "invoice_deleted", "id": invoice_id, **totals})
+            continue  # written and rolled back before an unrelated commit
+        broker.publish({
+            "type": "invoice",
+            "id": invoice.pk,
+            "customer_name": invoice.customer_name,
+            "total": line_total(invoice.items.all()),
+            **totals,
+        })
+
+
+def _invoice_saved(sender, instance, **kwargs):
+    _schedule(instance.pk)
+
+
+def _invoice_deleted(sender, instance, **kwargs):
+    _schedule(instance.pk, deleted=True)
+
+
+def _item_changed(sender, instance, **kwargs):
+    _schedule(instance.invoice_id)
+
+
+def connect_signals():
+    post_save.connect(_invoice_saved, sender=Invoice, dispatch_uid="invoices.events.saved")
+    post_delete.connect(_invoice_deleted, sender=Invoice, dispatch_uid="invoices.events.deleted")
+    post_save.connect(_item_changed, sender=InvoiceItem, dispatch_uid="invoices.events.item_saved")
+    post_delete.connect(_item_changed, sender=InvoiceItem, dispatch_uid="invoices.events.item_deleted")
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.filters import date_range_q
+from core.response_cache import invalidate_on_commit
+from .models import ArchivedInvoiceItem, InvoiceItem, ServiceDailyStat
+from .summary import CENTS
+
+CACHE_TAG = "service_stat"
+# Rolling windows ending today (inclusive), in days.
+WINDOWS = {"today": 1, "7d": 7, "30d": 30, "365d": 365}
+RANKINGS = ("quantity", "revenue")
+
+
+def window_range(window, today=None):
+    today = today or timezone.localdate()
+    return today - timedelta(days=WINDOWS[window] - 1), today
+
+
+def apply(invoice, sign=1):
+    """Add (``sign=1``) or take back (``sign=-1``) an invoice's items on its day's counters."""
+    day = timezone.localdate(invoice.created_at)
+    rows = (
+        invoice.items.values("service")
+        .annotate(qty=Sum("quantity"), total=Sum(F("quantity") * F("price") - F("discount")))
+        .order_by()
+    )
+    changed = False
+    for row in rows:
+        stat, _created = ServiceDailyStat.objects.get_or_create(day=day, service_id=row["service"])
+        ServiceDailyStat.objects.filter(pk=stat.pk).update(
+            quantity=F("quantity") + sign * row["qty"], revenue=F("revenue") + sign * row["total"],
+        )
+        changed = True
+    if changed:
+        invalidate_on_commit(CACHE_TAG)
+
+
+def daily_totals(item_models, start=None, end=None):
+    """``{(day, service_id): [quantity, revenue]}`` summed over ``item_models`` (live and archived lines)."""
+    totals = {}
+    for items in item_models:
+        rows = (
+            items.objects.filter(date_range_q(items, "invoice__created_at", start, end))
+            .annotate(day=TruncDate("invoice__created_at"))
+            .values("day", "service")
+            .annotate(qty=Sum("quantity"), total=Sum(F("quantity") * F("price") - F("discount")))
+            .order_by()
+        )
+        for row in rows:
+            entry = totals.setdefault((row["day"], row["service"]), [0, 0])
+            entry[0] += row["qty"]
+            entry[1] += row["total"] or 0
+    return totals
+
+
+def rebuild(start=None, end=None):
+    """Recompute the counters of ``start``..``end`` (all days by default), after bulk loads or for repairs."""
+    ServiceDailyStat.objects.filter(date_range_q(ServiceDailyStat, "day", start, end)).delete()
+    ServiceDailyStat.objects.bulk_create(
+        [
+            ServiceDailyStat(day=day, service_id=service_id, quantity=qty, revenue=total)
+            for (day, service_id), (qty, total) in daily_totals([InvoiceItem, ArchivedInvoiceItem], start, end).items()
+        ],
+        batch_size=1000,
+    )
+    invalidate_on_commit(CACHE_TAG)
+
+
+def top(start=None, end=None, by="quantity", limit=10):
+    """The ``limit`` best services of ``start``..``end``, summed from the daily counters."""
+    rows = (
+        ServiceDailyStat.objects.filter(date_range_q(ServiceDailyStat, "day", start, end))
+        .values("service", "service__name")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+        .filter(quantity__gt=0)
+        .order_by(f"-{by}", "service")[:limit]
+    )
+    return [
+        {
+            "service": row["service"],
+            "name": row["service__name"],
+            "quantity": row["quantity"],
+            # SQLite sums decimals unscaled.
+            "revenue": Decimal(row["revenue"]).quantize(CENTS),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:48
+
+import re
+import unicodedata
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Sum
+
+
+# Frozen copy of invoices.customers.normalize_name as of this migration:
+# later changes to the runtime rules must not change what it merges.
+_LETTERS = str.maketrans({"ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "ة": "ه", "\u200c": " ", "\u200d": "", "\u200f": ""})
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+_MARKS = re.compile(r"[\u064b-\u0670\u065f\u0640]")
+
+
+def normalize_name(name):
+    text = unicodedata.normalize("NFKC", name or "").translate(_LETTERS).translate(_DIGITS)
+    return " ".join(_MARKS.sub("", text).casefold().split())
+
+
+def link_customers(apps, schema_editor):
+    Customer = apps.get_model('invoices', 'Customer')
+    pairs = [
+        (apps.get_model('invoices', 'Invoice'), apps.get_model('invoices', 'InvoiceItem')),
+        (apps.get_model('invoices', 'ArchivedInvoice'), apps.get_model('invoices', 'ArchivedInvoiceItem')),
+    ]
+
+    # Spellings that normalize alike become one customer named after the most used one.
+    spellings = {}
+    for invoices, _items in pairs:
+        for name, count in invoices.objects.values_list('customer_name').annotate(n=Count('id')).order_by():
+            key = normalize_name(name)
+            if key:
+                spellings.setdefault(key, Counter())[' '.join(name.split())] += count
+    Customer.objects.bulk_create(
+        [Customer(name=names.most_common(1)[0][0], normalized_name=key) for key, names in spellings.items()],
+        batch_size=500,
+    )
+    ids = dict(Customer.objects.values_list('normalized_name', 'id'))
+
+    stats = {pk: [0, 0, None] for pk in ids.values()}
+    for invoices, items in pairs:
+        for name in invoices.objects.values_list('customer_name', flat=True).distinct().order_by():
+            customer_id = ids.get(normalize_name(name))
+            if customer_id:
+                invoices.objects.filter(customer_name=name).update(customer_id=customer_id)
+        rows = invoices.objects.exclude(customer=None).values('customer_id').annotate(n=Count('id'), last=Max('created_at'))
+        for row in rows.order_by():
+            entry = stats[row['customer_id']]
+            entry[1] += row['n']
+            entry[2] = max(filter(None, [entry[2], row['last']]), default=None)
+        totals = (
+            items.objects.exclude(invoice__customer=None).values('invoice__customer_id')
+            .annotate(total=Sum(F('quantity') * F('price') - F('discount')))
+        )
+        for row in totals.order_by():
+            stats[row['invoice__customer_id']][0] += row['total'] or 0
+
+    Customer.objects.bulk_update(
+        [Customer(pk=pk, total_billed=total, invoice_count=count, last_invoice_at=last)
+         for pk, (total, count, last) in stats.items()],
+        ['total_billed', 'invoice_count', 'last_invoice_at'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0005_invoice_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+                ('phone', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('total_billed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('last_invoice_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_billed'], name='invoices_customer_top_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedinvoice',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='invoices.customer'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='invoices', to='invoices.customer'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['customer', '-created_at'], name='invoices_customer_date_idx'),
+        ),
+        migrations.RunPython(link_customers, migrations.RunPython.noop),
+    ]
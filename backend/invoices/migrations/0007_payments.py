@@ -0,0 +1,98 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+def opening_payments(apps, schema_editor):
+    # Invoices from before payments were tracked are taken as settled: each gets
+    # an opening payment for its total, like the stock opening movements.
+    Payment = apps.get_model('invoices', 'Payment')
+    for invoice_model, item_model in (
+        (apps.get_model('invoices', 'Invoice'), apps.get_model('invoices', 'InvoiceItem')),
+        (apps.get_model('invoices', 'ArchivedInvoice'), apps.get_model('invoices', 'ArchivedInvoiceItem')),
+    ):
+        totals = dict(
+            item_model.objects.values('invoice_id')
+            .annotate(total=Sum(F('quantity') * F('price') - F('discount')))
+            .order_by().values_list('invoice_id', 'total')
+        )
+        invoices = []
+        payments = []
+        for pk, created_at in invoice_model.objects.values_list('pk', 'created_at').iterator():
+            total = round(totals.get(pk) or 0, 2)
+            if total <= 0:
+                continue
+            invoices.append(invoice_model(pk=pk, amount_paid=total))
+            payments.append(Payment(
+                invoice_id=pk, amount=total, method='opening', paid_on=timezone.localtime(created_at).date(),
+            ))
+        invoice_model.objects.bulk_update(invoices, ['amount_paid'], batch_size=500)
+        Payment.objects.bulk_create(payments, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_customer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('method', models.CharField(choices=[('cash', 'Cash'), ('bank', 'Bank transfer'), ('card', 'Card'), ('other', 'Other'), ('opening', 'Opening balance')], default='cash', max_length=20)),
+                ('paid_on', models.DateField(default=django.utils.timezone.localdate)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedinvoice',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='archivedinvoice',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['-balance_due'], name='invoices_customer_owing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['created_at'], name='invoices_open_idx'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='invoice',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='payments', to='invoices.invoice'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['invoice', 'paid_on'], name='invoices_pa_invoice_36ada0_idx'),
+        ),
+        migrations.RunPython(opening_payments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+
+
+def daily_totals(item_models):
+    # Frozen copy of invoices.leaderboard.daily_totals (without the date range) as of this migration.
+    totals = {}
+    for items in item_models:
+        rows = (
+            items.objects.annotate(day=TruncDate('invoice__created_at'))
+            .values('day', 'service')
+            .annotate(qty=Sum('quantity'), total=Sum(F('quantity') * F('price') - F('discount')))
+            .order_by()
+        )
+        for row in rows:
+            entry = totals.setdefault((row['day'], row['service']), [0, 0])
+            entry[0] += row['qty']
+            entry[1] += row['total'] or 0
+    return totals
+
+
+def fill_stats(apps, schema_editor):
+    ServiceDailyStat = apps.get_model('invoices', 'ServiceDailyStat')
+    items = [apps.get_model('invoices', 'InvoiceItem'), apps.get_model('invoices', 'ArchivedInvoiceItem')]
+    ServiceDailyStat.objects.bulk_create(
+        [
+            ServiceDailyStat(day=day, service_id=service_id, quantity=qty, revenue=total)
+            for (day, service_id), (qty, total) in daily_totals(items).items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_changelog'),
+        ('invoices', '0008_invoice_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.service')),
+            ],
+            options={
+                'unique_together': {('day', 'service')},
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,53 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from core.models import Service
 
+
+class Customer(models.Model):
+    name = models.CharField(max_length=200)
+    # invoices.customers.normalize_name / normalize_phone; lookups go through these.
+    normalized_name = models.CharField(max_length=200, unique=True)
+    phone = models.CharField(max_length=32, blank=True, db_index=True)
+    # Lifetime figures (archived invoices included), kept up to date by invoices.customers.
+    total_billed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoice_count = models.PositiveIntegerField(default=0)
+    last_invoice_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-total_billed"], name="invoices_customer_top_idx"),
+            models.Index(fields=["-balance_due"], name="invoices_customer_owing_idx", condition=Q(balance_due__gt=0)),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class Invoice(models.Model):
+    customer = models.ForeignKey(
+        Customer,
+        related_name="invoices",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
     customer_name = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Kept in step with items and payments by invoices.payments.
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["customer", "-created_at"], name="invoices_customer_date_idx"),
+            # Date-range filters and reports compare the raw column (core.filters).
+            models.Index(fields=["created_at"], name="invoices_created_idx"),
+            # Receivables only ever look at open invoices; settled history stays out of the index.
+            models.Index(fields=["created_at"], name="invoices_open_idx", condition=Q(balance_due__gt=0)),
+        ]
 
     @property
     def total_amount(self):
@@ -20,6 +64,85 @@ class InvoiceItem(models.Model):
         on_delete=models.CASCADE
     )
     service = models.ForeignKey(Service, on_delete=models.PROTECT)
+    product = models.ForeignKey(
+        "products.Product",
+        related_name="invoice_items",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    @property
+    def total_price(self):
+        return (self.quantity * self.price) - self.discount
+
+
+class Payment(models.Model):
+    METHOD_CASH = "cash"
+    METHOD_BANK = "bank"
+    METHOD_CARD = "card"
+    METHOD_OTHER = "other"
+    METHOD_OPENING = "opening"
+    METHOD_CHOICES = [
+        (METHOD_CASH, "Cash"),
+        (METHOD_BANK, "Bank transfer"),
+        (METHOD_CARD, "Card"),
+        (METHOD_OTHER, "Other"),
+        (METHOD_OPENING, "Opening balance"),
+    ]
+
+    # No database constraint: payments stay put while their invoice sits in
+    # the archive tables under the same id.
+    invoice = models.ForeignKey(
+        Invoice,
+        related_name="payments",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default=METHOD_CASH)
+    paid_on = models.DateField(default=timezone.localdate)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["invoice", "paid_on"])]
+
+
+class ArchivedInvoice(models.Model):
+    """Invoice moved out of the live tables by archive_invoices; same pk as before."""
+
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, related_name="+", on_delete=models.PROTECT, null=True, blank=True)
+    customer_name = models.CharField(max_length=200)
+    created_at = models.DateTimeField(db_index=True)
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fiscal_year = models.PositiveIntegerField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def total_amount(self):
+        return sum(item.total_price for item in self.items.all())
+
+    def __str__(self):
+        return f"Archived invoice #{self.id} - {self.customer_name}"
+
+
+class ArchivedInvoiceItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    invoice = models.ForeignKey(ArchivedInvoice, related_name="items", on_delete=models.CASCADE)
+    service = models.ForeignKey(Service, related_name="+", on_delete=models.PROTECT)
+    product = models.ForeignKey(
+        "products.Product",
+        related_name="+",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -27,3 +150,33 @@ class InvoiceItem(models.Model):
     @property
     def total_price(self):
         return (self.quantity * self.price) - self.discount
+
+
+class DailySalesRollup(models.Model):
+    """Per-day, per-service sales of archived invoices, so reports stay complete."""
+
+    day = models.DateField()
+    service = models.ForeignKey(Service, related_name="+", on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [("day", "service")]
+
+
+class DailyInvoiceRollup(models.Model):
+    day = models.DateField(unique=True)
+    invoice_count = models.PositiveIntegerField(default=0)
+
+
+class ServiceDailyStat(models.Model):
+    """Per-day (Kabul), per-service sales counters of live and archived invoices, for leaderboards."""
+
+    day = models.DateField()
+    service = models.ForeignKey(Service, related_name="+", on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [("day", "service")]
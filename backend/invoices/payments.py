@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.utils import timezone
+
+from core.changefeed import record_changes
+from core.sqlite import write_atomic
+from . import customers
+from .models import Invoice, Payment
+from .summary import CENTS
+
+AGING_BUCKETS = [("0-30", 30), ("31-60", 60), ("61-90", 90), ("90+", None)]
+
+
+class Overpayment(Exception):
+    def __init__(self, invoice_id, amount):
+        self.invoice_id = invoice_id
+        self.amount = amount
+        super().__init__(f"Payment of {amount} exceeds the balance of invoice {invoice_id}")
+
+
+def record(invoice, amount, method=Payment.METHOD_CASH, paid_on=None, note=""):
+    """Take a (partial) payment against ``invoice``; raises Overpayment past its balance."""
+    with write_atomic():
+        # Conditional F() update: the balance check and the change are one statement.
+        updated = (
+            Invoice.objects
+            .filter(pk=invoice.pk, balance_due__gte=amount)
+            .update(amount_paid=F("amount_paid") + amount, balance_due=F("balance_due") - amount)
+        )
+        if not updated:
+            raise Overpayment(invoice.pk, amount)
+        payment = Payment.objects.create(
+            invoice_id=invoice.pk, amount=amount, method=method,
+            paid_on=paid_on or timezone.localdate(), note=note,
+        )
+        customers.apply(invoice.customer_id, 0, 0, balance=-amount)
+        record_changes("invoice", [invoice.pk])
+    return payment
+
+
+def cancel(payment):
+    with write_atomic():
+        invoice = Invoice.objects.filter(pk=payment.invoice_id).values("customer_id").first()
+        if invoice is None:
+            raise Invoice.DoesNotExist(payment.invoice_id)
+        Invoice.objects.filter(pk=payment.invoice_id).update(
+            amount_paid=F("amount_paid") - payment.amount, balance_due=F("balance_due") + payment.amount,
+        )
+        payment.delete()
+        customers.apply(invoice["customer_id"], 0, 0, balance=payment.amount)
+        record_changes("invoice", [payment.invoice_id])
+
+
+def retotal(invoice, total):
+    """
+    Re-derive the balance after the invoice total was (re)computed. Raises
+    Overpayment when the new total is below what was already paid.
+    """
+    updated = (
+        Invoice.objects
+        .filter(pk=invoice.pk, amount_paid__lte=total)
+        .update(balance_due=total - F("amount_paid"))
+    )
+    if not updated:
+        raise Overpayment(invoice.pk, total)
+    invoice.balance_due = Invoice.objects.values_list("balance_due", flat=True).get(pk=invoice.pk)
+    return invoice.balance_due
+
+
+def aging(today=None, customer_id=None):
+    """Open balances by invoice age, in one grouped query over the open-invoice index."""
+    today = today or timezone.localdate()
+
+    def since(days):
+        return timezone.make_aware(datetime.combine(today - timedelta(days=days), datetime.min.time()))
+
+    bucket = Case(
+        *[When(created_at__gte=since(days), then=Value(name)) for name, days in AGING_BUCKETS if days is not None],
+        default=Value(AGING_BUCKETS[-1][0]),
+        output_field=CharField(),
+    )
+    open_invoices = Invoice.objects.filter(balance_due__gt=0)
+    if customer_id is not None:
+        open_invoices = open_invoices.filter(customer_id=customer_id)
+    rows = {
+        row["bucket"]: row
+        for row in open_invoices.annotate(bucket=bucket).values("bucket")
+        .annotate(invoices=Count("id"), balance=Sum("balance_due")).order_by()
+    }
+    buckets = [
+        {
+            "bucket": name,
+            "invoices": rows.get(name, {}).get("invoices", 0),
+            # SQLite sums decimals unscaled.
+            "balance": Decimal(rows.get(name, {}).get("balance") or 0).quantize(CENTS),
+        }
+        for name, _days in AGING_BUCKETS
+    ]
+    return {
+        "as_of": today,
+        "buckets": buckets,
+        "total": sum(row["balance"] for row in buckets),
+    }
@@ -1,6 +1,32 @@
 from rest_framework import serializers
-from django.db import transaction
-from .models import Invoice, InvoiceItem
+from django.utils import timezone
+from .models import ArchivedInvoice, ArchivedInvoiceItem, Customer, Invoice, InvoiceItem, Payment
+from .summary import line_total
+from . import customers, leaderboard, payments
+from core.pricing import prices_at
+from core.sqlite import write_atomic
+from products.stock import InsufficientStock, release, reserve
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ['id', 'name', 'phone', 'total_billed', 'balance_due', 'invoice_count', 'last_invoice_at', 'created_at']
+        read_only_fields = ['total_billed', 'balance_due', 'invoice_count', 'last_invoice_at', 'created_at']
+
+    def validate(self, attrs):
+        if "name" in attrs:
+            attrs["normalized_name"] = customers.normalize_name(attrs["name"])
+            if not attrs["normalized_name"]:
+                raise serializers.ValidationError({"name": "نام مشتری خالی است."})
+            taken = Customer.objects.filter(normalized_name=attrs["normalized_name"])
+            if self.instance is not None:
+                taken = taken.exclude(pk=self.instance.pk)
+            if taken.exists():
+                raise serializers.ValidationError({"name": "مشتری با این نام قبلاً ثبت شده است."})
+        if "phone" in attrs:
+            attrs["phone"] = customers.normalize_phone(attrs["phone"])
+        return attrs
 
 
 class InvoiceItemSerializer(serializers.ModelSerializer):
@@ -21,47 +47,156 @@ class InvoiceSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ArchivedInvoiceItemSerializer(serializers.ModelSerializer):
+    total_price = serializers.ReadOnlyField()
+    service_name = serializers.CharField(source="service.name", read_only=True)
+
+    class Meta:
+        model = ArchivedInvoiceItem
+        fields = '__all__'
+
+
+class ArchivedInvoiceSerializer(serializers.ModelSerializer):
+    """Same shape as InvoiceSerializer, flagged read-only with ``archived``."""
+    items = ArchivedInvoiceItemSerializer(many=True, read_only=True)
+    total_amount = serializers.ReadOnlyField()
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedInvoice
+        fields = '__all__'
+
+    def get_archived(self, obj):
+        return True
+
+
 class InvoiceItemCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvoiceItem
-        fields = ['service', 'quantity', 'price', 'discount']
+        fields = ['service', 'product', 'quantity', 'price', 'discount']
+        extra_kwargs = {'price': {'required': False}}
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = ['id', 'invoice', 'amount', 'method', 'paid_on', 'note', 'created_at']
+        read_only_fields = ['invoice', 'created_at']
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("مبلغ پرداخت باید بیشتر از صفر باشد.")
+        return value
+
+    def validate_method(self, value):
+        if value == Payment.METHOD_OPENING:
+            raise serializers.ValidationError("این روش پرداخت فقط برای مانده‌های اولیه است.")
+        return value
+
+    def create(self, validated_data):
+        invoice = validated_data.pop('invoice')
+        try:
+            return payments.record(invoice, **validated_data)
+        except payments.Overpayment:
+            raise serializers.ValidationError({"amount": "مبلغ پرداخت از مانده فاکتور بیشتر است."})
+
+
+def _reserve_stock(invoice, items_data):
+    lines = [(item["product"].pk, item["quantity"]) for item in items_data if item.get("product")]
+    try:
+        reserve(invoice, lines)
+    except InsufficientStock as exc:
+        raise serializers.ValidationError({"items": f"موجودی کالای {exc.product_id} کافی نیست."})
+
+
+def _default_prices(items_data, at=None):
+    """Lines sent without a price take the service's list price in effect at ``at`` (now for new invoices)."""
+    missing = {item['service'].pk for item in items_data if item.get('price') is None}
+    if not missing:
+        return
+    listed = prices_at(missing, at or timezone.now())
+    for item in items_data:
+        if item.get('price') is None:
+            price = listed.get(item['service'].pk)
+            item['price'] = price if price is not None else item['service'].price
+
+
+def _customer_fields(attrs, instance=None):
+    """Pick the customer from ``customer`` or by the typed ``customer_name``."""
+    phone = attrs.pop('customer_phone', '')
+    if attrs.get('customer') is not None:
+        attrs.setdefault('customer_name', attrs['customer'].name)
+    elif attrs.get('customer_name') or instance is None:
+        name = attrs.get('customer_name', '')
+        if not customers.normalize_name(name):
+            raise serializers.ValidationError({"customer_name": "نام مشتری یا customer لازم است."})
+        attrs['customer'] = customers.resolve(name, phone)
+    return attrs
 
 
 class InvoiceCreateSerializer(serializers.ModelSerializer):
     items = InvoiceItemCreateSerializer(many=True, required=False)
+    customer_name = serializers.CharField(max_length=200, required=False)
+    customer_phone = serializers.CharField(max_length=32, required=False, write_only=True)
 
     class Meta:
         model = Invoice
-        fields = ['customer_name', 'items']
+        fields = ['customer', 'customer_name', 'customer_phone', 'items']
 
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
 
-        with transaction.atomic():
-            invoice = Invoice.objects.create(**validated_data)
+        with write_atomic():
+            invoice = Invoice.objects.create(**_customer_fields(validated_data))
+            _default_prices(items_data)
             for item in items_data:
                 InvoiceItem.objects.create(
                     invoice=invoice,
                     **item
                 )
+            _reserve_stock(invoice, items_data)
+            payments.retotal(invoice, line_total(invoice.items.all()))
+            customers.invoice_added(invoice)
+            leaderboard.apply(invoice)
         return invoice
 
 
 class InvoiceUpdateSerializer(serializers.ModelSerializer):
     items = InvoiceItemCreateSerializer(many=True, required=False)
+    customer_phone = serializers.CharField(max_length=32, required=False, write_only=True)
 
     class Meta:
         model = Invoice
-        fields = ['customer_name', 'items']
+        fields = ['customer', 'customer_name', 'customer_phone', 'items']
 
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
-        instance.customer_name = validated_data.get('customer_name', instance.customer_name)
-        instance.save()
 
-        if items_data is not None:
-            instance.items.all().delete()
-            for item in items_data:
-                InvoiceItem.objects.create(invoice=instance, **item)
+        with write_atomic():
+            old_customer, old_total = instance.customer_id, line_total(instance.items.all())
+            old_balance = instance.balance_due
+            validated_data = _customer_fields(validated_data, instance)
+            instance.customer = validated_data.get('customer', instance.customer)
+            instance.customer_name = validated_data.get('customer_name', instance.customer_name)
+            instance.save()
+            if items_data is not None:
+                release(instance)
+                leaderboard.apply(instance, -1)
+                instance.items.all().delete()
+                _default_prices(items_data, instance.created_at)
+                for item in items_data:
+                    InvoiceItem.objects.create(invoice=instance, **item)
+                _reserve_stock(instance, items_data)
+                leaderboard.apply(instance)
+            total = line_total(instance.items.all())
+            try:
+                payments.retotal(instance, total)
+            except payments.Overpayment:
+                raise serializers.ValidationError({"items": "مبلغ فاکتور از مبلغ پرداخت‌شده کمتر می‌شود."})
+            if instance.customer_id == old_customer:
+                customers.apply(old_customer, total - old_total, 0, balance=instance.balance_due - old_balance)
+            else:
+                customers.invoice_removed(old_customer, old_total, old_balance)
+                customers.invoice_added(instance)
 
         return instance
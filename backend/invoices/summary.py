@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from core.filters import date_range_q
+from .models import DailyInvoiceRollup, DailySalesRollup, Invoice, InvoiceItem
+
+CENTS = Decimal("0.01")
+
+
+def line_total(items):
+    value = items.aggregate(total=Sum(F("quantity") * F("price") - F("discount")))["total"]
+    # SQLite returns unscaled aggregates; keep the 2-place amounts of InvoiceItem.total_price.
+    return Decimal(value).quantize(CENTS) if value is not None else 0
+
+
+def archived_count():
+    return DailyInvoiceRollup.objects.aggregate(total=Sum("invoice_count"))["total"] or 0
+
+
+def archived_sales():
+    value = DailySalesRollup.objects.aggregate(total=Sum(F("gross") - F("discount")))["total"]
+    return Decimal(value).quantize(CENTS) if value is not None else 0
+
+
+def today_income(today):
+    return line_total(InvoiceItem.objects.filter(date_range_q(InvoiceItem, "invoice__created_at", today, today)))
+
+
+def summary_parts(today):
+    return {
+        "today_income": lambda: today_income(today),
+        "invoice_count": lambda: Invoice.objects.count() + archived_count(),
+        "total_sales": lambda: line_total(InvoiceItem.objects.all()) + archived_sales(),
+    }
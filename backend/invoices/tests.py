@@ -1,3 +1,246 @@
+from datetime import datetime
+from django.contrib.auth.models import User
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Service
+from products.models import Product
+from . import events, leaderboard
+from .archive import ArchiveError, archive_year, current_fiscal_year, restore_year
+from .customers import normalize_name, normalize_phone, rebuild
+from .models import ArchivedInvoice, Customer, DailySalesRollup, Invoice, Payment, ServiceDailyStat
+
+
+class InvoiceApiTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.service = Service.objects.create(name="CNC test", price=100)
+        self.product = Product.objects.create(name="Board", price=10, quantity=5)
+
+    def create_invoice(self, quantity, product=True):
+        item = {"service": self.service.pk, "quantity": quantity, "price": "100", "discount": "10"}
+        if product:
+            item["product"] = self.product.pk
+        return self.client.post("/api/invoices/", {"customer_name": "Ahmad", "items": [item]}, format="json")
+
+    def test_create_invoice_and_summary(self):
+        response = self.create_invoice(2, product=False)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(str(response.data["total_amount"]), "190.00")
+        summary = self.client.get("/api/invoices/summary/").data
+        self.assertEqual(summary["invoice_count"], 1)
+        self.assertEqual(str(summary["total_sales"]), "190.00")
+
+    def test_list_filters_by_service(self):
+        other = Service.objects.create(name="PVC test", price=50)
+        first = self.create_invoice(1, product=False).data["id"]
+        self.client.post("/api/invoices/", {"customer_name": "Karim", "items": [
+            {"service": other.pk, "quantity": 1, "price": "50", "discount": "0"},
+            {"service": other.pk, "quantity": 2, "price": "50", "discount": "0"},
+        ]}, format="json")
+        ids = lambda service: [row["id"] for row in self.client.get("/api/invoices/", {"service": service}).data["results"]]
+        self.assertEqual(ids(self.service.pk), [first])
+        self.assertEqual(len(ids(other.pk)), 1)
+        self.assertEqual(len(ids(f"{self.service.pk},{other.pk}")), 2)
+
+    def test_list_queries_do_not_grow_with_the_page(self):
+        self.create_invoice(1, product=False)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get("/api/invoices/")
+        for _ in range(4):
+            self.create_invoice(1, product=False)
+        with CaptureQueriesContext(connection) as five:
+            self.client.get("/api/invoices/")
+        self.assertEqual(len(five), len(one))
+
+    def test_product_lines_reserve_and_release_stock(self):
+        response = self.create_invoice(3)
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+
+        self.assertEqual(self.create_invoice(3).status_code, 400)
+        self.assertEqual(Invoice.objects.count(), 1)
+
+        self.client.delete(f"/api/invoices/{response.data['id']}/")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+    def test_committed_invoice_publishes_one_delta(self):
+        with mock.patch.object(events.broker, "publish") as publish, \
+                mock.patch.object(events.broker, "has_listeners", return_value=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                invoice_id = self.create_invoice(2, product=False).data["id"]
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/invoices/{invoice_id}/")
+        created, deleted = [call.args[0] for call in publish.call_args_list]
+        self.assertEqual(created["type"], "invoice")
+        self.assertEqual(str(created["total"]), "190.00")
+        self.assertEqual(str(created["today_income"]), "190.00")
+        self.assertEqual(deleted, {"type": "invoice_deleted", "id": invoice_id, "today_income": 0, "invoice_count": 0})
+
+    def test_no_totals_are_computed_without_listeners(self):
+        with mock.patch.object(events, "today_income") as totals, mock.patch.object(events.broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_invoice(2, product=False)
+        totals.assert_not_called()
+        publish.assert_not_called()
+
+    def test_archive_keeps_totals_and_detail(self):
+        year = current_fiscal_year() - 1
+        old_id = self.create_invoice(2).data["id"]
+        Invoice.objects.filter(pk=old_id).update(created_at=timezone.make_aware(datetime(year, 6, 1, 12)))
+        self.assertRaises(ArchiveError, archive_year, year)  # unpaid
+        self.client.post(f"/api/invoices/{old_id}/payments/", {"amount": "190"}, format="json")
+        old = self.client.get(f"/api/invoices/{old_id}/").data
+        self.create_invoice(1, product=False)
+        report = self.client.get("/api/finance/report/").data
+        summary = self.client.get("/api/invoices/summary/").data
+
+        self.assertRaises(ArchiveError, archive_year, current_fiscal_year())
+        self.assertEqual(archive_year(year), 1)
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.assertEqual(self.client.get("/api/finance/report/").data, report)
+        self.assertEqual(self.client.get("/api/invoices/summary/").data, summary)
+        in_year = self.client.get("/api/finance/report/", {"start": f"{year}-06-01", "end": f"{year}-06-01"}).data
+        self.assertEqual((in_year["total_sales"], in_year["total_invoices"]), (200, 1))
+
+        archived = self.client.get(f"/api/invoices/{old['id']}/").data
+        self.assertTrue(archived.pop("archived"))
+        self.assertEqual(archived.pop("fiscal_year"), year)
+        archived.pop("archived_at")
+        self.assertEqual(archived, old)
+        response = self.client.patch(f"/api/invoices/{old['id']}/", {"customer_name": "x"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 3)
+
+        self.assertEqual(restore_year(year), 1)
+        self.assertFalse(ArchivedInvoice.objects.exists() or DailySalesRollup.objects.exists())
+        self.assertEqual(self.client.get(f"/api/invoices/{old['id']}/").data, old)
+        self.assertEqual(self.client.get("/api/finance/report/").data, report)
+
+    def test_payment_of_archived_invoice_cannot_be_cancelled(self):
+        year = current_fiscal_year() - 1
+        invoice_id = self.create_invoice(2, product=False).data["id"]
+        Invoice.objects.filter(pk=invoice_id).update(created_at=timezone.make_aware(datetime(year, 6, 1, 12)))
+        payment = self.client.post(f"/api/invoices/{invoice_id}/payments/", {"amount": "190"}, format="json").data
+        archive_year(year)
+
+        response = self.client.delete(f"/api/payments/{payment['id']}/")
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Payment.objects.filter(pk=payment["id"]).exists())
+
+    def test_statement_lists_archived_invoices_on_request(self):
+        year = current_fiscal_year() - 1
+        old_id = self.create_invoice(2, product=False).data["id"]
+        Invoice.objects.filter(pk=old_id).update(created_at=timezone.make_aware(datetime(year, 6, 1, 12)))
+        self.client.post(f"/api/invoices/{old_id}/payments/", {"amount": "190"}, format="json")
+        new_id = self.create_invoice(1, product=False).data["id"]
+        archive_year(year)
+
+        url = f"/api/customers/{Invoice.objects.get().customer_id}/statement/"
+        live = self.client.get(url).data
+        self.assertEqual((live["customer"]["total_billed"], live["customer"]["invoice_count"]), ("280.00", 2))
+        self.assertEqual(([row["id"] for row in live["results"]], live["archived_invoice_count"]), ([new_id], 1))
+        archived = self.client.get(url, {"archived": 1}).data
+        self.assertEqual([(row["id"], row["fiscal_year"]) for row in archived["results"]], [(old_id, year)])
+
+    def test_customer_totals_follow_invoice_writes(self):
+        self.assertEqual(normalize_name("  علي  كريمي "), normalize_name("علی کریمی"))
+        self.assertEqual(normalize_phone("+93 700 123 456"), "0700123456")
+
+        first = self.create_invoice(2, product=False).data
+        self.client.post("/api/invoices/", {
+            "customer_name": "  AHMAD ", "customer_phone": "۰۷۰۰۱۲۳۴۵۶",
+            "items": [{"service": self.service.pk, "quantity": 1, "price": "50", "discount": "0"}],
+        }, format="json")
+        customer = Customer.objects.get()
+        self.assertEqual((customer.name, customer.phone), ("Ahmad", "0700123456"))
+        self.assertEqual((str(customer.total_billed), customer.invoice_count), ("240.00", 2))
+
+        other = self.client.post("/api/customers/", {"name": "Karim"}, format="json").data
+        self.assertEqual(self.client.post("/api/customers/", {"name": " karim"}, format="json").status_code, 400)
+        self.client.patch(f"/api/invoices/{first['id']}/", {
+            "customer": other["id"],
+            "items": [{"service": self.service.pk, "quantity": 3, "price": "100", "discount": "0"}],
+        }, format="json")
+        customer.refresh_from_db()
+        self.assertEqual((str(customer.total_billed), customer.invoice_count), ("50.00", 1))
+        top = self.client.get("/api/customers/").data["results"]
+        self.assertEqual([(row["name"], row["total_billed"]) for row in top], [("Karim", "300.00"), ("Ahmad", "50.00")])
+        statement = self.client.get(f"/api/customers/{other['id']}/statement/").data
+        self.assertEqual([invoice["id"] for invoice in statement["results"]], [first["id"]])
+        self.assertEqual(self.client.delete(f"/api/customers/{other['id']}/").status_code, 409)
+
+        self.client.delete(f"/api/invoices/{first['id']}/")
+        karim = Customer.objects.get(pk=other["id"])
+        self.assertEqual((karim.total_billed, karim.invoice_count, karim.last_invoice_at), (0, 0, None))
+        snapshot = list(Customer.objects.order_by("pk").values())
+        rebuild()
+        self.assertEqual(list(Customer.objects.order_by("pk").values()), snapshot)
+
+    def test_payments_keep_invoice_and_customer_balances(self):
+        invoice = self.create_invoice(2, product=False).data
+        self.assertEqual((invoice["amount_paid"], invoice["balance_due"]), ("0.00", "190.00"))
+        pay = lambda amount: self.client.post(f"/api/invoices/{invoice['id']}/payments/", {"amount": amount}, format="json")
+        first = pay("100").data
+        self.assertEqual(pay("100").status_code, 400)
+        pay("40")
+        detail = self.client.get(f"/api/invoices/{invoice['id']}/").data
+        self.assertEqual((detail["amount_paid"], detail["balance_due"]), ("140.00", "50.00"))
+        self.assertEqual(str(Customer.objects.get().balance_due), "50.00")
+
+        shrink = {"items": [{"service": self.service.pk, "quantity": 1, "price": "100", "discount": "0"}]}
+        self.assertEqual(self.client.patch(f"/api/invoices/{invoice['id']}/", shrink, format="json").status_code, 400)
+        self.client.delete(f"/api/payments/{first['id']}/")
+        self.client.patch(f"/api/invoices/{invoice['id']}/", shrink, format="json")
+        self.assertEqual(str(Customer.objects.get().balance_due), "60.00")
+
+        Invoice.objects.create(customer_name="Old", balance_due=30)
+        Invoice.objects.filter(customer_name="Old").update(created_at=timezone.now() - timezone.timedelta(days=45))
+        aging = self.client.get("/api/receivables/aging/").data
+        self.assertEqual(
+            [(row["bucket"], row["invoices"], str(row["balance"])) for row in aging["buckets"]],
+            [("0-30", 1, "60.00"), ("31-60", 1, "30.00"), ("61-90", 0, "0.00"), ("90+", 0, "0.00")],
+        )
+        owing = self.client.get("/api/customers/", {"owing": 1}).data["results"]
+        self.assertEqual([row["balance_due"] for row in owing], ["60.00"])
+
+    def test_leaderboard_follows_invoice_writes(self):
+        other = Service.objects.create(name="Laser test", price=20)
+        line = lambda service, quantity: {"service": service.pk, "quantity": quantity, "price": "20", "discount": "0"}
+        post = lambda *lines: self.client.post(
+            "/api/invoices/", {"customer_name": "Ahmad", "items": list(lines)}, format="json",
+        ).data
+        board = lambda **params: self.client.get("/api/leaderboard/services/", params)
+
+        first = post(line(self.service, 2), line(other, 1))
+        post(line(other, 5))
+        self.assertEqual(board().data["results"][0]["quantity"], 6)
+        self.assertEqual(board().headers["X-Cache"], "HIT")
+
+        self.client.patch(f"/api/invoices/{first['id']}/", {"items": [line(self.service, 9)]}, format="json")
+        Service.objects.filter(pk=self.service.pk).update(name="CNC renamed")
+        rows = board(by="revenue").data["results"]
+        self.assertEqual([(row["name"], row["quantity"], str(row["revenue"])) for row in rows],
+                         [("CNC renamed", 9, "180.00"), ("Laser test", 5, "100.00")])
+        today = timezone.localdate().isoformat()
+        self.assertEqual(len(board(window="today").data["results"]), 2)
+        self.assertEqual(board(start=today, end=today).data["start"], timezone.localdate())
+        self.assertEqual(board(window="2d").status_code, 400)
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/invoices/{first['id']}/")
+        snapshot = list(ServiceDailyStat.objects.filter(quantity__gt=0).values_list("day", "service", "quantity", "revenue"))
+        with self.captureOnCommitCallbacks(execute=True):
+            leaderboard.rebuild()
+        self.assertEqual(list(ServiceDailyStat.objects.values_list("day", "service", "quantity", "revenue")), snapshot)
+        self.assertEqual([row["name"] for row in board().data["results"]], ["Laser test"])
@@ -1,12 +1,28 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
 from .views import (
+    CustomerViewSet,
     FinanceSummaryView,
+    finance_summary_async,
     InvoiceListCreateView,
     InvoiceRetrieveUpdateDestroyView,
+    PaymentDestroyView,
+    PaymentListCreateView,
+    ReceivablesAgingView,
+    ServiceLeaderboardView,
 )
 
+router = SimpleRouter()
+router.register(r"customers", CustomerViewSet, basename="customer")
+
 urlpatterns = [
     path("invoices/", InvoiceListCreateView.as_view(), name="invoice-list-create"),
     path("invoices/<int:pk>/", InvoiceRetrieveUpdateDestroyView.as_view(), name="invoice-detail"),
+    path("invoices/<int:pk>/payments/", PaymentListCreateView.as_view(), name="invoice-payments"),
+    path("payments/<int:pk>/", PaymentDestroyView.as_view(), name="payment-detail"),
+    path("receivables/aging/", ReceivablesAgingView.as_view(), name="receivables-aging"),
+    path("leaderboard/services/", ServiceLeaderboardView.as_view(), name="service-leaderboard"),
     path("invoices/summary/", FinanceSummaryView.as_view(), name="invoice-summary"),
+    path("invoices/summary/async/", finance_summary_async, name="invoice-summary-async"),
+    path("", include(router.urls)),
 ]
@@ -1,43 +1,69 @@
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Sum, F
-from rest_framework import generics, status
+from django.db.models import Exists, F, OuterRef, Sum
+from django.db.models import ProtectedError
+from django.http import Http404
+from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Invoice, InvoiceItem
+from .models import ArchivedInvoice, Customer, Invoice, InvoiceItem, Payment
 from .serializers import (
+    ArchivedInvoiceSerializer,
+    CustomerSerializer,
+    PaymentSerializer,
     InvoiceSerializer,
     InvoiceCreateSerializer,
     InvoiceUpdateSerializer,
     InvoiceItemSerializer,
 )
+from .summary import line_total, summary_parts
+from . import customers, leaderboard, payments
 from core.permissions import IsAdminOrReadOnly
+from core.db_router import reporting_reads
+from core.filters import DateRangeFilter, parse_day
+from core.async_views import async_api_view, gather_sync, render
+from core.middleware import SerializerTimingMixin
+from core.response_cache import CachedResponseMixin
+from core.singleflight import flights, request_key
+from core.sqlite import write_atomic
+from products.stock import release
 
 
 class FinanceSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @reporting_reads
     def get(self, request):
-        today = timezone.now().date()
+        parts = summary_parts(timezone.localdate())
+        return Response(flights.do(request_key(request), lambda: {name: run() for name, run in parts.items()}))
 
-        invoices = Invoice.objects.all()
-        today_invoices = invoices.filter(created_at__date=today)
 
-        total_sales = sum(inv.total_amount for inv in invoices)
-        today_sales = sum(inv.total_amount for inv in today_invoices)
-
-        return Response({
-            "today_income": today_sales,
-            "invoice_count": invoices.count(),
-            "total_sales": total_sales,
-        })
+@async_api_view
+@reporting_reads
+async def finance_summary_async(request):
+    return render(await gather_sync(summary_parts(timezone.localdate())))
 
 
-class InvoiceListCreateView(generics.ListCreateAPIView):
+class InvoiceListCreateView(SerializerTimingMixin, generics.ListCreateAPIView):
     queryset = Invoice.objects.all().order_by("-created_at")
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    filter_backends = [DateRangeFilter]
+    date_range_field = "created_at"
+
+    def get_queryset(self):
+        # Items and their services in two queries per page, not two per invoice row.
+        qs = super().get_queryset().prefetch_related("items__service")
+        customer = self.request.query_params.get("customer")
+        if customer and customer.isdigit():
+            qs = qs.filter(customer_id=customer)
+        services = [value for value in self.request.query_params.get("service", "").split(",") if value.isdigit()]
+        if services:
+            # EXISTS rather than a join: one row per invoice, no DISTINCT under keyset ordering.
+            qs = qs.filter(Exists(InvoiceItem.objects.filter(invoice=OuterRef("pk"), service_id__in=services)))
+        return qs
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -47,14 +73,14 @@ class InvoiceListCreateView(generics.ListCreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        with transaction.atomic():
+        with write_atomic():
             invoice = serializer.save()
         read_serializer = InvoiceSerializer(invoice)
         headers = self.get_success_headers(read_serializer.data)
         return Response(read_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class InvoiceRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class InvoiceRetrieveUpdateDestroyView(SerializerTimingMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Invoice.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
     lookup_field = "pk"
@@ -63,3 +89,179 @@ class InvoiceRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.method in ["PUT", "PATCH"]:
             return InvoiceUpdateSerializer
         return InvoiceSerializer
+
+    def _archived(self):
+        return ArchivedInvoice.objects.prefetch_related("items__service").filter(pk=self.kwargs["pk"]).first()
+
+    def _archived_conflict(self):
+        if not ArchivedInvoice.objects.filter(pk=self.kwargs["pk"]).exists():
+            raise Http404
+        return Response(
+            {"detail": "این فاکتور بایگانی شده و قابل ویرایش نیست."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = self._archived()
+            if archived is None:
+                raise
+            return Response(ArchivedInvoiceSerializer(archived).data)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except Http404:
+            return self._archived_conflict()
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Http404:
+            return self._archived_conflict()
+
+    def perform_destroy(self, instance):
+        with write_atomic():
+            release(instance)
+            leaderboard.apply(instance, -1)
+            customer_id, total = instance.customer_id, line_total(instance.items.all())
+            Payment.objects.filter(invoice=instance).delete()
+            instance.delete()
+            customers.invoice_removed(customer_id, total, instance.balance_due)
+
+
+class CustomerViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
+    # Best customers first; the (-total_billed) index serves this and keyset pages.
+    queryset = Customer.objects.all().order_by("-total_billed")
+    serializer_class = CustomerSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.query_params.get("owing") in ("1", "true"):
+            # Served by the partial (balance_due > 0) index, whatever the history size.
+            qs = qs.filter(balance_due__gt=0).order_by("-balance_due")
+        q = self.request.query_params.get("q")
+        if q:
+            phone = customers.normalize_phone(q)
+            if phone and phone == q.strip().replace(" ", ""):
+                qs = qs.filter(phone__startswith=phone)
+            else:
+                qs = qs.filter(normalized_name__startswith=customers.normalize_name(q))
+        return qs
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {"detail": "این مشتری فاکتور دارد و قابل حذف نیست."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+    @action(detail=True, methods=["get"])
+    def statement(self, request, pk=None):
+        """
+        The customer's totals and invoices, newest first. The totals cover
+        archived fiscal years too; those invoices are listed with
+        ``?archived=1`` and counted in ``archived_invoice_count``.
+        """
+        customer = self.get_object()
+        archived = ArchivedInvoice.objects.filter(customer=customer)
+        if request.query_params.get("archived") in ("1", "true"):
+            invoices, serializer_class = archived, ArchivedInvoiceSerializer
+        else:
+            invoices, serializer_class = customer.invoices.all(), InvoiceSerializer
+        page = self.paginate_queryset(invoices.order_by("-created_at").prefetch_related("items__service"))
+        response = self.get_paginated_response(serializer_class(page, many=True).data)
+        response.data = {
+            "customer": CustomerSerializer(customer).data,
+            "archived_invoice_count": archived.count(),
+            **response.data,
+        }
+        return response
+
+
+class PaymentListCreateView(SerializerTimingMixin, generics.ListCreateAPIView):
+    serializer_class = PaymentSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get_queryset(self):
+        return Payment.objects.filter(invoice_id=self.kwargs["pk"]).order_by("-paid_on", "-id")
+
+    def perform_create(self, serializer):
+        invoice = generics.get_object_or_404(Invoice, pk=self.kwargs["pk"])
+        serializer.save(invoice=invoice)
+
+
+class PaymentDestroyView(generics.DestroyAPIView):
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Invoice.DoesNotExist:
+            # The invoice moved to the archive tables: its balance is frozen.
+            return Response(
+                {"detail": "فاکتور این پرداخت بایگانی شده و پرداخت قابل حذف نیست."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+    def perform_destroy(self, instance):
+        payments.cancel(instance)
+
+
+class ReceivablesAgingView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @reporting_reads
+    def get(self, request):
+        customer = request.query_params.get("customer")
+        return Response(payments.aging(customer_id=int(customer) if customer and customer.isdigit() else None))
+
+
+class ServiceLeaderboardView(CachedResponseMixin, APIView):
+    """Top services by quantity or revenue for ``?window=`` (today, 7d, 30d, 365d) or ``?start=&end=``."""
+
+    permission_classes = [IsAuthenticated]
+    cache_tags = (leaderboard.CACHE_TAG, "service")
+
+    def _custom_range(self):
+        return "start" in self.request.query_params or "end" in self.request.query_params
+
+    def get_cache_timeout(self):
+        # Only the fixed windows are worth keeping; custom ranges rarely repeat.
+        return 0 if self._custom_range() else super().get_cache_timeout()
+
+    def response_cache_key(self, request):
+        # Windows end today: a new day must not be served yesterday's board.
+        return f"{super().response_cache_key(request)}:{timezone.localdate()}"
+
+    @reporting_reads
+    def get(self, request):
+        params = request.query_params
+        by = params.get("by", "quantity")
+        if by not in leaderboard.RANKINGS:
+            raise ValidationError({"by": "مقدار by باید quantity یا revenue باشد."})
+        limit = params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            raise ValidationError({"limit": "limit باید عددی بین ۱ و ۱۰۰ باشد."})
+        if self._custom_range():
+            window = None
+            start, end = parse_day(params.get("start"), "start"), parse_day(params.get("end"), "end")
+        else:
+            window = params.get("window", "30d")
+            if window not in leaderboard.WINDOWS:
+                raise ValidationError({"window": f"window باید یکی از {', '.join(leaderboard.WINDOWS)} باشد."})
+            start, end = leaderboard.window_range(window)
+        return Response({
+            "window": window,
+            "start": start,
+            "end": end,
+            "by": by,
+            "results": leaderboard.top(start, end, by, int(limit)),
+        })
@@ -1,6 +1,60 @@
-from django.contrib import admin
-from .models import Product
+from django import forms
+from django.contrib import admin, messages
+from .models import Product, StockMovement
+from .stock import InsufficientStock, adjust
+
+
+class ProductAdminForm(forms.ModelForm):
+    # Stock is never typed in: the form takes a change and the ledger applies it.
+    stock_delta = forms.IntegerField(label="Stock change", required=False, help_text="Added to the current quantity; negative to remove.")
+    stock_note = forms.CharField(label="Reason", max_length=200, required=False)
+
+    class Meta:
+        model = Product
+        exclude = ('quantity',)
+
+    def clean_stock_delta(self):
+        delta = self.cleaned_data.get('stock_delta') or 0
+        if (self.instance.quantity or 0) + delta < 0:
+            raise forms.ValidationError("موجودی کافی نیست.")
+        return delta
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    form = ProductAdminForm
     list_display = ('name', 'price', 'quantity', 'created_at')
+    readonly_fields = ('quantity',)
+
+    def save_model(self, request, obj, form, change):
+        delta = form.cleaned_data.get('stock_delta') or 0
+        if change:
+            # Never write the quantity loaded with the form back over sales made meanwhile.
+            obj.save(update_fields=['name', 'price'])
+        else:
+            obj.quantity = 0
+            obj.save()
+        if not delta:
+            return
+        reason = StockMovement.REASON_ADJUSTMENT if change else StockMovement.REASON_OPENING
+        try:
+            adjust(obj, delta, reason=reason, note=form.cleaned_data.get('stock_note', ''))
+        except InsufficientStock:
+            self.message_user(request, "موجودی کافی نیست.", messages.ERROR)
+        obj.refresh_from_db(fields=['quantity'])
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('product', 'delta', 'reason', 'invoice', 'created_at')
+    list_filter = ('reason',)
+
+    # The ledger is append-only; rows come from products.stock, never typed in here.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import Sum
+from rest_framework.exceptions import ValidationError
+
+from core.models import Service
+from invoices.models import Invoice
+from invoices.serializers import InvoiceCreateSerializer
+from products.models import Product, StockMovement
+
+
+class Command(BaseCommand):
+    help = "Sell one product from N concurrent threads and check that no stock update is lost."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sellers", type=int, default=8)
+        parser.add_argument("--sales", type=int, default=50, help="Invoices per seller.")
+        parser.add_argument("--stock", type=int, default=None,
+                            help="Starting quantity (default: enough for 3/4 of the attempted sales).")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark rows afterwards.")
+
+    def handle(self, *args, **options):
+        sellers, sales = options["sellers"], options["sales"]
+        stock = options["stock"] if options["stock"] is not None else sellers * sales * 3 // 4
+        service = Service.objects.create(name="bench-stock-service", price=1)
+        product = Product.objects.create(name="bench-stock-product", price=1, quantity=stock)
+        StockMovement.objects.create(product=product, delta=stock, reason=StockMovement.REASON_OPENING)
+
+        counts = {"sold": 0, "rejected": 0, "retries": 0}
+        invoice_ids = []
+        lock = threading.Lock()
+        start = threading.Barrier(sellers)
+
+        def seller():
+            close_old_connections()
+            start.wait()
+            try:
+                for _ in range(sales):
+                    payload = {
+                        "customer_name": "bench-stock",
+                        "items": [{"service": service.pk, "product": product.pk, "quantity": 1, "price": "1"}],
+                    }
+                    while True:
+                        serializer = InvoiceCreateSerializer(data=payload)
+                        serializer.is_valid(raise_exception=True)
+                        try:
+                            invoice, outcome = serializer.save(), "sold"
+                            break
+                        except ValidationError:
+                            invoice, outcome = None, "rejected"
+                            break
+                        except OperationalError:
+                            # SQLite "database is locked": back off and retry the whole sale.
+                            with lock:
+                                counts["retries"] += 1
+                            time.sleep(0.005)
+                    with lock:
+                        counts[outcome] += 1
+                        if invoice is not None:
+                            invoice_ids.append(invoice.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=seller) for _ in range(sellers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        ledger = product.movements.aggregate(total=Sum("delta"))["total"]
+        expected = stock - counts["sold"]
+        attempts = sellers * sales
+        self.stdout.write(
+            f"{connection.vendor}: {sellers} sellers x {sales} sales, starting stock {stock}\n"
+            f"  sold {counts['sold']}, rejected (out of stock) {counts['rejected']}, lock retries {counts['retries']}\n"
+            f"  {attempts / elapsed:.1f} sales/s ({elapsed:.2f}s)\n"
+            f"  on hand {product.quantity}, ledger {ledger}, expected {expected}"
+        )
+        ok = product.quantity == expected == ledger and counts["sold"] <= stock
+        if ok:
+            self.stdout.write(self.style.SUCCESS("No lost updates."))
+        else:
+            self.stdout.write(self.style.ERROR("Lost or duplicated stock updates detected."))
+
+        if not options["keep"]:
+            Invoice.objects.filter(pk__in=invoice_ids).delete()
+            product.delete()
+            service.delete()
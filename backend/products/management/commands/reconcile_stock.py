@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.stock import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached Product.quantity from the stock movement ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        drift = reconcile(dry_run=options["dry_run"])
+        for product_id, cached, expected in drift:
+            self.stdout.write(f"product {product_id}: cached {cached}, ledger {expected}")
+        verb = "found" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} product(s) {verb}."))
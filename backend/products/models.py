@@ -8,3 +8,35 @@ class Product(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class StockMovement(models.Model):
+    REASON_OPENING = "opening"
+    REASON_ADJUSTMENT = "adjustment"
+    REASON_SALE = "sale"
+    REASON_SALE_RETURN = "sale_return"
+    REASON_CHOICES = [
+        (REASON_OPENING, "Opening balance"),
+        (REASON_ADJUSTMENT, "Adjustment"),
+        (REASON_SALE, "Sale"),
+        (REASON_SALE_RETURN, "Sale return"),
+    ]
+
+    product = models.ForeignKey(Product, related_name="movements", on_delete=models.CASCADE)
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    invoice = models.ForeignKey(
+        "invoices.Invoice",
+        related_name="stock_movements",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["product", "created_at"])]
+
+    def __str__(self):
+        return f"{self.product} {self.delta:+d} ({self.reason})"
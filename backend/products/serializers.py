@@ -1,7 +1,19 @@
 from rest_framework import serializers
-from .models import Product
+from .models import Product, StockMovement
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
+
+    def update(self, instance, validated_data):
+        # Stock changes go through the ledger (products/{id}/movements/), never a blind overwrite.
+        validated_data.pop('quantity', None)
+        return super().update(instance, validated_data)
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'product', 'delta', 'reason', 'invoice', 'note', 'created_at']
+        read_only_fields = ['product', 'reason', 'invoice', 'created_at']
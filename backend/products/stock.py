@@ -0,0 +1,136 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from core.changefeed import record_changes
+from core.sqlite import write_atomic
+from .models import Product, StockMovement
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f"Insufficient stock for product {product_id} (requested {requested})")
+
+
+def _lock(product_ids):
+    # Row locks in pk order so concurrent sellers never deadlock. SQLite has
+    # no row locks; its single writer lock already serializes the updates.
+    if connection.features.has_select_for_update and product_ids:
+        list(
+            Product.objects.select_for_update()
+            .filter(pk__in=product_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+
+def _take(product_id, quantity):
+    # Conditional F() update: the check and the decrement are one statement.
+    updated = (
+        Product.objects
+        .filter(pk=product_id, quantity__gte=quantity)
+        .update(quantity=F("quantity") - quantity)
+    )
+    if not updated:
+        raise InsufficientStock(product_id, quantity)
+    record_changes("product", [product_id])
+
+
+def _give(product_id, quantity):
+    Product.objects.filter(pk=product_id).update(quantity=F("quantity") + quantity)
+    record_changes("product", [product_id])
+
+
+def reserve(invoice, lines):
+    """Take stock for ``lines`` of ``(product_id, quantity)`` sold on ``invoice``."""
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        if product_id and quantity:
+            totals[product_id] += quantity
+    if not totals:
+        return []
+    with write_atomic():
+        _lock(list(totals))
+        for product_id in sorted(totals):
+            _take(product_id, totals[product_id])
+        return StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                delta=-quantity,
+                reason=StockMovement.REASON_SALE,
+                invoice=invoice,
+            )
+            for product_id, quantity in sorted(totals.items())
+        ])
+
+
+def release(invoice):
+    """Return whatever stock ``invoice`` still holds."""
+    with write_atomic():
+        held = {
+            row["product"]: -row["total"]
+            for row in (
+                StockMovement.objects
+                .filter(invoice=invoice)
+                .values("product")
+                .annotate(total=Sum("delta"))
+            )
+            if row["total"]
+        }
+        if not held:
+            return []
+        _lock(list(held))
+        for product_id in sorted(held):
+            _give(product_id, held[product_id])
+        return StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                delta=quantity,
+                reason=StockMovement.REASON_SALE_RETURN,
+                invoice=invoice,
+            )
+            for product_id, quantity in sorted(held.items())
+        ])
+
+
+def adjust(product, delta, reason=StockMovement.REASON_ADJUSTMENT, note=""):
+    with write_atomic():
+        _lock([product.pk])
+        if delta < 0:
+            _take(product.pk, -delta)
+        elif delta > 0:
+            _give(product.pk, delta)
+        return StockMovement.objects.create(product=product, delta=delta, reason=reason, note=note)
+
+
+def reconcile(dry_run=False):
+    """
+    Recompute ``Product.quantity`` from the ledger. Returns a list of
+    ``(product_id, cached, ledger)`` for every product that was out of sync.
+    """
+    ledger = dict(
+        StockMovement.objects.values("product").annotate(total=Sum("delta")).values_list("product", "total")
+    )
+    drift = []
+    for product_id, cached in Product.objects.values_list("pk", "quantity").iterator():
+        expected = ledger.get(product_id) or 0
+        if cached != expected:
+            drift.append((product_id, cached, expected))
+    if drift and not dry_run:
+        # Recompute inside the UPDATE so a sale committed meanwhile is not overwritten.
+        ledger_total = Subquery(
+            StockMovement.objects
+            .filter(product=OuterRef("pk"))
+            .values("product")
+            .annotate(total=Sum("delta"))
+            .values("total")
+        )
+        Product.objects.filter(pk__in=[row[0] for row in drift]).update(
+            quantity=Greatest(Coalesce(ledger_total, Value(0)), Value(0))
+        )
+        record_changes("product", [row[0] for row in drift])
+    return drift
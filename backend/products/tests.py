@@ -1,3 +1,67 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from rest_framework.test import APIClient
+
+from core.models import Service
+
+from .models import Product, StockMovement
+from .stock import reconcile
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_quantity_changes_only_through_movements(self):
+        product = self.client.post("/api/products/", {"name": "Board", "price": "10", "quantity": 4}, format="json").data
+        self.client.patch(f"/api/products/{product['id']}/", {"quantity": 99}, format="json")
+        self.assertEqual(Product.objects.get(pk=product["id"]).quantity, 4)
+
+        response = self.client.post(f"/api/products/{product['id']}/movements/", {"delta": -5}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f"/api/products/{product['id']}/movements/", {"delta": -3}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get(pk=product["id"]).quantity, 1)
+        self.assertEqual(reconcile(dry_run=True), [])
+
+    def test_admin_edits_stock_through_the_ledger(self):
+        client = Client()
+        client.force_login(self.admin)
+        client.post("/admin/products/product/add/", {"name": "Board", "price": "10", "stock_delta": 4})
+        product = Product.objects.get(name="Board")
+        self.assertEqual(product.quantity, 4)
+
+        change = f"/admin/products/product/{product.pk}/change/"
+        client.post(change, {"name": "Board", "price": "12", "quantity": 99, "stock_delta": -1, "stock_note": "damaged"})
+        self.assertEqual(client.post(change, {"name": "Board", "price": "12", "stock_delta": -9}).status_code, 200)
+        product.refresh_from_db()
+        self.assertEqual((product.price, product.quantity), (12, 3))
+        self.assertEqual(
+            list(product.movements.order_by("id").values_list("reason", "delta")),
+            [(StockMovement.REASON_OPENING, 4), (StockMovement.REASON_ADJUSTMENT, -1)],
+        )
+        self.assertEqual(reconcile(dry_run=True), [])
+
+    def test_sold_product_cannot_be_deleted(self):
+        product = Product.objects.create(name="Board", price=10, quantity=5)
+        service = Service.objects.create(name="CNC", price=100)
+        item = {"service": service.pk, "product": product.pk, "quantity": 1, "price": "100"}
+        self.client.post("/api/invoices/", {"customer_name": "Ahmad", "items": [item]}, format="json")
+
+        response = self.client.delete(f"/api/products/{product.pk}/")
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Product.objects.filter(pk=product.pk).exists())
+        unsold = Product.objects.create(name="Glue", price=1, quantity=0)
+        self.assertEqual(self.client.delete(f"/api/products/{unsold.pk}/").status_code, 204)
+
+    def test_reconcile_fixes_drift(self):
+        product = Product.objects.create(name="Glue", price=1, quantity=7)
+        StockMovement.objects.create(product=product, delta=5, reason=StockMovement.REASON_OPENING)
+        call_command("reconcile_stock", stdout=StringIO())
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 5)
@@ -1,11 +1,53 @@
-from django.shortcuts import render
-from rest_framework import viewsets
+from django.db.models import ProtectedError
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from .models import Product
-from .serializers import ProductSerializer
+from rest_framework.response import Response
+from .models import Product, StockMovement
+from .serializers import ProductSerializer, StockMovementSerializer
+from .stock import InsufficientStock, adjust
+from core.middleware import SerializerTimingMixin
 from core.permissions import IsAdminOrReadOnly
+from core.sqlite import write_atomic
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all().order_by('-created_at')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def perform_create(self, serializer):
+        with write_atomic():
+            product = serializer.save()
+            if product.quantity:
+                StockMovement.objects.create(
+                    product=product,
+                    delta=product.quantity,
+                    reason=StockMovement.REASON_OPENING,
+                )
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {'detail': 'این کالا در فاکتورها فروخته شده و قابل حذف نیست.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+    @action(detail=True, methods=['get', 'post'], serializer_class=StockMovementSerializer)
+    def movements(self, request, pk=None):
+        product = self.get_object()
+        if request.method == 'GET':
+            movements = product.movements.order_by('-created_at', '-id')
+            page = self.paginate_queryset(movements)
+            if page is not None:
+                return self.get_paginated_response(StockMovementSerializer(page, many=True).data)
+            return Response(StockMovementSerializer(movements, many=True).data)
+
+        serializer = StockMovementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            movement = adjust(product, serializer.validated_data['delta'], note=serializer.validated_data.get('note', ''))
+        except InsufficientStock:
+            return Response({'detail': 'موجودی کافی نیست.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(StockMovementSerializer(movement).data, status=status.HTTP_201_CREATED)
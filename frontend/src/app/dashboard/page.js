@@ -1,6 +1,6 @@
 "use client";
 import { useEffect, useState } from "react";
-import { getFinanceSummary, getFinanceReport, getInvoices, getExpenses, getEmployees, getCompanySettings } from "@/lib/api";
+import { batchGet, subscribeEvents } from "@/lib/api";
 import { formatPersianDate } from "@/lib/date";
 import { useI18n } from "@/components/i18n/I18nProvider";
 
@@ -60,7 +60,6 @@ export default function DashboardPage() {
   const [report, setReport] = useState({ total_sales: 0, total_expenses: 0, profit: 0 });
   const [invoices, setInvoices] = useState([]);
   const [expenses, setExpenses] = useState([]);
-  const [employees, setEmployees] = useState([]);
   const [company, setCompany] = useState({ company_name: "", address: "", phone: "" });
   const [query, setQuery] = useState("");
   const [loading, setLoading] = useState(true);
@@ -82,19 +81,14 @@ export default function DashboardPage() {
         setLoading(false);
         return;
       }
-      const [s, r, inv, exp, emp, cs] = await Promise.all([
-        getFinanceSummary(token),
-        getFinanceReport(token),
-        getInvoices(token),
-        getExpenses(token, {}),
-        getEmployees(token),
-        getCompanySettings(token),
-      ]);
-      setSummary(s);
-      setReport(r);
-      setInvoices(inv.slice(0, 5));
-      setExpenses(exp.slice(0, 5));
-      setEmployees(emp);
+      const [s, r, inv, cs, exp] = await batchGet(
+        ["/invoices/summary/", "/finance/report/", "/invoices/?page_size=5", "/settings/company/", "/finance/expenses/?page_size=5"],
+        token
+      );
+      setSummary(s || { today_income: 0, invoice_count: 0, total_sales: 0 });
+      setReport(r || { total_sales: 0, total_expenses: 0, profit: 0 });
+      setInvoices(inv?.results || []);
+      setExpenses(exp?.results || []);
       setCompany({
         company_name: cs?.company_name || "",
         address: cs?.address || "",
@@ -111,6 +105,41 @@ export default function DashboardPage() {
     load();
   }, []);
 
+  // Live deltas instead of refetching; "resync" means this client fell behind.
+  useEffect(() => {
+    const token = getToken();
+    if (!token) return undefined;
+    const upsert = (rows, row) =>
+      rows.some((r) => r.id === row.id)
+        ? rows.map((r) => (r.id === row.id ? { ...r, ...row } : r))
+        : [row, ...rows].slice(0, 5);
+    return subscribeEvents(token, (event) => {
+      if (event.type === "resync") {
+        load();
+        return;
+      }
+      if ("today_income" in event) {
+        setSummary((prev) => ({ ...prev, today_income: event.today_income, invoice_count: event.invoice_count }));
+      }
+      if (event.type === "invoice") {
+        setInvoices((prev) =>
+          upsert(prev, {
+            id: event.id,
+            customer_name: event.customer_name,
+            total_amount: event.total,
+            ...(prev.some((r) => r.id === event.id) ? {} : { created_at: new Date().toISOString() }),
+          })
+        );
+      } else if (event.type === "invoice_deleted") {
+        setInvoices((prev) => prev.filter((r) => r.id !== event.id));
+      } else if (event.type === "expense") {
+        setExpenses((prev) => upsert(prev, event));
+      } else if (event.type === "expense_deleted") {
+        setExpenses((prev) => prev.filter((r) => r.id !== event.id));
+      }
+    });
+  }, []);
+
   useEffect(() => {
     if (typeof window === "undefined") return;
     const q = localStorage.getItem("dashboard_query");
@@ -150,7 +179,7 @@ export default function DashboardPage() {
     );
   }
 
-  const totalSalaries = employees.reduce((sum, e) => sum + Number(e.salary || 0), 0);
+  const totalSalaries = Number(report.total_salaries || 0);
   const computedProfit = Number(report.profit || 0) || (Number(report.total_sales || 0) - Number(report.total_expenses || 0));
   const profit = Number(computedProfit || 0) - Number(totalSalaries || 0);
   const salesGross = Number(report.total_sales || summary.total_sales || 0);
@@ -3,6 +3,8 @@ import { useEffect, useState } from "react";
 import { createEmployee, deleteEmployee, getCurrentUser, getEmployees, refreshAccessToken } from "@/lib/api";
 import { useI18n } from "@/components/i18n/I18nProvider";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
+import { usePagedList } from "@/lib/usePagedList";
 import { showToast } from "@/lib/toast";
 
 function Card({ children, className = "" }) {
@@ -15,7 +17,7 @@ function Card({ children, className = "" }) {
 
 export default function EmployeesPage() {
   const { t } = useI18n();
-  const [employees, setEmployees] = useState([]);
+  const { rows: employees, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [form, setForm] = useState({ name: "", role: "", salary: "" });
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
@@ -48,7 +50,7 @@ export default function EmployeesPage() {
         return;
       }
       const [data, user] = await Promise.all([getEmployees(token), getCurrentUser(token)]);
-      setEmployees(data);
+      reset(data);
       setIsAdmin(Boolean(user?.is_staff));
     } catch (e) {
       setError("خطا در دریافت شاگردان");
@@ -222,6 +224,7 @@ export default function EmployeesPage() {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
       </Card>
     </div>
   );
@@ -1,10 +1,12 @@
 "use client";
 import { useEffect, useMemo, useState } from "react";
 import { useSearchParams } from "next/navigation";
-import { createExpense, deleteExpense, getExpenses, getFinanceReport, getInvoices, getServices, createInvoice } from "@/lib/api";
+import { createExpense, deleteExpense, fetchAllPages, getCatalog, getExpenses, getFinanceReport, createInvoice } from "@/lib/api";
 import { formatPersianDate } from "@/lib/date";
 import { useI18n } from "@/components/i18n/I18nProvider";
 import { showToast } from "@/lib/toast";
+import { usePagedList } from "@/lib/usePagedList";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
 
 function Card({ children, className = "" }) {
   return (
@@ -22,9 +24,7 @@ export default function FinancePage() {
   const { t } = useI18n();
   const searchParams = useSearchParams();
   const [report, setReport] = useState({ total_sales: 0, total_expenses: 0, profit: 0, total_invoices: 0, top_products: [] });
-  const [expenses, setExpenses] = useState([]);
-  const [invoices, setInvoices] = useState([]);
-  const [services, setServices] = useState([]);
+  const { rows: expenses, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [form, setForm] = useState({ title: "", amount: "", category: "" });
   const [showExpenseModal, setShowExpenseModal] = useState(false);
   const [filters, setFilters] = useState({ start: "", end: "" });
@@ -50,16 +50,9 @@ export default function FinancePage() {
         return;
       }
       const params = { start: nextFilters?.start ?? filters.start, end: nextFilters?.end ?? filters.end };
-      const [r, e, inv, svc] = await Promise.all([
-        getFinanceReport(token, params),
-        getExpenses(token, params),
-        getInvoices(token),
-        getServices(token),
-      ]);
+      const [r, e] = await Promise.all([getFinanceReport(token, params), getExpenses(token, params)]);
       setReport(r);
-      setExpenses(e);
-      setInvoices(inv);
-      setServices(svc);
+      reset(e);
     } catch (e) {
       setError(t("errorFinanceLoad") || "خطا در دریافت اطلاعات مالی");
     } finally {
@@ -164,8 +157,32 @@ export default function FinancePage() {
     }
   }
 
-  function onBackupData() {
+  // Full lists only for explicit exports and imports, fetched when asked for.
+  async function allRows(token, params) {
+    const [invoices, expenses] = await Promise.all([
+      fetchAllPages("/invoices/", token, params),
+      fetchAllPages("/finance/expenses/", token, params),
+    ]);
+    return { invoices, expenses };
+  }
+
+  async function onBackupData() {
     if (typeof window === "undefined") return;
+    const token = getToken();
+    if (!token) {
+      setError(t("loginRequired"));
+      return;
+    }
+    setBusy(true);
+    let invoices, expenses;
+    try {
+      ({ invoices, expenses } = await allRows(token));
+    } catch (e) {
+      setError(t("errorFinanceLoad") || "خطا در دریافت اطلاعات مالی");
+      return;
+    } finally {
+      setBusy(false);
+    }
     const payload = {
       version: 1,
       exported_at: new Date().toISOString(),
@@ -221,8 +238,10 @@ export default function FinancePage() {
           (inv.items || []).map(invoiceItemKey).join(","),
         ].join("|");
 
-      const existingExpenseKeys = new Set(expenses.map(expenseKey));
-      const existingInvoiceKeys = new Set(invoices.map(invoiceKey));
+      const [existing, catalog] = await Promise.all([allRows(token), getCatalog(token)]);
+      const services = catalog.services;
+      const existingExpenseKeys = new Set(existing.expenses.map(expenseKey));
+      const existingInvoiceKeys = new Set(existing.invoices.map(invoiceKey));
       const duplicateExpenses = importExpenses.filter((e) => existingExpenseKeys.has(expenseKey(e)));
       const duplicateInvoices = importInvoices.filter((i) => existingInvoiceKeys.has(invoiceKey(i)));
 
@@ -309,23 +328,18 @@ export default function FinancePage() {
     load(next);
   }
 
-  function filterByDate(list, dateKey) {
-    if (!filters.start && !filters.end) return list;
-    const start = filters.start ? new Date(filters.start) : null;
-    const end = filters.end ? new Date(filters.end) : null;
-    return list.filter((item) => {
-      const dt = new Date(item[dateKey]);
-      if (start && dt < start) return false;
-      if (end && dt > new Date(end.getTime() + 24 * 60 * 60 * 1000 - 1)) return false;
-      return true;
-    });
-  }
-
-  function onPrintReport() {
-    const printableExpenses = filterByDate(expenses, "date");
-    const printableInvoices = filterByDate(invoices, "created_at");
+  async function onPrintReport() {
     const win = window.open("", "_blank", "width=900,height=700");
     if (!win) return;
+    const token = getToken();
+    let printableInvoices, printableExpenses;
+    try {
+      ({ invoices: printableInvoices, expenses: printableExpenses } = await allRows(token, filters));
+    } catch (e) {
+      win.close();
+      setError(t("errorFinanceLoad") || "خطا در دریافت اطلاعات مالی");
+      return;
+    }
 
     const reportTitle = t("reportTitle") || "گزارش مالی";
     const reportSubtitle = t("reportSubtitle") || "گزارش مالی کارخانه نجاری";
@@ -556,6 +570,7 @@ export default function FinancePage() {
             ))}
             {expenses.length === 0 && <div className="text-[var(--muted)] text-sm">{t("noExpenses")}</div>}
           </div>
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
         </Card>
       </div>
 
@@ -1,7 +1,9 @@
 "use client";
 import { useEffect, useState } from "react";
-import { createProduct, deleteProduct, getProducts, updateProduct } from "@/lib/api";
+import { adjustStock, createProduct, deleteProduct, getProducts, updateProduct } from "@/lib/api";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
+import { usePagedList } from "@/lib/usePagedList";
 import { showToast } from "@/lib/toast";
 
 function Card({ children, className = "" }) {
@@ -13,7 +15,7 @@ function Card({ children, className = "" }) {
 }
 
 export default function ProductsPage() {
-  const [products, setProducts] = useState([]);
+  const { rows: products, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [form, setForm] = useState({ name: "", price: "", quantity: "" });
   const [editing, setEditing] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -35,15 +37,7 @@ export default function ProductsPage() {
         setLoading(false);
         return;
       }
-      const data = await getProducts(token);
-
-      if (Array.isArray(data)) {
-        setProducts(data);
-      } else if (data?.results) {
-        setProducts(data.results);
-      } else {
-        setProducts([]);
-      }
+      reset(await getProducts(token));
     } catch (e) {
       setError("خطا در دریافت محصولات");
     } finally {
@@ -99,10 +93,13 @@ export default function ProductsPage() {
         {
           name: editing.name,
           price: Number(editing.price || 0),
-          quantity: Number(editing.quantity || 0),
         },
         token
       );
+      const delta = Number(editing.quantity || 0) - Number(editing.originalQuantity || 0);
+      if (delta !== 0) {
+        await adjustStock(editing.id, delta, token);
+      }
       setEditing(null);
       showToast("ویرایش محصول با موفقیت انجام شد.");
       load();
@@ -217,7 +214,7 @@ export default function ProductsPage() {
                   <td className="p-2">{p.quantity}</td>
                   <td className="p-2 space-x-2 space-x-reverse">
                     <button
-                      onClick={() => setEditing({ id: p.id, name: p.name, price: p.price, quantity: p.quantity })}
+                      onClick={() => setEditing({ id: p.id, name: p.name, price: p.price, quantity: p.quantity, originalQuantity: p.quantity })}
                       className="text-sky-400 hover:text-sky-300"
                     >
                       ویرایش
@@ -236,6 +233,7 @@ export default function ProductsPage() {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
       </Card>
     </div>
   );
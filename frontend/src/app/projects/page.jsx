@@ -2,6 +2,8 @@
 import { useEffect, useState } from "react";
 import { createProject, deleteProject, getProjects } from "@/lib/api";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
+import { usePagedList } from "@/lib/usePagedList";
 import { showToast } from "@/lib/toast";
 
 function Card({ children, className = "" }) {
@@ -13,7 +15,7 @@ function Card({ children, className = "" }) {
 }
 
 export default function ProjectsPage() {
-  const [projects, setProjects] = useState([]);
+  const { rows: projects, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [saving, setSaving] = useState(false);
@@ -43,8 +45,7 @@ export default function ProjectsPage() {
         setLoading(false);
         return;
       }
-      const data = await getProjects(token);
-      setProjects(data);
+      reset(await getProjects(token));
     } catch (e) {
       setError("خطا در دریافت پروژه‌ها");
     } finally {
@@ -170,6 +171,7 @@ export default function ProjectsPage() {
           <div className="text-gray-500 text-sm">هیچ پروژه‌ای ثبت نشده است.</div>
         )}
       </div>
+      <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
     </div>
   );
 }
@@ -1,6 +1,6 @@
 "use client";
 import { useEffect, useMemo, useState } from "react";
-import { getExpenses, getFinanceMonthly, getFinanceReport, getInvoices } from "@/lib/api";
+import { fetchAllPages, getFinanceMonthly, getFinanceReport } from "@/lib/api";
 import { formatPersianDate } from "@/lib/date";
 import { useI18n } from "@/components/i18n/I18nProvider";
 
@@ -20,8 +20,6 @@ export default function ReportsPage() {
   const { t } = useI18n();
   const [report, setReport] = useState({ total_sales: 0, total_expenses: 0, profit: 0, total_invoices: 0, top_products: [] });
   const [monthly, setMonthly] = useState([]);
-  const [expenses, setExpenses] = useState([]);
-  const [invoices, setInvoices] = useState([]);
   const [filters, setFilters] = useState({ start: "", end: "" });
   const [range, setRange] = useState("week");
   const [loading, setLoading] = useState(true);
@@ -43,16 +41,9 @@ export default function ReportsPage() {
         return;
       }
       const params = { start: nextFilters?.start ?? filters.start, end: nextFilters?.end ?? filters.end };
-      const [r, m, e, inv] = await Promise.all([
-        getFinanceReport(token, params),
-        getFinanceMonthly(token, params),
-        getExpenses(token, params),
-        getInvoices(token),
-      ]);
+      const [r, m] = await Promise.all([getFinanceReport(token, params), getFinanceMonthly(token, params)]);
       setReport(r);
       setMonthly(m);
-      setExpenses(e);
-      setInvoices(inv);
     } catch (e) {
       setError("خطا در دریافت اطلاعات مالی");
     } finally {
@@ -113,23 +104,22 @@ export default function ReportsPage() {
     load(next);
   }
 
-  function filterByDate(list, dateKey) {
-    if (!filters.start && !filters.end) return list;
-    const start = filters.start ? new Date(filters.start) : null;
-    const end = filters.end ? new Date(filters.end) : null;
-    return list.filter((item) => {
-      const dt = new Date(item[dateKey]);
-      if (start && dt < start) return false;
-      if (end && dt > new Date(end.getTime() + 24 * 60 * 60 * 1000 - 1)) return false;
-      return true;
-    });
-  }
-
-  function onPrintReport() {
-    const printableExpenses = filterByDate(expenses, "date");
-    const printableInvoices = filterByDate(invoices, "created_at");
+  // The rows of the chosen range are fetched only when a printout is asked for.
+  async function onPrintReport() {
     const win = window.open("", "_blank", "width=900,height=700");
     if (!win) return;
+    let printableInvoices, printableExpenses;
+    try {
+      const token = getToken();
+      [printableInvoices, printableExpenses] = await Promise.all([
+        fetchAllPages("/invoices/", token, filters),
+        fetchAllPages("/finance/expenses/", token, filters),
+      ]);
+    } catch (e) {
+      win.close();
+      setError("خطا در دریافت اطلاعات مالی");
+      return;
+    }
 
     const rowsExpenses = printableExpenses
       .map(
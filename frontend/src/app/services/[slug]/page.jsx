@@ -1,7 +1,7 @@
 "use client";
 import { useEffect, useMemo, useState } from "react";
 import ServiceSection from "@/components/services/ServiceSection";
-import { getServices } from "@/lib/api";
+import { getCatalog } from "@/lib/api";
 import { useI18n } from "@/components/i18n/I18nProvider";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
 
@@ -36,8 +36,9 @@ export default function ServiceDynamicPage({ params }) {
           setLoading(false);
           return;
         }
-        const data = await getServices(token);
-        setServices(data);
+        // The locally cached catalog holds every service, not just one list page.
+        const catalog = await getCatalog(token);
+        setServices(catalog.services);
       } catch (e) {
         setError(t("errorServiceLoad") || "خطا در دریافت خدمات");
       } finally {
@@ -1,8 +1,10 @@
 "use client";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { createService, deleteService, getServices, updateService } from "@/lib/api";
 import { useI18n } from "@/components/i18n/I18nProvider";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
+import { usePagedList } from "@/lib/usePagedList";
 import { showToast } from "@/lib/toast";
 
 function Card({ children, className = "" }) {
@@ -15,7 +17,7 @@ function Card({ children, className = "" }) {
 
 export default function ServicesPage() {
   const { t } = useI18n();
-  const [services, setServices] = useState([]);
+  const { rows: services, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [form, setForm] = useState({ name: "", price: "" });
   const [editing, setEditing] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -23,6 +25,7 @@ export default function ServicesPage() {
   const [error, setError] = useState("");
   const [success, setSuccess] = useState("");
   const [query, setQuery] = useState("");
+  const searchTimer = useRef(null);
 
   function getToken() {
     if (typeof window === "undefined") return null;
@@ -40,8 +43,7 @@ export default function ServicesPage() {
         setLoading(false);
         return;
       }
-      const data = await getServices(token);
-      setServices(data);
+      reset(await getServices(token, { search: query.trim() }));
     } catch (e) {
       setError("خطا در دریافت خدمات");
     } finally {
@@ -53,6 +55,17 @@ export default function ServicesPage() {
     load();
   }, []);
 
+  // Searched on the server: the match may be on a page not loaded yet.
+  function onSearch(value) {
+    setQuery(value);
+    clearTimeout(searchTimer.current);
+    searchTimer.current = setTimeout(async () => {
+      const token = getToken();
+      if (!token) return;
+      reset(await getServices(token, { search: value.trim() }));
+    }, 300);
+  }
+
   async function onCreate(e) {
     e.preventDefault();
     setSaving(true);
@@ -149,10 +162,6 @@ export default function ServicesPage() {
       .replace(/[^a-z0-9\-]/g, "");
   }
 
-  const filteredServices = services.filter((s) =>
-    String(s.name || "").toLowerCase().includes(String(query || "").trim().toLowerCase())
-  );
-
   return (
     <div className="space-y-6">
       <div className="flex items-center justify-between">
@@ -174,13 +183,13 @@ export default function ServicesPage() {
             className="w-64 bg-[var(--panel-bg)] border border-[var(--border-color)] rounded-full px-4 py-2 outline-none"
             placeholder={t("searchServices")}
             value={query}
-            onChange={(e) => setQuery(e.target.value)}
+            onChange={(e) => onSearch(e.target.value)}
           />
         </div>
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
-        {filteredServices.map((item) => (
+        {services.map((item) => (
           <a
             key={item.id}
             href={`/services/${toSlug(item.name)}`}
@@ -190,7 +199,7 @@ export default function ServicesPage() {
             <div className="text-xl font-extrabold text-amber-300">{item.name}</div>
           </a>
         ))}
-        {filteredServices.length === 0 && (
+        {services.length === 0 && (
           <div className="col-span-full text-center text-[var(--muted)]">{t("noInvoices")}</div>
         )}
       </div>
@@ -267,7 +276,7 @@ export default function ServicesPage() {
               </tr>
             </thead>
             <tbody>
-              {filteredServices.map((s) => (
+              {services.map((s) => (
                 <tr key={s.id} className="border-b border-[var(--border-color)]">
                   <td className="p-2">{s.id}</td>
                   <td className="p-2">{s.name}</td>
@@ -296,6 +305,7 @@ export default function ServicesPage() {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
       </Card>
     </div>
   );
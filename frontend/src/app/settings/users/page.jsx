@@ -5,6 +5,8 @@ import Link from "next/link";
 import { useAdmin } from "@/lib/useAdmin";
 import { useI18n } from "@/components/i18n/I18nProvider";
 import LoadingSkeleton from "@/components/common/LoadingSkeleton";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
+import { usePagedList } from "@/lib/usePagedList";
 import { showToast } from "@/lib/toast";
 
 function Card({ children, className = "" }) {
@@ -18,7 +20,7 @@ function Card({ children, className = "" }) {
 export default function UsersSettingsPage() {
   const { isAdmin, loading: adminLoading } = useAdmin();
   const { t } = useI18n();
-  const [users, setUsers] = useState([]);
+  const { rows: users, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [saving, setSaving] = useState(false);
@@ -39,8 +41,7 @@ export default function UsersSettingsPage() {
         setError(t("loginRequired"));
         return;
       }
-      const data = await getUsers(token);
-      setUsers(data);
+      reset(await getUsers(token));
     } catch (e) {
       setError(t("errorUsersLoad") || "خطا در دریافت کاربران");
     } finally {
@@ -201,6 +202,7 @@ export default function UsersSettingsPage() {
               </tbody>
             </table>
           </div>
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
         </Card>
       </div>
     </div>
@@ -0,0 +1,17 @@
+"use client";
+
+export default function LoadMoreButton({ hasMore, loading, onClick, className = "" }) {
+  if (!hasMore) return null;
+  return (
+    <div className={`flex justify-center pt-4 ${className}`}>
+      <button
+        type="button"
+        onClick={onClick}
+        disabled={loading}
+        className="px-4 py-2 rounded-full bg-white/5 hover:bg-white/10 text-gray-200 text-sm disabled:opacity-50"
+      >
+        {loading ? "در حال بارگذاری..." : "نمایش بیشتر"}
+      </button>
+    </div>
+  );
+}
@@ -7,9 +7,11 @@ import {
   createInvoice,
   updateInvoice,
   deleteInvoice,
-  getServices,
+  getCatalog,
 } from "@/lib/api";
 import { formatPersianDate } from "@/lib/date";
+import { usePagedList } from "@/lib/usePagedList";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
 
 const DEFAULT_ITEM = { service: "", quantity: 1, price: "", discount: "" };
 
@@ -28,7 +30,7 @@ function getPricePlaceholder(serviceName = "") {
 }
 
 export default function InvoiceManager() {
-  const [invoices, setInvoices] = useState([]);
+  const { rows: invoices, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [services, setServices] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
@@ -59,11 +61,12 @@ export default function InvoiceManager() {
         setLoading(false);
         return;
       }
-      const [data, svc] = await Promise.all([
+      const [data, catalog] = await Promise.all([
         getInvoices(token),
-        getServices(token),
+        getCatalog(token),
       ]);
-      setInvoices(data);
+      const svc = catalog.services;
+      reset(data);
       const uniq = new Map();
       svc.forEach((s) => {
         const key = String(s.name || "").trim().toLowerCase();
@@ -529,6 +532,7 @@ export default function InvoiceManager() {
             بلی ثبت نشده است.
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
       </div>
     </div>
   );
@@ -1,8 +1,10 @@
 "use client";
 import { useEffect, useMemo, useState } from "react";
-import { getInvoices, getServices } from "@/lib/api";
+import { getCatalog, getInvoices } from "@/lib/api";
 import { formatPersianDate } from "@/lib/date";
 import { useI18n } from "@/components/i18n/I18nProvider";
+import { usePagedList } from "@/lib/usePagedList";
+import LoadMoreButton from "@/components/common/LoadMoreButton";
 
 function PencilIcon({ className = "" }) {
   return (
@@ -26,7 +28,7 @@ export default function ServiceSection({ title, tag }) {
   const { t } = useI18n();
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
-  const [invoices, setInvoices] = useState([]);
+  const { rows: invoices, hasMore, loadingMore, reset, loadMore } = usePagedList();
   const [services, setServices] = useState([]);
 
   function getToken() {
@@ -45,8 +47,11 @@ export default function ServiceSection({ title, tag }) {
           setLoading(false);
           return;
         }
-        const [inv, svc] = await Promise.all([getInvoices(token), getServices(token)]);
-        setInvoices(inv);
+        // Only this service's invoices, a page at a time (filtered on the server).
+        const svc = (await getCatalog(token)).services;
+        const name = String(tag || title || "").trim().toLowerCase();
+        const ids = svc.filter((s) => String(s.name || "").trim().toLowerCase() === name).map((s) => s.id);
+        reset(ids.length ? await getInvoices(token, { service: ids.join(",") }) : null);
         setServices(svc);
       } catch (e) {
         setError(t("errorServiceLoad") || "خطا در دریافت اطلاعات خدمات");
@@ -145,6 +150,7 @@ export default function ServiceSection({ title, tag }) {
         {items.length === 0 && !error && (
           <div className="col-span-full text-center text-gray-500">{t("noServiceItems")}</div>
         )}
+        <LoadMoreButton className="col-span-full" hasMore={hasMore} loading={loadingMore} onClick={() => loadMore(getToken())} />
       </div>
       )}
     </div>
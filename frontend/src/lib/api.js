@@ -15,6 +15,109 @@ function buildQuery(params = {}) {
   return qs ? `?${qs}` : "";
 }
 
+// Cursor-paginated lists: { next, previous, results, count | estimated_count }.
+// Screens load one page and fetch the next on demand with fetchNextPage(page.next).
+export const EMPTY_PAGE = { results: [], next: null, previous: null };
+
+async function fetchPageUrl(url, token) {
+  const res = await fetch(url, { cache: "no-cache", headers: authHeaders(token) });
+  if (!res.ok) throw new Error(`Failed to load ${url}`);
+  const data = await res.json();
+  return Array.isArray(data) ? { ...EMPTY_PAGE, results: data } : data;
+}
+
+export async function fetchPage(path, token, params) {
+  return fetchPageUrl(`${API_BASE}${path}${buildQuery(params)}`, token);
+}
+
+export async function fetchNextPage(next, token) {
+  return next ? fetchPageUrl(next, token) : EMPTY_PAGE;
+}
+
+// Every row of a (filtered) list, for explicit exports such as a printed date range only.
+export async function* iteratePages(path, token, params) {
+  let page = await fetchPage(path, token, { page_size: 500, ...params });
+  for (;;) {
+    yield page.results;
+    if (!page.next) return;
+    page = await fetchPageUrl(page.next, token);
+  }
+}
+
+export async function fetchAllPages(path, token, params) {
+  const rows = [];
+  for await (const results of iteratePages(path, token, params)) {
+    rows.push(...results);
+  }
+  return rows;
+}
+
+async function firstPage(path, token, params) {
+  try {
+    return await fetchPage(path, token, params);
+  } catch {
+    return EMPTY_PAGE;
+  }
+}
+
+// Several GET endpoints in one round-trip; returns the bodies in order (null for failed items).
+export async function batchGet(paths, token, { parallel = true } = {}) {
+  const res = await fetch(`${API_BASE}/batch/`, {
+    method: "POST",
+    cache: "no-cache",
+    headers: { "Content-Type": "application/json", ...authHeaders(token) },
+    body: JSON.stringify({ parallel, requests: paths.map((path) => `/api${path}`) }),
+  });
+  if (!res.ok) throw new Error("Batch request failed");
+  const data = await res.json();
+  return data.responses.map((item) => (item.status >= 200 && item.status < 300 ? item.body : null));
+}
+
+// Server-sent dashboard deltas (fetch-based so the token stays in the Authorization header).
+// Calls onEvent({ type, ... }) per event and reconnects after drops; returns a stop function.
+// A WSGI backend answers 503 with poll_seconds: then a periodic "resync" stands in for the stream.
+export function subscribeEvents(token, onEvent) {
+  const controller = new AbortController();
+  let pollTimer = null;
+  async function run() {
+    while (!controller.signal.aborted) {
+      try {
+        const res = await fetch(`${API_BASE}/events/`, { headers: authHeaders(token), signal: controller.signal });
+        if (res.status === 503) {
+          const { poll_seconds: pollSeconds } = await res.json().catch(() => ({}));
+          if (pollSeconds && !controller.signal.aborted) {
+            pollTimer = setInterval(() => onEvent({ type: "resync" }), pollSeconds * 1000);
+            return;
+          }
+        }
+        if (!res.ok || !res.body) throw new Error("Event stream unavailable");
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let boundary;
+          while ((boundary = buffer.indexOf("\n\n")) >= 0) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = frame.split("\n").filter((line) => line.startsWith("data: ")).map((line) => line.slice(6)).join("\n");
+            if (data) onEvent(JSON.parse(data));
+          }
+        }
+      } catch {
+        if (controller.signal.aborted) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 3000));
+    }
+  }
+  run();
+  return () => {
+    controller.abort();
+    if (pollTimer) clearInterval(pollTimer);
+  };
+}
+
 // Dashboard summary for invoices
 export async function getFinanceSummary(token) {
   try {
@@ -42,14 +145,8 @@ export async function getFinanceSummary(token) {
 }
 
 // Invoices CRUD
-export async function getInvoices(token) {
-  try {
-    const res = await fetch(`${API_BASE}/invoices/`, { cache: "no-cache", headers: authHeaders(token) });
-    if (!res.ok) return [];
-    return await res.json();
-  } catch {
-    return [];
-  }
+export async function getInvoices(token, params) {
+  return firstPage("/invoices/", token, params);
 }
 
 export async function getInvoice(id, token) {
@@ -85,10 +182,21 @@ export async function deleteInvoice(id, token) {
 }
 
 // Core: Users & Settings (requires auth token to be appended if protected)
-export async function getUsers(token) {
-  const res = await fetch(`${API_BASE}/users/`, { headers: authHeaders(token) });
-  if (!res.ok) throw new Error("Failed to load users");
-  return res.json();
+export async function getUsers(token, params) {
+  return fetchPage("/users/", token, params);
+}
+
+export async function bulkCreateUsers(file, token) {
+  const formData = new FormData();
+  formData.append("file", file);
+  const res = await fetch(`${API_BASE}/users/bulk/`, {
+    method: "POST",
+    headers: authHeaders(token),
+    body: formData,
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok && !data?.errors) throw new Error(data?.detail || "Failed to import users");
+  return data;
 }
 export async function getCurrentUser(token) {
   const res = await fetch(`${API_BASE}/users/me/`, { headers: authHeaders(token) });
@@ -195,11 +303,87 @@ export async function updateCompanySettings(payload, token) {
   return res.json();
 }
 
+// Catalog snapshot: services + products, synced by version and kept in localStorage
+const CATALOG_KEY = "catalogSnapshot";
+const CATALOG_KINDS = ["service", "product", "api_product"];
+
+function mergeCatalog(local, delta) {
+  const merged = { ...local, version: delta.version, fields: delta.fields };
+  CATALOG_KINDS.forEach((kind) => {
+    const rows = new Map((local[kind] || []).map((row) => [row[0], row]));
+    (delta[kind] || []).forEach((row) => rows.set(row[0], row));
+    merged[kind] = [...rows.values()];
+  });
+  (delta.deleted || []).forEach(([kind, id]) => {
+    merged[kind] = (merged[kind] || []).filter((row) => row[0] !== id);
+  });
+  return merged;
+}
+
+function catalogObjects(snapshot) {
+  const toObjects = (kind) =>
+    (snapshot[kind] || []).map((row) =>
+      Object.fromEntries(snapshot.fields[kind].map((field, i) => [field, row[i]]))
+    );
+  return {
+    version: snapshot.version,
+    services: toObjects("service"),
+    products: toObjects("product"),
+    apiProducts: toObjects("api_product"),
+  };
+}
+
+// Offline replica via the change feed: pass the previous { cursor, fields, tables } (or null)
+// and persist the result. Tables map id -> row array in the server's field order.
+// A full sync arrives in pages chained by their "next" token.
+export async function syncReplica(token, replica) {
+  let next = replica ? { ...replica, tables: { ...replica.tables } } : null;
+  let page = null;
+  for (;;) {
+    const qs = page ? buildQuery({ page }) : next ? buildQuery({ since: next.cursor }) : "";
+    const res = await fetch(`${API_BASE}/sync/${qs}`, { headers: authHeaders(token), cache: "no-cache" });
+    if (!res.ok) throw new Error("Failed to sync");
+    const data = await res.json();
+    if ((data.full && !page) || !next) next = { cursor: 0, fields: data.fields, tables: {} };
+    Object.entries(data.changes).forEach(([name, rows]) => {
+      const table = { ...(next.tables[name] || {}) };
+      rows.forEach((row) => {
+        table[row[0]] = row;
+      });
+      (data.deleted[name] || []).forEach((id) => delete table[id]);
+      next.tables[name] = table;
+    });
+    next.fields = data.fields;
+    next.cursor = data.cursor;
+    page = data.next || null;
+    if (!data.more) return next;
+  }
+}
+
+export async function getCatalog(token) {
+  let local = null;
+  if (typeof window !== "undefined") {
+    try {
+      local = JSON.parse(localStorage.getItem(CATALOG_KEY) || "null");
+    } catch {}
+  }
+  const qs = local ? buildQuery({ since_version: local.version }) : "";
+  const res = await fetch(`${API_BASE}/catalog/${qs}`, { headers: authHeaders(token), cache: "no-cache" });
+  if (!res.ok) {
+    if (local) return catalogObjects(local);
+    throw new Error("Failed to load catalog");
+  }
+  const data = await res.json();
+  const next = data.full || !local ? data : mergeCatalog(local, data);
+  if (typeof window !== "undefined") {
+    localStorage.setItem(CATALOG_KEY, JSON.stringify(next));
+  }
+  return catalogObjects(next);
+}
+
 // Products
-export async function getProducts(token) {
-  const res = await fetch(`${API_BASE}/products/`, { headers: authHeaders(token), cache: "no-cache" });
-  if (!res.ok) return [];
-  return res.json();
+export async function getProducts(token, params) {
+  return firstPage("/products/", token, params);
 }
 
 export async function createProduct(payload, token) {
@@ -222,6 +406,16 @@ export async function updateProduct(id, payload, token) {
   return res.json();
 }
 
+export async function adjustStock(id, delta, token, note = "") {
+  const res = await fetch(`${API_BASE}/products/${id}/movements/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", ...authHeaders(token) },
+    body: JSON.stringify({ delta, note }),
+  });
+  if (!res.ok) throw new Error("Failed to adjust stock");
+  return res.json();
+}
+
 export async function deleteProduct(id, token) {
   const res = await fetch(`${API_BASE}/products/${id}/`, {
     method: "DELETE",
@@ -249,10 +443,7 @@ export async function getFinanceMonthly(token, params) {
 }
 
 export async function getExpenses(token, params) {
-  const qs = buildQuery(params);
-  const res = await fetch(`${API_BASE}/finance/expenses/${qs}`, { headers: authHeaders(token), cache: "no-cache" });
-  if (!res.ok) return [];
-  return res.json();
+  return firstPage("/finance/expenses/", token, params);
 }
 
 export async function createExpense(payload, token) {
@@ -275,10 +466,8 @@ export async function deleteExpense(id, token) {
 }
 
 // Projects (gallery + uploads)
-export async function getProjects(token) {
-  const res = await fetch(`${API_BASE}/projects/`, { headers: authHeaders(token), cache: "no-cache" });
-  if (!res.ok) return [];
-  return res.json();
+export async function getProjects(token, params) {
+  return firstPage("/projects/", token, params);
 }
 
 export async function createProject(formData, token) {
@@ -301,10 +490,8 @@ export async function deleteProject(id, token) {
 }
 
 // Services
-export async function getServices(token) {
-  const res = await fetch(`${API_BASE}/services/`, { headers: authHeaders(token), cache: "no-cache" });
-  if (!res.ok) return [];
-  return res.json();
+export async function getServices(token, params) {
+  return firstPage("/services/", token, params);
 }
 
 export async function createService(payload, token) {
@@ -337,10 +524,8 @@ export async function deleteService(id, token) {
 }
 
 // Employees (students)
-export async function getEmployees(token) {
-  const res = await fetch(`${API_BASE}/employees/`, { headers: authHeaders(token), cache: "no-cache" });
-  if (!res.ok) return [];
-  return res.json();
+export async function getEmployees(token, params) {
+  return firstPage("/employees/", token, params);
 }
 export async function createEmployee(payload, token) {
   const res = await fetch(`${API_BASE}/employees/`, {
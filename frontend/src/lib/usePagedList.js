@@ -0,0 +1,30 @@
+"use client";
+import { useState } from "react";
+import { fetchNextPage } from "@/lib/api";
+
+// A cursor-paginated list loaded one page at a time: reset(page) with the first
+// page, loadMore(token) when the user asks for the next one.
+export function usePagedList() {
+  const [rows, setRows] = useState([]);
+  const [next, setNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  function reset(page) {
+    setRows(page?.results || []);
+    setNext(page?.next || null);
+  }
+
+  async function loadMore(token) {
+    if (!next || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchNextPage(next, token);
+      setRows((current) => [...current, ...(page.results || [])]);
+      setNext(page.next || null);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
+  return { rows, setRows, hasMore: Boolean(next), loadingMore, reset, loadMore };
+}